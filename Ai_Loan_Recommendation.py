@@ -1,53 +1,5 @@
 import streamlit as st
-
-# Predefined education loan schemes with additional details
-education_loans = [
-    {
-        "name": "SBI Education Loan",
-        "min_academic_score": 70,
-        "min_credit_score": 750,
-        "max_annual_income": 2000000,
-        "description": "Offers competitive rates for higher studies in India and abroad.",
-        "tenure": "15 years",
-        "interest_rate": "7.5%"
-    },
-    {
-        "name": "HDFC Education Loan",
-        "min_academic_score": 75,
-        "min_credit_score": 720,
-        "max_annual_income": 1800000,
-        "description": "Covers tuition fees and other expenses with attractive interest rates.",
-        "tenure": "10-15 years",
-        "interest_rate": "8.0%"
-    },
-    {
-        "name": "Axis Bank Education Loan",
-        "min_academic_score": 65,
-        "min_credit_score": 700,
-        "max_annual_income": 1500000,
-        "description": "Quick approval process and broad coverage for educational expenses.",
-        "tenure": "10 years",
-        "interest_rate": "9.0%"
-    },
-    {
-        "name": "PNB Education Loan",
-        "min_academic_score": 60,
-        "min_credit_score": 680,
-        "max_annual_income": 1600000,
-        "description": "Competitive rates with extensive support for educational financing.",
-        "tenure": "10 years",
-        "interest_rate": "10.0%"
-    },
-    {
-        "name": "Canara Bank Education Loan",
-        "min_academic_score": 70,
-        "min_credit_score": 700,
-        "max_annual_income": 1700000,
-        "description": "Provides comprehensive financial support with flexible repayment options.",
-        "tenure": "15 years",
-        "interest_rate": "7.8%"
-    }
-]
+from bfsi import catalogue, loans, risk_model, scoring, uploads
 
 def ai_loan_recommendation_module():
     st.title("AI Loan Recommendation")
@@ -67,39 +19,66 @@ def ai_loan_recommendation_module():
         past_loan_amount = st.number_input("Enter the Past Loan Amount (INR)", min_value=0.0, value=50000.0)
         emi_bounces = st.number_input("Number of EMI bounces", min_value=0, value=0)
     
-    # Simple risk calculation (adjust weights/thresholds as needed)
-    risk = 0
-    risk += (100 - academic_score) * 0.1
-    risk += (850 - credit_score) * 0.05
-    risk += (100 - marks_12) * 0.1
-    if ug_marks_optional:
-        risk += (100 - ug_marks) * 0.05
-    if past_loan_taken == "Yes":
-        risk += (past_loan_amount / 100000) * 0.2
-        risk += emi_bounces * 5
+    # Products from an uploaded catalogue, else the configured one
+    catalogue_file = st.file_uploader("Loan Catalogue (JSON or CSV, optional)", type=["json", "csv"])
+    products = catalogue.get_catalogue()
+    if catalogue_file is not None:
+        try:
+            products = catalogue.load_upload(catalogue_file, st.session_state)
+        except Exception as e:
+            st.error(f"Error reading {catalogue_file.name}: {e}")
+    
+    # Simple risk calculation (adjust weights/thresholds in bfsi/loans.py)
+    risk = loans.risk_score(academic_score, credit_score, marks_12,
+                            ug_marks=ug_marks if ug_marks_optional else None,
+                            past_loan_amount=past_loan_amount, emi_bounces=emi_bounces)
+    
+    # A trained model, when one has been saved, replaces the formula
+    model = risk_model.get_model()
+    if model is not None:
+        probability = model.probability(academic_score, credit_score, marks_12,
+                                        ug_marks=ug_marks if ug_marks_optional else None,
+                                        past_loan_amount=past_loan_amount, emi_bounces=emi_bounces,
+                                        annual_income=annual_income)
+        st.markdown(f"**Predicted Default Probability:** {probability:.1%}")
+        st.caption(f"Risk score from the trained model ({model.describe()}); the formula gives {risk:.2f}.")
+        risk = 100 * probability
     
     st.markdown(f"**Calculated Risk Score:** {risk:.2f}")
     
-    # Loan recommendation logic based on risk thresholds
-    recommended = []
-    if risk < 20:
-        recommended = [loan for loan in education_loans if loan["name"] in 
-                       ["SBI Education Loan", "HDFC Education Loan", "Canara Bank Education Loan"]]
-    elif 20 <= risk < 40:
-        recommended = [loan for loan in education_loans if loan["name"] == "Axis Bank Education Loan"]
-    else:
-        recommended = [loan for loan in education_loans if loan["name"] == "PNB Education Loan"]
+    # Products whose academic, credit, income and risk criteria the applicant meets
+    recommended = products.eligible(academic_score, credit_score, annual_income, risk)
     
     if recommended:
         st.subheader("Recommended Education Loans")
-        for loan in recommended:
+        st.caption(f"{len(recommended):,} of {len(products):,} products in the catalogue match your details.")
+        for loan in recommended[:20]:
             st.markdown(f"**{loan['name']}**")
-            st.write(loan["description"])
-            st.write(f"**Tenure:** {loan['tenure']}")
-            st.write(f"**Interest Rate:** {loan['interest_rate']}")
+            if loan.get("description"):
+                st.write(loan["description"])
+            st.write(f"**Tenure:** {loan.get('tenure', 'n/a')}")
+            st.write(f"**Interest Rate:** {loan.get('interest_rate', 'n/a')}")
     else:
         st.write("Based on your inputs, no education loans are recommended.")
 
+    # Batch scoring of a whole applicant file with the same risk model or formula
+    st.subheader("Batch Scoring")
+    st.markdown("Upload a CSV or Parquet file with one applicant per row and the columns `academic_score`, `credit_score` "
+                "and `marks_12`, optionally with `ug_marks`, `past_loan_amount`, `emi_bounces` and `annual_income`.")
+    applicants = st.file_uploader("Upload Applicants (CSV or Parquet)", type=["csv", "parquet"])
+    applicants = uploads.session_files(st.session_state, "applicants", applicants)
+    if applicants is not None:
+        try:
+            df = scoring.read_applicants(applicants.path, scoring.file_format(applicants.name))
+            scored, report = scoring.score_frame(df, products, model)
+            st.caption(str(report))
+            st.dataframe(scoring.band_summary(report))
+            st.dataframe(scored.head(100))
+            st.download_button("Download Scored Applicants (CSV)", scored.to_csv(index=False).encode(),
+                               file_name="scored_applicants.csv", mime="text/csv")
+        except Exception as e:
+            st.error(f"Error scoring {applicants.name}: {e}")
+
 def main():
     ai_loan_recommendation_module()
 
@@ -1,59 +1,168 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+from bfsi import charts, frames, indicators, portfolio, render, stocks, stockstore, uploads
+from bfsi.lazy import lazy_import
 
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Also the Stock Analysis page of app.py, which calls it
 def stock_analysis_module():
     st.title("Stock Market Analysis")
     st.markdown("Upload one or more CSV files containing stock data. Each CSV file should have at least two columns: `Date` and `Close`.")
     
     # Upload multiple CSV files
     files = st.file_uploader("Upload Stock Market Data (CSV)", type=["csv"], accept_multiple_files=True)
+    files = uploads.session_files(st.session_state, "stocks", files)
+    
+    # Columnar store of every ingested upload (None without pyarrow)
+    store = stockstore.get_store() if stockstore.available() else None
     
     # To store individual stock series for combined visualization
     aggregated_series = []
+    # (name, content key) per series; stands in for the data in the chart cache
+    series_keys = []
+    uploaded_tickers = []
+    history = start = end = None
     
     if files:
         for idx, file in enumerate(files, start=1):
             st.markdown(f"### Stock Data File {idx}: {file.name}")
             try:
-                # Read the CSV file into a DataFrame
-                df = pd.read_csv(file)
+                # Read the CSV file into a DataFrame (cached across reruns)
+                entry = frames.load_upload(file, st.session_state)
+                df = entry.df
                 st.subheader("Data Preview")
                 st.dataframe(df.head())
                 
                 # Check if required columns exist
-                if "Date" in df.columns and "Close" in df.columns:
-                    # Convert the Date column to datetime and sort the data
-                    df["Date"] = pd.to_datetime(df["Date"])
-                    df = df.sort_values("Date")
+                if stocks.has_price_columns(df):
+                    # Closing prices indexed by date, sorted oldest first
+                    close = entry.memo("close", lambda: stocks.close_series(df))
                     
                     # Display an individual line chart for the stock's closing price
-                    st.line_chart(df.set_index("Date")["Close"])
+                    # Downsampled (LTTB) so long histories stay quick to draw
+                    st.line_chart(entry.memo(("close_plot", render.POINT_BUDGET),
+                                             lambda: render.downsample_series(close)))
                     st.markdown("**Individual Stock Trend:** The above chart shows the stock's closing prices over time.")
                     
-                    # Append the series for combined visualization
-                    aggregated_series.append((file.name, df.set_index("Date")["Close"]))
+                    if store is not None:
+                        # Ingested once per upload; only days after the last stored one are appended
+                        ticker = stocks.ticker_for_name(file.name)
+                        added = entry.memo(("stored", store.root, ticker), lambda: store.ingest(ticker, df))
+                        st.caption(f"Stored as {ticker}; this file added {added} new day(s).")
+                        uploaded_tickers.append(ticker)
+                    else:
+                        # Append the series for combined visualization
+                        aggregated_series.append((file.name, close))
+                        series_keys.append((file.name, entry.digest))
                 else:
                     st.info("The CSV must contain 'Date' and 'Close' columns.")
             except Exception as e:
                 st.error(f"Error reading {file.name}: {e}")
-        
-        # If multiple stock series have been uploaded, create a combined visualization
-        if aggregated_series:
-            st.subheader("Combined Stock Closing Prices")
-            st.markdown("This combined chart overlays the closing prices of all uploaded stocks for comparison.")
-            fig, ax = plt.subplots(figsize=(10, 6))
-            cmap = plt.get_cmap("tab10")
-            for i, (name, series) in enumerate(aggregated_series):
-                ax.plot(series.index, series.values, label=name, color=cmap(i))
+    
+    stored = store.tickers() if store is not None else []
+    if not files and not stored:
+        st.info("Please upload at least one CSV file for stock market analysis.")
+    
+    # Compare any stored tickers, reading only the chosen tickers, dates and the Close column
+    if stored:
+        st.subheader("Stored Tickers")
+        default = [ticker for ticker in uploaded_tickers if ticker in stored] or stored
+        selected = st.multiselect("Tickers to compare", stored, default=default)
+        # Full history, since indicators need the days before the chosen range to warm up
+        history = store.close_prices(selected)
+        if len(history) and history.index[0] < history.index[-1]:
+            start, end = st.slider("Date range", min_value=history.index[0].date(), max_value=history.index[-1].date(),
+                                   value=(history.index[0].date(), history.index[-1].date()))
+            start, end = pd.Timestamp(start), pd.Timestamp(end)
+        wide = history.loc[start:end]
+        aggregated_series = [(ticker, wide[ticker].dropna()) for ticker in wide.columns]
+        # Closes are re-read per ticker only when its stored parts change
+        series_keys = [(ticker, store.version(ticker)) for ticker in wide.columns]
+    
+    # If multiple stock series are available, create a combined visualization
+    if aggregated_series:
+        st.subheader("Combined Stock Closing Prices")
+        st.markdown("This combined chart overlays the closing prices of the selected stocks for comparison.")
+        def draw_combined(ax):
+            note = render.lines(ax, aggregated_series)
             ax.set_xlabel("Date")
             ax.set_ylabel("Closing Price")
             ax.set_title("Combined Line Chart of Stock Closing Prices")
             ax.legend(title="Stocks")
-            st.pyplot(fig)
-    else:
-        st.info("Please upload at least one CSV file for stock market analysis.")
+            return note
+        # Memoised by each series' file digest or stored version, so reruns do not
+        # rehash every series; the figure is closed as soon as it is saved
+        chart = charts.render("stocks", draw_combined, params=(series_keys, start, end, render.POINT_BUDGET),
+                              figsize=(10, 6))
+        charts.show_chart(chart)
+        
+        # Technical indicators for all stocks at once on one date-aligned frame
+        st.subheader("Technical Indicators")
+        st.markdown("Indicators are computed over each stock's full history and memoised, so newly stored days only extend them.")
+        window = st.slider("Indicator window (days)", min_value=5, max_value=100, value=indicators.DEFAULT_WINDOW)
+        name = st.selectbox("Indicator", indicators.INDICATORS)
+        closes = stocks.aligned_closes(history if history is not None else aggregated_series)
+        table = indicators.get_engine().indicators(closes, window)
+        shown = table[name].loc[start:end]
+        def draw_indicator(ax):
+            note = render.lines(ax, shown)
+            if name == "RSI":
+                for level in (30, 70):
+                    ax.axhline(level, color="grey", linestyle="--", linewidth=0.8)
+            ax.set_xlabel("Date")
+            ax.set_ylabel(name)
+            ax.set_title(f"{name} ({window}-day window)")
+            ax.legend(title="Stocks")
+            return note
+        chart = charts.render("indicator", draw_indicator, data=shown,
+                              params=(name, window, render.POINT_BUDGET), figsize=(10, 6))
+        charts.show_chart(chart)
+        st.markdown("**Latest values:**")
+        st.dataframe(indicators.latest(table))
+        
+        # Cross-asset statistics for all stocks at once on one date-aligned frame
+        if len(closes.columns) > 1:
+            st.subheader("Portfolio")
+            st.markdown("Correlation, covariance and rolling beta of daily log returns, with missing dates filled by the chosen rule.")
+            fill = st.selectbox("Fill rule for missing dates", list(stocks.FILL_RULES))
+            st.caption(stocks.FILL_RULES[fill])
+            aligned = stocks.aligned_closes(history if history is not None else aggregated_series, fill)
+            returns = portfolio.log_returns(aligned).loc[start:end]
+            covariance, correlation = portfolio.return_matrices(returns)
+            def draw_correlation(ax):
+                image = ax.imshow(correlation.to_numpy(), vmin=-1, vmax=1, cmap="RdBu_r")
+                ax.figure.colorbar(image, ax=ax, label="Correlation")
+                if len(correlation) <= 30:
+                    ax.set_xticks(range(len(correlation)), correlation.columns, rotation=90)
+                    ax.set_yticks(range(len(correlation)), correlation.index)
+                if len(correlation) <= 10:
+                    for (i, j), value in np.ndenumerate(correlation.to_numpy()):
+                        ax.text(j, i, f"{value:.2f}", ha="center", va="center", fontsize=8)
+                ax.set_title("Correlation of Daily Log Returns")
+            chart = charts.render("correlation", draw_correlation, data=correlation, figsize=(8, 6))
+            charts.show_chart(chart)
+            st.markdown("**Covariance of daily log returns:**")
+            st.dataframe(covariance)
+            benchmark = st.selectbox("Benchmark", [portfolio.EQUAL_WEIGHT] + list(returns.columns))
+            max_window = min(250, max(len(returns), 11))
+            rolling_window = st.slider("Rolling window (days)", min_value=10, max_value=max_window,
+                                       value=min(portfolio.DEFAULT_ROLLING_WINDOW, max_window))
+            statistic = st.selectbox("Rolling statistic", ["Correlation", "Beta"])
+            benchmark_series = portfolio.benchmark_returns(returns, benchmark)
+            rolling = getattr(portfolio.rolling_against(returns, benchmark_series, rolling_window), statistic.lower())
+            def draw_rolling(ax):
+                note = render.lines(ax, rolling)
+                ax.set_xlabel("Date")
+                ax.set_ylabel(statistic)
+                ax.set_title(f"{rolling_window}-day Rolling {statistic} against {benchmark}")
+                ax.legend(title="Stocks")
+                return note
+            chart = charts.render("rolling", draw_rolling, data=rolling,
+                                  params=(statistic, benchmark, rolling_window, render.POINT_BUDGET), figsize=(10, 6))
+            charts.show_chart(chart)
+            st.markdown(f"**Against {benchmark} over the selected dates:**")
+            st.dataframe(portfolio.summary(returns, benchmark_series))
 
 def main():
     stock_analysis_module()
@@ -1,12 +1,20 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import pytesseract
-from PIL import Image
-import re
 import random
-from sklearn.cluster import KMeans
+import time
+# modules used by a single page are imported inside it
+from bfsi import charts, documents, frames, jobs, metrics, ocr, ocr_scheduler, streaming, uploads
+from bfsi.lazy import lazy_import
+from bfsi.preprocess import PreprocessOptions
+
+# Heavy packages load on first use, so opening one module does not pay
+# for the imports of every other module
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
+plt = lazy_import("matplotlib.pyplot")
+
+# Set by a module whose background job is still running; main() then
+# reruns the script to poll it
+POLL_KEY = "_poll_background_job"
 
 # =============================================================================
 # Helper Function: Generate Vibrant Colors
@@ -40,6 +48,8 @@ def demo_email_otp_authentication():
             try:
                 if int(user_otp) == st.session_state.get("generated_otp"):
                     st.session_state.otp_verified = True
+                    # background jobs are found again by e-mail after a refresh
+                    st.session_state.user_email = recipient_email.strip().lower()
                     st.success("OTP verified successfully!")
                 else:
                     st.error("Incorrect OTP. Please try again.")
@@ -101,325 +111,259 @@ st.markdown(
 # Module 1: Supervised Module - Document Analysis
 # =============================================================================
 def supervised_module():
+    from bfsi import statement
+
     st.title("Supervised Module - Document Analysis")
-    st.markdown("Upload documents (CSV and/or images) for analysis. For images, OCR extracts text and numeric values (if any) are aggregated for visualization.")
+    st.markdown("Upload documents (CSV, PDF and/or images) for analysis. For images and PDFs, text is extracted (via OCR where needed) and numeric values (if any) are aggregated for visualization.")
     
-    doc_type = st.selectbox("Select Document Type", 
-                             ["Invoices", "Bank Statements", "Payslips", "Balance Sheets", "Profit/Loss Statements"])
+    doc_type = st.selectbox("Select Document Type", documents.DOC_TYPES)
     st.write(f"**Document Type Selected:** {doc_type}")
     
     files = st.file_uploader(f"Upload {doc_type} Documents", 
                              type=["csv", "png", "jpg", "jpeg", "pdf", "doc", "docx", "tiff"],
                              accept_multiple_files=True)
-    aggregated_values = []
+    # spooled to disk once per upload: readers and OCR jobs work from the
+    # files instead of holding copies of the uploads
+    files = uploads.session_files(st.session_state, "supervised", files)
+    # the worker pool is shared by all sessions; this only limits how many of
+    # this upload's pages wait on it at a time
+    workers = int(st.sidebar.number_input("OCR pages in parallel", min_value=1,
+                                          max_value=ocr_scheduler.get_scheduler().slots,
+                                          value=ocr.default_workers()))
+    with st.sidebar.expander("OCR Preprocessing"):
+        preprocess_enabled = st.checkbox("Preprocess images before OCR", value=True)
+        target_dpi = st.number_input("Target DPI (0 keeps full resolution)", min_value=0, max_value=600,
+                                     value=300, step=50)
+        colour_mode = st.selectbox("Colour mode", ["grayscale", "binary", "none"])
+        deskew = st.checkbox("Deskew", value=True)
+        crop = st.checkbox("Crop to content", value=True)
+    preprocess_options = None
+    if preprocess_enabled:
+        preprocess_options = PreprocessOptions(target_dpi=int(target_dpi), mode=colour_mode,
+                                               deskew=deskew, crop=crop)
+    # Large CSVs are read in chunks and only summarised, never held whole
+    stream_csv = st.sidebar.checkbox("Streaming CSV mode", value=any(map(streaming.is_large_upload, files or [])),
+                                     help="Read CSVs in chunks and compute statistics incrementally")
+    # Bank statements are rebuilt into typed rows from OCR word boxes
+    is_statement = doc_type == "Bank Statements"
+    statements = {}
     
     if files:
-        for file in files:
+        # One container per file keeps the upload order while OCR results
+        # stream in from the worker pool in completion order.
+        slots = [st.container() for _ in files]
+        # per-file results are cached by content hash, so a rerun after
+        # adding a file only processes the new or changed ones
+        results = documents.get_results()
+        parts = [None] * len(files)
+        keys = {}
+        pending = {}
+        
+        def show_result(idx, result):
+            if result.text is not None:
+                st.markdown("**Extracted Text:**")
+                st.text_area("", result.text, height=150, key=f"extracted_text_{idx}")
+            if result.note:
+                st.caption(result.note)
+            if result.transactions is not None:
+                statements[idx] = result.transactions
+            parts[idx] = result.part
+        
+        for idx, (slot, file) in enumerate(zip(slots, files)):
             ext = file.name.split(".")[-1].lower()
-            st.markdown(f"**Processing: {file.name}**")
-            if ext == "csv":
-                try:
-                    df = pd.read_csv(file)
-                    st.markdown("**CSV Preview:**")
-                    st.dataframe(df.head())
-                    if "Amount" in df.columns:
-                        values = df["Amount"].dropna().tolist()
+            with slot:
+                st.markdown(f"**Processing: {file.name}**")
+                if ext == "csv" and stream_csv:
+                    try:
+                        scan = streaming.scan_upload(file, st.session_state)
+                        st.markdown(f"**CSV Preview:** first rows of {scan.rows:,}")
+                        st.dataframe(scan.preview)
+                        column = documents.value_column(scan.columns, scan.numeric_columns)
+                        if column in scan.stats:
+                            parts[idx] = streaming.column_partial(scan, column)
+                    except Exception as e:
+                        st.error(f"Error reading CSV: {e}")
+                elif ext == "csv":
+                    try:
+                        entry = frames.load_upload(file, st.session_state)
+                        st.markdown("**CSV Preview:**")
+                        st.dataframe(entry.df.head())
+                        parts[idx] = entry.memo("csv_partial",
+                                                lambda: streaming.Partial(documents.csv_values(entry.df)))
+                    except Exception as e:
+                        st.error(f"Error reading CSV: {e}")
+                elif ext in ocr.IMAGE_EXTENSIONS or ext == "pdf":
+                    keys[idx] = documents.result_key(file, doc_type, preprocess_options)
+                    cached = results.get(keys[idx])
+                    if cached is not None:
+                        show_result(idx, cached)
                     else:
-                        num_cols = df.select_dtypes(include=np.number).columns.tolist()
-                        values = df[num_cols[0]].dropna().tolist() if num_cols else []
-                    aggregated_values.extend(values)
-                except Exception as e:
-                    st.error(f"Error reading CSV: {e}")
-            elif ext in ["png", "jpg", "jpeg", "tiff"]:
-                try:
-                    image = Image.open(file)
-                    extracted_text = pytesseract.image_to_string(image)
-                    st.markdown("**Extracted Text:**")
-                    st.text_area("", extracted_text, height=150)
-                    numbers = re.findall(r'\d+\.\d{2}', extracted_text)
-                    values = [float(x) for x in numbers]
-                    aggregated_values.extend(values)
-                except Exception as e:
-                    st.error(f"Error processing image: {e}")
-            elif ext in ["pdf", "doc", "docx"]:
-                st.info(f"File {file.name} uploaded. Detailed OCR is not implemented for this format.")
-            else:
-                st.info(f"File {file.name}: Unsupported file format.")
+                        pending.setdefault(keys[idx], (file.name, file))
+                elif ext in ["doc", "docx"]:
+                    st.info(f"File {file.name} uploaded. Detailed OCR is not implemented for this format.")
+                else:
+                    st.info(f"File {file.name}: Unsupported file format.")
+        
+        # Uncached images and PDFs are extracted by a background job, so a
+        # widget click or a browser refresh does not throw away OCR in progress
+        if pending:
+            queue = jobs.get_queue()
+            owner = jobs.session_owner(st.session_state)
+            doc_jobs = [(key, name, data) for key, (name, data) in pending.items()]
+            def submit(retry=False):
+                return queue.submit(owner, "documents", documents.batch_key(pending),
+                                    lambda context: documents.process_files(doc_jobs, doc_type, workers,
+                                                                            preprocess_options, context),
+                                    label=f"{len(pending)} {doc_type} file(s)", retry=retry)
+            # Wait for the user's latest document job while it runs (its files
+            # leave `pending` as they finish), and show the failures of a
+            # finished one instead of retrying them on every rerun
+            job = next((job for job in queue.jobs_for(owner) if job.kind == "documents"), None)
+            failed = (queue.result(job.id) or {}) if job is not None else {}
+            running = job is not None and job.status in jobs.ACTIVE
+            all_failed = set(pending) <= set(failed)
+            # left for "Process again": a finished job whose files all failed,
+            # or a failed or cancelled job of these files
+            stopped = (job is not None and job.status != jobs.DONE
+                       and job.key == documents.batch_key(pending))
+            if not (running or all_failed or stopped):
+                job, failed = submit(retry=True), {}
+            
+            if job.status in jobs.ACTIVE:
+                st.progress(job.progress, text=job.message or f"{job.label} {job.status}...")
+                if st.button("Cancel processing"):
+                    queue.cancel(job.id)
+                    st.rerun()
+                st.session_state[POLL_KEY] = True
+            elif job.status in (jobs.FAILED, jobs.CANCELLED):
+                st.warning(f"Processing {job.status}" + (f": {job.error}" if job.error else "."))
+                if st.button("Process again"):
+                    submit(retry=True)
+                    st.rerun()
+            elif failed:
+                st.warning(f"{len(failed)} file(s) could not be fully processed; see the errors below.")
+                if st.button("Process again"):
+                    submit(retry=True)
+                    st.rerun()
+            
+            for idx, key in keys.items():
+                if key not in pending:
+                    continue
+                with slots[idx]:
+                    cached = results.get(key)
+                    if cached is not None:
+                        show_result(idx, cached)
+                    elif key in failed:
+                        outcome, errors = failed[key]
+                        for error in errors:
+                            st.error(error)
+                        if outcome is not None:
+                            show_result(idx, outcome)
+                    elif job.status in jobs.ACTIVE:
+                        st.caption("Processing in the background...")
+        
+        # aggregates are merged from the per-file parts; files added at the
+        # end of the upload only merge their own part
+        aggregated_values = streaming.aggregate([part for part in parts if part is not None],
+                                                st.session_state, key=("supervised", doc_type))
+        
+        statements = {idx: table for idx, table in statements.items() if not table.empty}
+        if statements:
+            st.subheader("Statement Transactions")
+            combined = pd.concat([statements[idx].assign(file=files[idx].name) for idx in sorted(statements)],
+                                 ignore_index=True)
+            st.dataframe(combined)
+            st.write("Statement Summary:", statement.summarise(combined))
+            st.markdown("**Monthly Flows:**")
+            st.dataframe(statement.monthly_flows(combined))
         
-        if aggregated_values:
+        if len(aggregated_values):
             st.subheader("Aggregated Data Analysis")
-            series = pd.Series(aggregated_values)
-            st.write("Summary Statistics:", series.describe())
+            st.write("Summary Statistics:", aggregated_values.describe())
+            if not aggregated_values.stats.exact_quantiles:
+                st.caption("Quartiles and the box plot use a uniform sample of "
+                           f"{len(aggregated_values.sample()):,} values.")
             
             st.markdown("**Histogram:**")
-            hist_vals, bin_edges = np.histogram(aggregated_values, bins=10)
-            colors = plt.get_cmap("Set1")(np.linspace(0, 1, len(hist_vals)))
-            fig, ax = plt.subplots()
-            for i in range(len(hist_vals)):
-                ax.bar((bin_edges[i] + bin_edges[i+1]) / 2, hist_vals[i],
-                       width=bin_edges[i+1]-bin_edges[i],
-                       color=colors[i], align='center')
-            ax.set_xlabel("Extracted Value")
-            ax.set_ylabel("Frequency")
-            ax.set_title(f"Histogram of {doc_type} Values")
-            st.pyplot(fig)
+            hist_vals, bin_edges = aggregated_values.histogram(bins=10)
+            def draw_histogram(ax):
+                colors = plt.get_cmap("Set1")(np.linspace(0, 1, len(hist_vals)))
+                for i in range(len(hist_vals)):
+                    ax.bar((bin_edges[i] + bin_edges[i+1]) / 2, hist_vals[i],
+                           width=bin_edges[i+1]-bin_edges[i],
+                           color=colors[i], align='center')
+                ax.set_xlabel("Extracted Value")
+                ax.set_ylabel("Frequency")
+                ax.set_title(f"Histogram of {doc_type} Values")
+            charts.show_chart(charts.render("histogram", draw_histogram, data=(hist_vals, bin_edges), params=doc_type))
             
             st.markdown("**Box Plot:**")
-            fig2, ax2 = plt.subplots()
-            bp = ax2.boxplot(aggregated_values, patch_artist=True)
-            for patch in bp['boxes']:
-                patch.set_facecolor(plt.get_cmap("Set1")(0.5))
-            ax2.set_title(f"Box Plot of {doc_type} Values")
-            st.pyplot(fig2)
+            box_values = aggregated_values.sample()
+            def draw_box(ax):
+                bp = ax.boxplot(box_values, patch_artist=True)
+                for patch in bp['boxes']:
+                    patch.set_facecolor(plt.get_cmap("Set1")(0.5))
+                ax.set_title(f"Box Plot of {doc_type} Values")
+            charts.show_chart(charts.render("box", draw_box, data=box_values, params=doc_type))
             
             st.markdown("**2D Pie Chart:**")
             try:
-                bins = np.linspace(min(aggregated_values), max(aggregated_values), 6)
-                binned = pd.cut(aggregated_values, bins=bins)
-                counts = binned.value_counts().sort_index()
-                labels = [f"{round(interval.left,2)} - {round(interval.right,2)}" for interval in counts.index]
-                pie_colors = plt.get_cmap("Set2")(np.linspace(0, 1, len(labels)))
-                fig3, ax3 = plt.subplots()
-                ax3.pie(counts, labels=labels, autopct="%1.1f%%", startangle=140, colors=pie_colors)
-                ax3.axis('equal')
-                ax3.set_title(f"2D Pie Chart of {doc_type} Values")
-                st.pyplot(fig3)
+                labels, counts = aggregated_values.binned_counts()
+                def draw_pie(ax):
+                    pie_colors = plt.get_cmap("Set2")(np.linspace(0, 1, len(labels)))
+                    ax.pie(counts, labels=labels, autopct="%1.1f%%", startangle=140, colors=pie_colors)
+                    ax.axis('equal')
+                    ax.set_title(f"2D Pie Chart of {doc_type} Values")
+                charts.show_chart(charts.render("pie", draw_pie, data=(list(labels), counts), params=doc_type))
             except Exception as e:
                 st.error(f"Error generating pie chart: {e}")
     else:
         st.info("Please upload at least one document file.")
+    
+    with st.sidebar.expander("Background Jobs"):
+        recent = jobs.get_queue().jobs_for(jobs.session_owner(st.session_state), limit=10)
+        if recent:
+            st.dataframe(pd.DataFrame([{"Job": job.label, "Status": job.status, "Progress": f"{job.progress:.0%}",
+                                        "Submitted": time.strftime("%H:%M:%S", time.localtime(job.created))}
+                                       for job in recent]))
+        else:
+            st.write("No background jobs yet.")
 
 # =============================================================================
 # Module 2: Semi-Supervised Module - Semi-Structured Data Analysis
 # =============================================================================
 def semi_supervised_module():
-    st.title("Semi-Supervised Module - Semi-Structured Data Analysis")
-    st.markdown("Upload a CSV file containing semi-structured data. The data will be previewed and a selected numeric column will be visualized.")
-    
-    file = st.file_uploader("Upload Semi-Structured CSV", type=["csv"])
-    if file:
-        try:
-            df = pd.read_csv(file)
-            st.subheader("Data Preview")
-            st.dataframe(df.head())
-            
-            numeric_cols = df.select_dtypes(include=np.number).columns.tolist()
-            if numeric_cols:
-                col = st.selectbox("Select a numeric column for visualization", numeric_cols)
-                
-                st.markdown("**Bar Chart:**")
-                fig, ax = plt.subplots()
-                df[col].plot(kind="bar", ax=ax, color=plt.get_cmap("Set2")(0.8), edgecolor='black')
-                ax.set_xlabel("Index")
-                ax.set_ylabel(col)
-                ax.set_title(f"Bar Chart of {col}")
-                st.pyplot(fig)
-                
-                st.markdown("**Pie Chart:**")
-                if df[col].nunique() <= 10:
-                    data = df[col].value_counts()
-                    labels = data.index.astype(str)
-                    sizes = data.values
-                else:
-                    bins = np.linspace(df[col].min(), df[col].max(), 6)
-                    data = pd.cut(df[col], bins=bins).value_counts().sort_index()
-                    labels = [f"{round(interval.left,2)} - {round(interval.right,2)}" for interval in data.index]
-                    sizes = data.values
-                colors = plt.get_cmap("Set2")(np.linspace(0, 1, len(labels)))
-                fig2, ax2 = plt.subplots()
-                ax2.pie(sizes, labels=labels, autopct="%1.1f%%", startangle=140, colors=colors)
-                ax2.axis('equal')
-                ax2.set_title(f"Pie Chart of {col}")
-                st.pyplot(fig2)
-            else:
-                st.info("No numeric columns found for visualization.")
-        except Exception as e:
-            st.error(f"Error processing CSV: {e}")
-    else:
-        st.info("Please upload a CSV file for semi-supervised analysis.")
+    # the page lives in semi_supervised.py, which also runs on its own
+    from semi_supervised import semi_supervised_module as page
+
+    page()
 
 # =============================================================================
 # Module 3: Unsupervised Module - Clustering Analysis
 # =============================================================================
 def unsupervised_module():
-    st.title("Unsupervised Module - Clustering Analysis")
-    st.markdown("Upload an unstructured CSV file to perform clustering analysis on a selected numeric column.")
-    
-    file = st.file_uploader("Upload CSV", type=["csv"])
-    if file:
-        try:
-            df = pd.read_csv(file)
-            st.subheader("Data Preview")
-            st.dataframe(df.head())
-            
-            numeric_cols = df.select_dtypes(include=np.number).columns.tolist()
-            if numeric_cols:
-                col = st.selectbox("Select a numeric column for clustering", numeric_cols)
-                try:
-                    X = df[[col]].dropna()
-                    kmeans = KMeans(n_clusters=3, random_state=0)
-                    clusters = kmeans.fit_predict(X)
-                    df['Cluster'] = None
-                    df.loc[X.index, 'Cluster'] = clusters
-                    st.subheader("Clustering Result")
-                    st.dataframe(df.head())
-                    
-                    st.markdown("**Scatter Plot of Clusters:**")
-                    fig, ax = plt.subplots()
-                    ax.scatter(range(len(X)), X[col], c=clusters, cmap='viridis')
-                    ax.set_xlabel("Index")
-                    ax.set_ylabel(col)
-                    ax.set_title(f"Clustering on {col}")
-                    st.pyplot(fig)
-                except Exception as e:
-                    st.error(f"Error during clustering: {e}")
-            else:
-                st.info("No numeric columns found in the CSV.")
-        except Exception as e:
-            st.error(f"Error reading CSV: {e}")
-    else:
-        st.info("Please upload a CSV file for clustering analysis.")
+    # the page lives in unsupervised.py, which also runs on its own
+    from unsupervised import unsupervised_module as page
+
+    page()
 
 # =============================================================================
 # Module 4: Stock Analysis Module - Stock Market Visualization
 # =============================================================================
 def stock_analysis_module():
-    st.title("Stock Market Analysis Module")
-    st.markdown("Upload CSV files containing stock data. Each file should have at least `Date` and `Close` columns.")
-    
-    files = st.file_uploader("Upload Stock Market Data (CSV)", type=["csv"], accept_multiple_files=True)
-    aggregated_series = []
-    if files:
-        for idx, file in enumerate(files, start=1):
-            st.markdown(f"### Stock Data File {idx}: {file.name}")
-            try:
-                df = pd.read_csv(file)
-                st.subheader("Data Preview")
-                st.dataframe(df.head())
-                if "Date" in df.columns and "Close" in df.columns:
-                    df["Date"] = pd.to_datetime(df["Date"])
-                    df = df.sort_values("Date")
-                    st.line_chart(df.set_index("Date")["Close"])
-                    st.markdown("**Individual Stock Trend:**")
-                    aggregated_series.append((file.name, df.set_index("Date")["Close"]))
-                else:
-                    st.info("CSV must contain 'Date' and 'Close' columns.")
-            except Exception as e:
-                st.error(f"Error reading {file.name}: {e}")
-        if aggregated_series:
-            st.subheader("Combined Stock Closing Prices")
-            fig, ax = plt.subplots(figsize=(10, 6))
-            cmap = plt.get_cmap("tab10")
-            for i, (name, series) in enumerate(aggregated_series):
-                ax.plot(series.index, series.values, label=name, color=cmap(i))
-            ax.set_xlabel("Date")
-            ax.set_ylabel("Closing Price")
-            ax.set_title("Combined Line Chart of Stock Closing Prices")
-            ax.legend(title="Stocks")
-            st.pyplot(fig)
-    else:
-        st.info("Upload at least one CSV file for stock market analysis.")
+    # the page lives in Stock_analysis.py, which also runs on its own
+    from Stock_analysis import stock_analysis_module as page
+
+    page()
 
 # =============================================================================
 # Module 5: AI Loan Recommendation Module
 # =============================================================================
-education_loans = [
-    {
-        "name": "SBI Education Loan",
-        "min_academic_score": 70,
-        "min_credit_score": 750,
-        "max_annual_income": 2000000,
-        "description": "Offers competitive rates for higher studies in India and abroad.",
-        "tenure": "15 years",
-        "interest_rate": "7.5%"
-    },
-    {
-        "name": "HDFC Education Loan",
-        "min_academic_score": 75,
-        "min_credit_score": 720,
-        "max_annual_income": 1800000,
-        "description": "Covers tuition fees and other expenses with attractive interest rates.",
-        "tenure": "10-15 years",
-        "interest_rate": "8.0%"
-    },
-    {
-        "name": "Axis Bank Education Loan",
-        "min_academic_score": 65,
-        "min_credit_score": 700,
-        "max_annual_income": 1500000,
-        "description": "Quick approval process and broad coverage for educational expenses.",
-        "tenure": "10 years",
-        "interest_rate": "9.0%"
-    },
-    {
-        "name": "PNB Education Loan",
-        "min_academic_score": 60,
-        "min_credit_score": 680,
-        "max_annual_income": 1600000,
-        "description": "Competitive rates with extensive support for educational financing.",
-        "tenure": "10 years",
-        "interest_rate": "10.0%"
-    },
-    {
-        "name": "Canara Bank Education Loan",
-        "min_academic_score": 70,
-        "min_credit_score": 700,
-        "max_annual_income": 1700000,
-        "description": "Provides comprehensive financial support with flexible repayment options.",
-        "tenure": "15 years",
-        "interest_rate": "7.8%"
-    }
-]
-
 def ai_loan_recommendation_module():
-    st.title("AI Loan Recommendation Module")
-    st.markdown("Enter your details to receive personalized education loan recommendations.")
-    
-    academic_score = st.number_input("Academic Score (0-100)", min_value=0, max_value=100, value=75)
-    credit_score = st.number_input("Credit Score (300-850)", min_value=300, max_value=850, value=720)
-    annual_income = st.number_input("Parent's Annual Income (INR)", min_value=0, value=1000000)
-    marks_12 = st.number_input("12th Marks Percentage", min_value=0.0, max_value=100.0, value=80.0)
-    ug_marks = st.number_input("Undergraduate Marks Percentage (Optional)", min_value=0.0, max_value=100.0, value=0.0)
-    ug_marks_optional = st.checkbox("Provide Undergraduate Marks")
-    
-    past_loan_taken = st.radio("Have you taken any loan in the past?", ("No", "Yes"))
-    past_loan_amount = 0.0
-    emi_bounces = 0
-    if past_loan_taken == "Yes":
-        past_loan_amount = st.number_input("Enter Past Loan Amount (INR)", min_value=0.0, value=50000.0)
-        emi_bounces = st.number_input("Number of EMI bounces", min_value=0, value=0)
-    
-    # Simple risk calculation
-    risk = 0
-    risk += (100 - academic_score) * 0.1
-    risk += (850 - credit_score) * 0.05
-    risk += (100 - marks_12) * 0.1
-    if ug_marks_optional:
-        risk += (100 - ug_marks) * 0.05
-    if past_loan_taken == "Yes":
-        risk += (past_loan_amount / 100000) * 0.2
-        risk += emi_bounces * 5
-    
-    st.markdown(f"**Calculated Risk Score:** {risk:.2f}")
-    
-    # Loan recommendation logic
-    recommended = []
-    if risk < 20:
-        recommended = [loan for loan in education_loans if loan["name"] in ["SBI Education Loan", "HDFC Education Loan", "Canara Bank Education Loan"]]
-    elif 20 <= risk < 40:
-        recommended = [loan for loan in education_loans if loan["name"] == "Axis Bank Education Loan"]
-    else:
-        recommended = [loan for loan in education_loans if loan["name"] == "PNB Education Loan"]
-    
-    if recommended:
-        st.subheader("Recommended Education Loans")
-        for loan in recommended:
-            st.markdown(f"**{loan['name']}**")
-            st.write(loan["description"])
-            st.write(f"**Tenure:** {loan['tenure']}")
-            st.write(f"**Interest Rate:** {loan['interest_rate']}")
-    else:
-        st.write("Based on your inputs, no education loans are recommended.")
+    # the page lives in Ai_Loan_Recommendation.py, which also runs on its own
+    from Ai_Loan_Recommendation import ai_loan_recommendation_module as page
+
+    page()
 
 # =============================================================================
 # Main Application: Integrated BFSI OCR Project with Demo Email OTP
@@ -443,16 +387,50 @@ def main():
     option = st.sidebar.selectbox("Select Module", 
                                   ["Supervised", "Semi-Supervised", "Unsupervised", "Stock Analysis", "AI Loan Recommendation"])
     
-    if option == "Supervised":
-        supervised_module()
-    elif option == "Semi-Supervised":
-        semi_supervised_module()
-    elif option == "Unsupervised":
-        unsupervised_module()
-    elif option == "Stock Analysis":
-        stock_analysis_module()
-    elif option == "AI Loan Recommendation":
-        ai_loan_recommendation_module()
+    # Stages timed during this run are also kept per session for the admin panel
+    metrics.bind_session(st.session_state)
+    ocr_scheduler.bind_owner(jobs.session_owner(st.session_state))
+    with metrics.stage(f"page.{option}"):
+        if option == "Supervised":
+            supervised_module()
+        elif option == "Semi-Supervised":
+            semi_supervised_module()
+        elif option == "Unsupervised":
+            unsupervised_module()
+        elif option == "Stock Analysis":
+            stock_analysis_module()
+        elif option == "AI Loan Recommendation":
+            ai_loan_recommendation_module()
+    
+    with st.sidebar.expander("Chart Cache"):
+        chart_stats = charts.stats()
+        st.write(f"{chart_stats['live_figures']} live figure(s), "
+                 f"{chart_stats['pyplot_figures']} open pyplot figure(s)")
+        st.write(f"{chart_stats['entries']} cached chart(s): {chart_stats['bytes'] / 2**20:.1f} of "
+                 f"{chart_stats['budget_bytes'] / 2**20:.0f} MB, {chart_stats['hits']} hit(s), "
+                 f"{chart_stats['misses']} miss(es)")
+    
+    # Hidden unless the URL carries ?admin=<BFSI_ADMIN_TOKEN>
+    if metrics.admin_enabled(st.query_params):
+        with st.sidebar.expander("Performance (admin)"):
+            st.markdown("**This session:**")
+            st.dataframe(metrics.summary(metrics.session_registry(st.session_state)))
+            st.markdown("**This process:**")
+            st.dataframe(metrics.summary())
+            scheduler_stats = ocr_scheduler.get_scheduler().stats()
+            st.markdown(f"**OCR scheduler:** {scheduler_stats['running']} of {scheduler_stats['slots']} slot(s) busy, "
+                        f"{sum(scheduler_stats['queued'].values())} page(s) queued")
+            if scheduler_stats["queued"]:
+                st.dataframe(pd.Series(scheduler_stats["queued"], name="Queued pages"))
+            spool_stats = uploads.get_spool().stats()
+            st.markdown(f"**Upload spool:** {spool_stats['files']} file(s), {spool_stats['bytes'] / 2**20:.1f} MiB "
+                        f"in `{spool_stats['folder']}`")
+            st.download_button("Download Prometheus metrics", metrics.prometheus_text(),
+                               file_name="bfsi_metrics.prom", mime="text/plain")
+    
+    if st.session_state.pop(POLL_KEY, False):
+        time.sleep(jobs.POLL_SECONDS)
+        st.rerun()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,380 @@
+"""
+Benchmark the core paths headlessly over the data/ corpus and synthetic scale-ups.
+
+Cases (``--cases``, default all):
+
+* ``ocr.statements``, ``ocr.payslips``, ``ocr.invoices``: the images of
+  data/Bank-Statement-Bundle, data/payslip and data/invoice collection
+  through ``documents.iter_documents`` with preprocessing and the OCR
+  cache off (units: pages);
+* ``csv.crop``, ``csv.boston``, ``csv.transactions``: parse, describe,
+  histogram and pie data of every numeric column, as the analysis modules
+  do (units: rows);
+* ``csv.stream``: the streaming scan of crop.csv with a histogram per
+  numeric column (units: rows);
+* ``clustering``: crop.csv's numeric columns, k chosen by silhouette;
+* ``indicators``: all indicators over the three stock files' closes;
+* ``loans``: risk scoring and catalogue matching of applicants.
+
+Sizes (``--sizes``): ``corpus`` runs on the checked-in files; a row count
+such as ``1k``, ``100k`` or ``10M`` runs on synthetic data scaled up from
+them. CSV rows are resampled with a little noise on the numbers, closes
+are continued as a random walk with the corpus's daily volatility (one
+close a minute, so 10M rows stay within pandas' date range) and
+applicants are drawn as in benchmarks/risk_model.py. OCR runs only on the
+corpus and loans only on synthetic sizes (data/ has no applicant file).
+
+Each (case, size) runs in a fresh interpreter, so caches start cold and
+the peak RSS is the case's own: one warm-up run, then ``--repeat`` timed
+runs with the process-wide caches cleared before each. The report gives
+p50/p95 latency, throughput (units per second at the median) and peak
+RSS, including setup; ``setup_rss_bytes`` is the RSS once the input is
+built.
+
+    python benchmarks/corpus.py [--sizes corpus,1k,100k] [--repeat 5] [--json baseline.json]
+    python benchmarks/corpus.py --baseline baseline.json [--tolerance 0.2]
+
+With ``--baseline`` the run is compared to an earlier ``--json`` file
+(``--results`` compares a saved run instead of running), and the exit
+status is 1 when any case got slower or bigger than the tolerance.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA = os.path.join(ROOT, "data")
+sys.path.insert(0, ROOT)
+
+from bfsi import metrics  # noqa: E402
+
+DEFAULT_SIZES = "corpus,1k,100k"
+SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+OCR_FOLDERS = {
+    "ocr.statements": ("Bank-Statement-Bundle", "Bank Statements"),
+    "ocr.payslips": ("payslip", "Payslips"),
+    "ocr.invoices": ("invoice collection", "Invoices"),
+}
+CSV_FILES = {
+    "csv.crop": "crop.csv",
+    "csv.boston": "boston.csv",
+    "csv.transactions": "synthetic_transactions.csv",
+}
+STOCK_FILES = ["apple stock.csv", "googlestock.csv", "microsoft.csv"]
+
+
+class Skip(Exception):
+    """A case that cannot run here (e.g. no tesseract), reported rather than failed."""
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    if text == "corpus":
+        return None
+    if text[-1:] in SUFFIXES:
+        return int(float(text[:-1]) * SUFFIXES[text[-1]])
+    return int(text)
+
+
+def size_label(rows):
+    return "corpus" if rows is None else f"{rows:,}"
+
+
+def scale_up(df, rows, seed=0):
+    """``rows`` rows resampled from ``df``, numeric columns jittered by 1% of their spread."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    out = df.iloc[rng.integers(0, len(df), rows)].reset_index(drop=True)
+    for column in out.select_dtypes(include=np.number).columns:
+        if out[column].dtype.kind == "f":
+            spread = float(df[column].std()) or 1.0
+            out[column] = out[column] + rng.normal(0, 0.01 * spread, rows)
+    return out
+
+
+def corpus_csv(name, rows):
+    """CSV bytes of a corpus file, or of ``rows`` rows scaled up from it."""
+    import pandas as pd
+
+    path = os.path.join(DATA, name)
+    if rows is None:
+        with open(path, "rb") as handle:
+            return handle.read()
+    return scale_up(pd.read_csv(path), rows).to_csv(index=False).encode()
+
+
+def corpus_closes(rows, seed=0):
+    """Wide frame of the stock files' closes, or ``rows`` minutes continuing them."""
+    import numpy as np
+    import pandas as pd
+    from bfsi import stocks
+
+    series = []
+    for name in STOCK_FILES:
+        df = pd.read_csv(os.path.join(DATA, name))
+        series.append((stocks.ticker_for_name(name), stocks.close_series(df)))
+    close = stocks.aligned_closes(series)
+    if rows is None:
+        return close
+    rng = np.random.default_rng(seed)
+    returns = np.log(close).diff().std().fillna(0.01).to_numpy()
+    steps = rng.normal(0, returns, (rows, close.shape[1]))
+    start = close.ffill().iloc[-1].to_numpy()
+    index = pd.date_range(close.index[-1] + pd.Timedelta(days=1), periods=rows, freq="min")
+    return pd.DataFrame(start * np.exp(np.cumsum(steps, axis=0)), index=index, columns=close.columns)
+
+
+def setup_ocr(case, rows):
+    """Images of one data/ folder through the document pipeline."""
+    from bfsi import documents, ocr
+    from bfsi.preprocess import PreprocessOptions
+
+    folder, doc_type = OCR_FOLDERS[case]
+    jobs = []
+    for base, _, names in os.walk(os.path.join(DATA, folder)):
+        for name in sorted(names):
+            if documents.extension(name) in ocr.IMAGE_EXTENSIONS:
+                with open(os.path.join(base, name), "rb") as handle:
+                    jobs.append((name, name, handle.read()))
+
+    def run():
+        errors = [r.error for r in documents.iter_documents(jobs, doc_type, options=PreprocessOptions())
+                  if r.error is not None]
+        if len(errors) == len(jobs):
+            raise Skip(f"every page failed: {errors[0]!r}")
+
+    return run, len(jobs)
+
+
+def setup_csv(case, rows):
+    """Parse and summarise every numeric column, as the analysis modules do."""
+    import numpy as np
+    from bfsi import analysis, frames
+
+    data = corpus_csv(CSV_FILES[case], rows)
+
+    def run():
+        frames.get_cache().clear()
+        entry = frames.load_csv(data)
+        entry.describe()
+        for column in entry.numeric_columns:
+            values = entry.df[column].dropna()
+            np.histogram(values, bins=10)
+            analysis.pie_data(values)
+
+    return run, rows or data.count(b"\n") - 1
+
+
+def setup_stream(case, rows):
+    """Streaming scan of crop.csv with a second-pass histogram per column."""
+    from bfsi import streaming
+
+    data = corpus_csv(CSV_FILES["csv.crop"], rows)
+
+    def run():
+        scan = streaming.scan_csv(data)
+        scan.describe()
+        for column in scan.numeric_columns:
+            scan.histogram(column)
+
+    return run, rows or data.count(b"\n") - 1
+
+
+def setup_clustering(case, rows):
+    """Cluster crop.csv's numeric columns with k chosen by silhouette."""
+    import io
+    import pandas as pd
+    from bfsi import clustering
+
+    df = pd.read_csv(io.BytesIO(corpus_csv(CSV_FILES["csv.crop"], rows)))
+    columns = df.select_dtypes(include="number").columns.tolist()
+
+    def run():
+        clustering.get_models().clear()
+        clustering.cluster_columns(df, columns)
+
+    return run, len(df)
+
+
+def setup_indicators(case, rows):
+    """All indicators over the stock closes."""
+    from bfsi import indicators
+
+    close = corpus_closes(rows)
+    engine = indicators.get_engine()
+
+    def run():
+        engine.clear()
+        engine.indicators(close)
+
+    return run, len(close)
+
+
+def setup_loans(case, rows):
+    """Risk scoring and catalogue matching of synthetic applicants."""
+    from bfsi import scoring
+    from risk_model import synthetic_applicants
+
+    df = synthetic_applicants(rows).drop(columns="defaulted")
+    return lambda: scoring.score_frame(df), rows
+
+
+CASES = dict(
+    [(case, setup_ocr) for case in OCR_FOLDERS]
+    + [(case, setup_csv) for case in CSV_FILES]
+    + [("csv.stream", setup_stream), ("clustering", setup_clustering),
+       ("indicators", setup_indicators), ("loans", setup_loans)])
+CORPUS_ONLY = set(OCR_FOLDERS)
+SYNTHETIC_ONLY = {"loans"}
+
+
+def applies(case, rows):
+    return not (case in CORPUS_ONLY and rows is not None or case in SYNTHETIC_ONLY and rows is None)
+
+
+def run_case(case, rows, repeat, warmup):
+    """Run one case in this process; returns its result dict."""
+    import numpy as np
+
+    start = time.perf_counter()
+    run, units = CASES[case](case, rows)
+    setup_seconds = time.perf_counter() - start
+    setup_rss = metrics.rss_bytes()
+    for _ in range(warmup):
+        run()
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+    p50 = float(np.percentile(seconds, 50))
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {"units": units, "runs": repeat, "p50_seconds": p50, "p95_seconds": float(np.percentile(seconds, 95)),
+            "min_seconds": min(seconds), "units_per_second": units / p50 if p50 > 0 else float("inf"),
+            "setup_seconds": setup_seconds, "setup_rss_bytes": setup_rss, "peak_rss_bytes": peak}
+
+
+def run_child(case, rows, repeat, warmup):
+    """``run_case`` in a fresh interpreter with the OCR cache off."""
+    command = [sys.executable, os.path.abspath(__file__), "--child", case,
+               "--sizes", "corpus" if rows is None else str(rows),
+               "--repeat", str(repeat), "--warmup", str(warmup)]
+    env = dict(os.environ, BFSI_OCR_CACHE="0")
+    env.pop("BFSI_METRICS_FILE", None)
+    proc = subprocess.run(command, capture_output=True, text=True, cwd=ROOT, env=env)
+    for line in proc.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    return {"error": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=ROOT).stdout.strip() or None
+    except OSError:
+        commit = None
+    import numpy
+    import pandas
+    return {"date": datetime.datetime.now().isoformat(timespec="seconds"), "commit": commit,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "numpy": numpy.__version__, "pandas": pandas.__version__}
+
+
+def print_results(results):
+    print(f"{'case':18} {'size':>12} {'units/s':>14} {'p50 ms':>10} {'p95 ms':>10} {'peak MB':>9}")
+    for key, result in results.items():
+        case, size = key.split("@")
+        if "skipped" in result or "error" in result:
+            print(f"{case:18} {size:>12}  {'skipped' if 'skipped' in result else 'error'}: "
+                  f"{result.get('skipped') or result.get('error')}")
+            continue
+        print(f"{case:18} {size:>12} {result['units_per_second']:14,.0f} {result['p50_seconds'] * 1e3:10.1f} "
+              f"{result['p95_seconds'] * 1e3:10.1f} {result['peak_rss_bytes'] / 2**20:9.1f}")
+
+
+def compare(baseline, results, tolerance):
+    """Print the change of every case against ``baseline``; returns the regressed keys."""
+    regressed = []
+    print(f"\n{'case':18} {'size':>12} {'p50 change':>11} {'peak RSS change':>16}")
+    for key, result in results.items():
+        old = baseline.get(key)
+        if not old or "p50_seconds" not in old or "p50_seconds" not in result:
+            continue
+        case, size = key.split("@")
+        time_ratio = result["p50_seconds"] / old["p50_seconds"]
+        rss_ratio = result["peak_rss_bytes"] / old["peak_rss_bytes"]
+        worse = time_ratio > 1 + tolerance or rss_ratio > 1 + tolerance
+        if worse:
+            regressed.append(key)
+        print(f"{case:18} {size:>12} {time_ratio - 1:+11.1%} {rss_ratio - 1:+16.1%}"
+              + ("  REGRESSION" if worse else ""))
+    missing = sorted(set(baseline) - set(results))
+    if missing:
+        print(f"not run this time: {', '.join(missing)}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated cases (default: all)")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated sizes: corpus or a row count such as 1k, 1M (default {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs first")
+    parser.add_argument("--json", help="write the results to this file (a baseline for later runs)")
+    parser.add_argument("--baseline", help="compare with the results in this file")
+    parser.add_argument("--results", help="with --baseline: compare this saved run instead of running")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative slowdown or RSS growth counted as a regression (default 0.2)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    if args.child:
+        try:
+            result = run_case(args.child, sizes[0], args.repeat, args.warmup)
+        except Skip as e:
+            result = {"skipped": str(e)}
+        print("RESULT " + json.dumps(result))
+        return
+
+    if args.results:
+        with open(args.results, encoding="utf-8") as handle:
+            report = json.load(handle)
+    else:
+        cases = [case.strip() for case in args.cases.split(",") if case.strip()]
+        unknown = [case for case in cases if case not in CASES]
+        if unknown:
+            parser.error(f"unknown case(s) {', '.join(unknown)}; expected some of {', '.join(CASES)}")
+        results = {}
+        for case in cases:
+            for rows in filter(lambda rows: applies(case, rows), sizes):
+                key = f"{case}@{size_label(rows)}"
+                print(f"running {key} ...", file=sys.stderr)
+                results[key] = run_child(case, rows, args.repeat, args.warmup)
+        report = {"environment": environment(), "repeat": args.repeat, "results": results}
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as handle:
+                json.dump(report, handle, indent=2)
+    print_results(report["results"])
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        print(f"baseline: commit {baseline['environment'].get('commit')} of {baseline['environment']['date']}")
+        if compare(baseline["results"], report["results"], args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
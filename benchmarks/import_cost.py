@@ -0,0 +1,99 @@
+"""
+Measure cold-start import cost of each Streamlit module and bfsi package.
+
+Every target is imported in a fresh interpreter, so the numbers are true
+cold starts. For each one we report the wall time of the import, the
+cumulative ``-X importtime`` cost of the heavy third-party packages, and
+which of them ended up loaded.
+
+    python benchmarks/import_cost.py [--repeat 3] [--json results.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ["streamlit", "pandas", "numpy", "matplotlib", "sklearn", "pytesseract", "PIL", "pyarrow"]
+
+TARGETS = [
+    "app",
+    "Ai_Loan_Recommendation",
+    "Stock_analysis",
+    "semi_supervised",
+    "unsupervised",
+    "supervised.Invoice",
+    "supervised.balance_sheet",
+    "supervised.bankstatement",
+    "supervised.payslip",
+    "supervised.profitloss_statement",
+    "bfsi.ocr",
+    "bfsi.documents",
+    "bfsi.statement",
+    "bfsi.loans",
+    "bfsi.clustering",
+    "bfsi.stocks",
+]
+
+PROBE = """
+import logging, sys, time
+logging.disable(logging.WARNING)
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {target}
+elapsed = time.perf_counter() - start
+print("RESULT", elapsed, ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(target):
+    code = PROBE.format(root=ROOT, target=target, heavy=HEAVY)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, cwd=ROOT)
+    result = [line for line in proc.stdout.splitlines() if line.startswith("RESULT")]
+    if not result:
+        return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    fields = result[0].split(" ")
+    elapsed, loaded = fields[1], fields[2] if len(fields) > 2 else ""
+    cumulative = {}
+    for match in IMPORTTIME.finditer(proc.stderr):
+        name = match.group(4)
+        if name in HEAVY:
+            cumulative[name] = cumulative.get(name, 0) + int(match.group(2)) / 1e6
+    return {"seconds": float(elapsed), "loaded": [m for m in loaded.split(",") if m],
+            "package_seconds": cumulative}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="cold starts per target (median is reported)")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("targets", nargs="*", default=TARGETS)
+    args = parser.parse_args()
+
+    report = {}
+    print(f"{'module':34} {'median s':>9}  heavy packages loaded")
+    for target in args.targets:
+        runs = [measure(target) for _ in range(args.repeat)]
+        ok = [run for run in runs if "error" not in run]
+        if not ok:
+            print(f"{target:34} {'error':>9}  {runs[0]['error']}")
+            report[target] = runs[0]
+            continue
+        median = statistics.median(run["seconds"] for run in ok)
+        report[target] = {"median_seconds": median, "loaded": ok[0]["loaded"],
+                          "package_seconds": ok[0]["package_seconds"]}
+        print(f"{target:34} {median:9.3f}  {', '.join(ok[0]['loaded']) or '-'}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Compare the trained risk model with the risk formula: latency and memory.
+
+A synthetic labelled applicant set is generated (defaults drawn from a
+logistic function of the applicant fields), a model is trained on it and
+saved, and then both scorers are timed:
+
+* single applicant: microseconds per call of ``loans.risk_score`` and of
+  ``RiskModel.probability`` (median over repeats);
+* batch: rows per second and peak traced memory (tracemalloc) of
+  ``loans.risk_scores`` and ``RiskModel.probabilities`` on ``--rows``
+  applicants;
+* artefact size and cold load time of the model.
+
+    python benchmarks/risk_model.py [--rows 100000] [--json results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bfsi import loans, risk_model  # noqa: E402
+
+
+def synthetic_applicants(rows, seed=0):
+    """Applicant frame with a ``defaulted`` column drawn from a known logistic model."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "academic_score": rng.integers(40, 101, rows),
+        "credit_score": rng.integers(300, 851, rows),
+        "marks_12": rng.uniform(40, 100, rows).round(1),
+        "ug_marks": np.where(rng.random(rows) < 0.5, np.nan, rng.uniform(40, 100, rows).round(1)),
+        "past_loan_amount": np.where(rng.random(rows) < 0.6, 0.0, rng.uniform(0, 1e6, rows).round(-3)),
+        "emi_bounces": rng.poisson(0.3, rows),
+        "annual_income": rng.lognormal(13.5, 0.6, rows).round(-3),
+    })
+    latent = (-1.0 - 0.012 * (df["credit_score"] - 650) - 0.03 * (df["academic_score"] - 70)
+              + 0.8 * df["emi_bounces"] + 0.4e-6 * df["past_loan_amount"]
+              - 0.5 * (np.log(df["annual_income"]) - 13.5))
+    df["defaulted"] = (rng.random(rows) < 1 / (1 + np.exp(-latent))).astype(int)
+    return df
+
+
+def per_call_us(func, repeat):
+    number = 2000
+    runs = timeit.repeat(func, number=number, repeat=repeat)
+    return statistics.median(runs) / number * 1e6
+
+
+def traced(func):
+    """Result, seconds and peak traced bytes of ``func()``."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="applicants in the batch benchmark")
+    parser.add_argument("--train-rows", type=int, default=50_000, help="applicants to train on")
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats (median is reported)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    model = risk_model.train(synthetic_applicants(args.train_rows, seed=1))
+    path = os.path.join(tempfile.mkdtemp(), "risk_model.json")
+    model.save(path)
+    start = time.perf_counter()
+    model = risk_model.RiskModel.load(path)
+    load_seconds = time.perf_counter() - start
+
+    applicant = dict(academic_score=75, credit_score=720, marks_12=80.0, ug_marks=70.0,
+                     past_loan_amount=50000.0, emi_bounces=1)
+    single = {
+        "formula": per_call_us(lambda: loans.risk_score(**applicant), args.repeat),
+        "model": per_call_us(lambda: model.probability(annual_income=1_000_000, **applicant), args.repeat),
+    }
+
+    values = loans.applicant_values(synthetic_applicants(args.rows, seed=2))
+    formula_values = {k: v for k, v in values.items() if k != "annual_income"}
+    batch = {}
+    for name, func in [("formula", lambda: loans.risk_scores(**formula_values)),
+                       ("model", lambda: model.probabilities(values))]:
+        seconds = min(traced(func)[1] for _ in range(args.repeat))
+        peak = traced(func)[2]
+        batch[name] = {"rows_per_second": args.rows / seconds, "peak_bytes": peak}
+
+    report = {"rows": args.rows, "single_us": single, "batch": batch, "model": model.metrics,
+              "artefact_bytes": os.path.getsize(path), "load_seconds": load_seconds}
+    print(f"model: {model.describe()}, artefact {report['artefact_bytes']:,} bytes, "
+          f"loaded in {load_seconds * 1e3:.2f} ms")
+    print(f"{'scorer':10} {'single us':>10} {'batch rows/s':>14} {'batch peak MB':>14}")
+    for name in ("formula", "model"):
+        print(f"{name:10} {single[name]:10.2f} {batch[name]['rows_per_second']:14,.0f} "
+              f"{batch[name]['peak_bytes'] / 1e6:14.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Shared processing code for the BFSI OCR Streamlit modules."""
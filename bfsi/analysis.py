@@ -0,0 +1,29 @@
+"""Summaries behind the histogram and pie charts of the analysis modules."""
+from bfsi.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+def range_labels(intervals):
+    return [f"{round(interval.left, 2)} - {round(interval.right, 2)}" for interval in intervals]
+
+
+def binned_counts(values, n_bins=5):
+    """Counts in ``n_bins`` equal-width ranges between the min and max."""
+    values = pd.Series(values)
+    bins = np.linspace(values.min(), values.max(), n_bins + 1)
+    counts = pd.cut(values, bins=bins).value_counts().sort_index()
+    return range_labels(counts.index), counts.values
+
+
+def pie_data(values, max_unique=10, n_bins=5):
+    """
+    Labels and sizes for a pie chart: value counts when there are few
+    distinct values, otherwise counts per value range.
+    """
+    values = pd.Series(values)
+    if values.nunique() <= max_unique:
+        counts = values.value_counts()
+        return counts.index.astype(str), counts.values
+    return binned_counts(values, n_bins)
@@ -0,0 +1,205 @@
+"""
+Loan product catalogue with an eligibility index.
+
+A catalogue is a JSON list of products (or ``{"products": [...]}``) or a
+CSV with one product per row, with the fields of ``loans.EDUCATION_LOANS``
+plus optional ``lender``, ``min_risk`` and ``max_risk``. An applicant is
+eligible for a product when
+
+    academic_score >= min_academic_score, credit_score >= min_credit_score,
+    annual_income <= max_annual_income and min_risk <= risk < max_risk
+
+(a missing threshold is not checked). ``Catalogue`` builds its index once:
+the risk axis is cut at every product's risk bounds into segments, each
+holding the products that cover it, and within a segment the products are
+sorted by ``min_credit_score``. A query finds its segment and the products
+whose credit threshold it meets with two binary searches, and checks the
+other two thresholds on that prefix with array comparisons. Batches are
+grouped by segment and checked as applicant x product arrays in chunks.
+Eligible products are listed lowest interest rate first.
+
+The catalogue file is ``$BFSI_LOAN_CATALOGUE``; without one the built-in
+loans are used, with the risk ranges of ``loans.RISK_BANDS``.
+"""
+import json
+import os
+from collections import namedtuple
+
+from bfsi import loans
+from bfsi.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# Most recommended product names listed per applicant in batch results
+MAX_LISTED = 5
+# applicant x product cells compared at once in batch matching
+BATCH_CELLS = 4_000_000
+SESSION_KEY = "_bfsi_catalogue"
+
+_Segment = namedtuple("_Segment", ["by_credit", "credit", "academic", "income", "by_rate"])
+
+
+def _number(value, default):
+    """A threshold as a float; blank or missing values give ``default`` (not checked)."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return default
+    number = float(str(value).replace(",", "")) if isinstance(value, str) else float(value)
+    return default if np.isnan(number) else number
+
+
+def _rate(value):
+    """Interest rate as a number (``"7.5%"`` -> 7.5); unknown rates sort last."""
+    try:
+        return float(str(value).strip().rstrip("%"))
+    except ValueError:
+        return np.inf
+
+
+def default_products():
+    """The built-in loans, each eligible in the risk range of its RISK_BANDS entry."""
+    ranges, lower = {}, -np.inf
+    for upper, names in loans.RISK_BANDS:
+        for name in names:
+            ranges[name] = (lower, upper)
+        lower = upper
+    products = []
+    for loan in loans.EDUCATION_LOANS:
+        # loans in no band are never recommended
+        low, high = ranges.get(loan["name"], (np.inf, np.inf))
+        products.append(dict(loan, lender=loan["name"].replace(" Education Loan", ""),
+                             min_risk=low, max_risk=high))
+    return products
+
+
+def read_products(source, name=None):
+    """Products from a JSON or CSV catalogue (path or file object)."""
+    import pandas as pd
+
+    name = name or getattr(source, "name", source)
+    ext = os.path.splitext(str(name))[1].lower()
+    if ext == ".json":
+        if hasattr(source, "read"):
+            data = json.loads(source.read())
+        else:
+            with open(source, encoding="utf-8") as handle:
+                data = json.load(handle)
+        products = data.get("products", []) if isinstance(data, dict) else data
+    elif ext == ".csv":
+        products = pd.read_csv(source).to_dict("records")
+    else:
+        raise ValueError(f"Unsupported catalogue {name!r}; expected .json or .csv")
+    for product in products:
+        if not str(product.get("name") or "").strip():
+            raise ValueError("Every catalogue product needs a name")
+    return products
+
+
+class Catalogue:
+    """Loan products with an index for eligibility queries."""
+
+    def __init__(self, products):
+        self.products = [dict(product) for product in products]
+
+        def column(field, default):
+            return np.array([_number(product.get(field), default) for product in self.products], dtype=float)
+
+        self.min_academic = column("min_academic_score", -np.inf)
+        self.min_credit = column("min_credit_score", -np.inf)
+        self.max_income = column("max_annual_income", np.inf)
+        self.min_risk = column("min_risk", -np.inf)
+        self.max_risk = column("max_risk", np.inf)
+        self.rate = np.array([_rate(product.get("interest_rate")) for product in self.products])
+        self.names = np.array([str(product["name"]) for product in self.products], dtype=object)
+        # catalogue order breaks interest-rate ties
+        self.rank = np.empty(len(self.products), dtype=np.int64)
+        self.rank[np.lexsort((np.arange(len(self.products)), self.rate))] = np.arange(len(self.products))
+
+        bounds = np.concatenate([self.min_risk, self.max_risk])
+        self.edges = np.unique(bounds[np.isfinite(bounds)])
+        # segment s is [edges[s - 1], edges[s]), the first one starting at -inf
+        points = np.r_[-np.inf, self.edges]
+        self._segments = [self._segment(point) for point in points]
+
+    def _segment(self, point):
+        ids = np.flatnonzero((self.min_risk <= point) & (point < self.max_risk))
+        by_credit = ids[np.argsort(self.min_credit[ids], kind="stable")]
+        return _Segment(by_credit, self.min_credit[by_credit], self.min_academic[by_credit],
+                        self.max_income[by_credit], ids[np.argsort(self.rank[ids])])
+
+    def __len__(self):
+        return len(self.products)
+
+    def eligible(self, academic_score, credit_score, annual_income, risk):
+        """Products one applicant is eligible for, lowest interest rate first."""
+        if np.isnan(risk):
+            return []
+        segment = self._segments[np.searchsorted(self.edges, risk, side="right")]
+        k = np.searchsorted(segment.credit, credit_score, side="right")
+        ok = (segment.academic[:k] <= academic_score) & (segment.income[:k] >= annual_income)
+        ids = segment.by_credit[:k][ok]
+        return [self.products[i] for i in ids[np.argsort(self.rank[ids])]]
+
+    def match(self, academic_score, credit_score, annual_income, risk, listed=MAX_LISTED):
+        """
+        Eligibility of arrays of applicants: the number of eligible products
+        and the names of the ``listed`` lowest-rate ones joined by ``"; "``.
+        NaN income is not checked; NaN scores match nothing.
+        """
+        academic, credit, income, risk = (np.asarray(values, dtype=float) for values in
+                                          (academic_score, credit_score, annual_income, risk))
+        income = np.where(np.isnan(income), -np.inf, income)
+        counts = np.zeros(len(risk), dtype=np.int64)
+        names = np.full(len(risk), "", dtype=object)
+        segments = np.searchsorted(self.edges, risk, side="right")
+        segments[np.isnan(risk)] = -1
+        for s in np.unique(segments[segments >= 0]):
+            segment = self._segments[s]
+            if not len(segment.by_credit):
+                continue
+            # applicants in credit order, so each chunk only needs the products
+            # whose credit threshold its best applicant meets
+            rows = np.flatnonzero(segments == s)
+            rows = rows[np.argsort(credit[rows], kind="stable")]
+            step = max(1, BATCH_CELLS // len(segment.by_credit))
+            for start in range(0, len(rows), step):
+                part = rows[start:start + step]
+                top_credit = np.nanmax(credit[part]) if not np.isnan(credit[part]).all() else -np.inf
+                ids = segment.by_credit[:np.searchsorted(segment.credit, top_credit, side="right")]
+                if not len(ids):
+                    continue
+                ids = ids[np.argsort(self.rank[ids])]
+                ok = ((self.min_academic[ids] <= academic[part, None])
+                      & (self.min_credit[ids] <= credit[part, None])
+                      & (self.max_income[ids] >= income[part, None]))
+                counts[part] = ok.sum(axis=1)
+                # the first ``listed`` eligible products in rate order
+                row, col = np.nonzero(ok & (np.cumsum(ok, axis=1) <= listed))
+                if len(row):
+                    splits = np.flatnonzero(np.diff(row)) + 1
+                    for r, chosen in zip(row[np.r_[0, splits]], np.split(self.names[ids[col]], splits)):
+                        names[part[r]] = "; ".join(chosen)
+        return counts, names
+
+
+def load_upload(file, session):
+    """Catalogue of an uploaded file, indexed once per upload and kept in the session."""
+    key = getattr(file, "file_id", None) or file.name
+    cached = session.get(SESSION_KEY)
+    if cached is None or cached[0] != key:
+        if hasattr(file, "seek"):
+            file.seek(0)
+        cached = (key, Catalogue(read_products(file, file.name)))
+        session[SESSION_KEY] = cached
+    return cached[1]
+
+
+_catalogue = None
+
+
+def get_catalogue():
+    """Process-wide catalogue from ``$BFSI_LOAN_CATALOGUE``, or the built-in loans."""
+    global _catalogue
+    if _catalogue is None:
+        path = os.environ.get("BFSI_LOAN_CATALOGUE")
+        _catalogue = Catalogue(read_products(path) if path else default_products())
+    return _catalogue
@@ -0,0 +1,289 @@
+"""
+Transaction category classifier for statement descriptions.
+
+Descriptions are turned into hashed TF-IDF features: words and word
+pairs (digits folded, so amounts and references do not matter) are hashed
+straight into ``N_FEATURES`` columns, so no vocabulary is built or kept,
+and the only fitted feature state is one idf weight per hashed column. A
+linear model with logistic loss (SGD, one-vs-rest) is trained on the rows
+that have a category and then self-trained on the rows that do not:
+unlabelled rows it predicts with probability of at least
+``SELF_TRAINING_THRESHOLD`` are added as pseudo-labels and the model
+refitted, for up to ``SELF_TRAINING_ROUNDS`` rounds.
+
+``CategoryModel`` predicts with one sparse matrix product per batch and
+needs no scikit-learn. Files are classified ``PREDICT_CHUNKSIZE`` rows at
+a time (``classify_file``, ``CategoryModel.count_categories``), so a
+statement of a million lines takes constant memory. Fitted models are
+cached in-process by a hash of the training data (``train_cached``) and
+can be saved; ``get_model`` loads the artefact at
+``$BFSI_CATEGORY_MODEL`` (default ``category_model.npz`` in the bfsi
+cache directory) once per process.
+
+    python -m bfsi train-categories data/synthetic_transactions.csv
+    python -m bfsi categorise statement.csv --out classified.csv
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+from bfsi import metrics
+from bfsi.clustering import ModelCache
+from bfsi.lazy import lazy_import
+from bfsi.ocr_cache import cache_dir
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+N_FEATURES = 2 ** 18
+NGRAM_RANGE = (1, 2)
+SELF_TRAINING_THRESHOLD = 0.8
+SELF_TRAINING_ROUNDS = 5
+# labelled rows needed before a share is held out to report accuracy
+HOLDOUT_MIN_ROWS = 20
+# rows read into memory to train from a streamed CSV
+MAX_TRAINING_ROWS = 200_000
+# rows hashed at once when predicting; bounds the sparse matrix in memory
+PREDICT_CHUNKSIZE = 20_000
+FORMAT_VERSION = 1
+NO_LABELS = "(none: classify with the current model)"
+SESSION_KEY = "_bfsi_category_model"
+
+ClassifyReport = namedtuple("ClassifyReport", ["rows", "seconds", "counts"])
+
+_models = ModelCache()
+
+
+def default_path():
+    return os.environ.get("BFSI_CATEGORY_MODEL") or os.path.join(cache_dir(), "category_model.npz")
+
+
+def _hasher():
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(n_features=N_FEATURES, ngram_range=NGRAM_RANGE,
+                             lowercase=False, alternate_sign=False, norm=None)
+
+
+def _texts(values):
+    """Descriptions lower-cased with digit runs folded to ``0``, as a list."""
+    # digits carry amounts and references, not the category
+    texts = pd.Series(values, dtype=object).fillna("").astype(str).str.lower()
+    return texts.str.replace(r"\d+", "0", regex=True).tolist()
+
+
+def _labels(values):
+    """Categories as strings, None for blank (unlabelled) rows."""
+    labels = pd.Series(values, dtype=object)
+    labels = labels.where(labels.notna(), "").astype(str).str.strip().to_numpy(dtype=object)
+    labels[labels == ""] = None
+    return labels
+
+
+def _weighted(counts, idf):
+    """Hashed counts scaled by idf, each row L2-normalised (in place)."""
+    from sklearn.preprocessing import normalize
+
+    counts = counts.astype(float)
+    counts.data *= idf[counts.indices]
+    return normalize(counts, copy=False)
+
+
+def _probabilities(scores):
+    """One-vs-rest class probabilities from decision scores, as ``SGDClassifier.predict_proba``."""
+    proba = 0.5 * (1.0 + np.tanh(0.5 * scores))
+    if proba.shape[1] == 1:
+        # binary models keep a single row of coefficients
+        return np.hstack([1.0 - proba, proba])
+    total = proba.sum(axis=1, keepdims=True)
+    return np.divide(proba, total, out=np.full_like(proba, 1.0 / proba.shape[1]), where=total > 0)
+
+
+class CategoryModel:
+    """Linear classifier over hashed TF-IDF features of description text."""
+
+    def __init__(self, classes, coef, intercept, idf, scores=None):
+        self.classes = np.asarray(classes, dtype=object)
+        self.coef = np.asarray(coef, dtype=float)
+        self.intercept = np.asarray(intercept, dtype=float)
+        self.idf = np.asarray(idf, dtype=float)
+        # kept as ``metrics`` in saved artefacts
+        self.metrics = dict(scores or {})
+        digest = hashlib.sha1(self.coef.tobytes())
+        digest.update(self.intercept.tobytes())
+        digest.update(repr(self.classes.tolist()).encode())
+        self.digest = digest.hexdigest()
+        self._coef_t = np.ascontiguousarray(self.coef.T)
+
+    def probabilities(self, texts):
+        """``(rows, classes)`` category probabilities of a batch of descriptions."""
+        X = _weighted(_hasher().transform(_texts(texts)), self.idf)
+        return _probabilities(np.asarray(X @ self._coef_t) + self.intercept)
+
+    def predict(self, texts):
+        """Predicted categories and their probabilities for a batch of descriptions."""
+        proba = self.probabilities(texts)
+        best = proba.argmax(axis=1)
+        return self.classes[best], proba[np.arange(len(best)), best]
+
+    @metrics.stage("categories.predict")
+    def predict_frame(self, df, column):
+        """Copy of ``df`` with ``predicted_category`` and ``category_confidence`` columns."""
+        parts = [self.predict(df[column].iloc[start:start + PREDICT_CHUNKSIZE])
+                 for start in range(0, len(df), PREDICT_CHUNKSIZE)]
+        labels = np.concatenate([labels for labels, _ in parts]) if parts else np.empty(0, dtype=object)
+        confidence = np.concatenate([conf for _, conf in parts]) if parts else np.empty(0)
+        return df.assign(predicted_category=labels, category_confidence=confidence)
+
+    def count_categories(self, chunks, column):
+        """Rows per predicted category over DataFrame chunks, most frequent first."""
+        totals = np.zeros(len(self.classes), dtype=np.int64)
+        for chunk in chunks:
+            for start in range(0, len(chunk), PREDICT_CHUNKSIZE):
+                best = self.probabilities(chunk[column].iloc[start:start + PREDICT_CHUNKSIZE]).argmax(axis=1)
+                totals += np.bincount(best, minlength=len(self.classes))
+        return pd.Series(totals, index=self.classes, name="rows").sort_values(ascending=False)
+
+    def describe(self):
+        m = self.metrics
+        if "labelled" not in m:
+            return f"{len(self.classes)} categories"
+        text = (f"{len(self.classes)} categories, trained on {m['labelled']:,} labelled "
+                f"and {m['pseudo_labelled']:,} of {m['unlabelled']:,} unlabelled row(s)")
+        if m.get("accuracy") is not None:
+            text += f", holdout accuracy {m['accuracy']:.1%}"
+        return text
+
+    def save(self, path):
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        tmp = f"{path}.tmp"
+        header = {"version": FORMAT_VERSION, "n_features": N_FEATURES, "ngram_range": list(NGRAM_RANGE),
+                  "classes": self.classes.tolist(), "metrics": self.metrics}
+        with open(tmp, "wb") as handle:
+            np.savez_compressed(handle, header=np.array(json.dumps(header)), coef=self.coef,
+                                intercept=self.intercept, idf=self.idf)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(str(data["header"]))
+            if (header.get("version") != FORMAT_VERSION or header.get("n_features") != N_FEATURES
+                    or header.get("ngram_range") != list(NGRAM_RANGE)):
+                raise ValueError(f"{path} is not a category model artefact this version can read")
+            return cls(header["classes"], data["coef"], data["intercept"], data["idf"], header.get("metrics"))
+
+
+@metrics.stage("categories.train")
+def train(texts, labels, threshold=SELF_TRAINING_THRESHOLD, rounds=SELF_TRAINING_ROUNDS,
+          holdout=0.2, random_state=0):
+    """
+    Fit a CategoryModel on descriptions and their categories; rows with a
+    blank category are unlabelled and used for the idf weights and
+    self-training. With at least ``HOLDOUT_MIN_ROWS`` labelled rows,
+    ``holdout`` of them is kept out of the fit, idf weights included, to
+    report the accuracy.
+    """
+    from sklearn.linear_model import SGDClassifier
+
+    labels = _labels(labels)
+    blank = pd.isna(labels)
+    labelled = np.flatnonzero(~blank)
+    if len(np.unique(labels[labelled].astype(str))) < 2:
+        raise ValueError("Training needs descriptions from at least two categories")
+    order = np.random.default_rng(random_state).permutation(labelled)
+    n_test = int(len(order) * holdout) if len(order) >= HOLDOUT_MIN_ROWS else 0
+    test, fit = order[:n_test], order[n_test:]
+    pool = np.flatnonzero(blank)
+
+    counts = _hasher().transform(_texts(texts))
+    seen = np.setdiff1d(np.arange(len(labels)), test)
+    # document frequency of each hashed column (CSR rows hold unique columns)
+    df = np.bincount(counts[seen].indices, minlength=N_FEATURES)
+    idf = np.log((1 + len(seen)) / (1 + df)) + 1
+    X = _weighted(counts, idf)
+    y = labels[fit].astype(str)
+
+    def fit_model(rows, targets):
+        return SGDClassifier(loss="log_loss", alpha=1e-5, random_state=random_state).fit(X[rows], targets)
+
+    estimator = fit_model(fit, y)
+    pseudo, done = 0, 0
+    while done < rounds and len(pool):
+        proba = estimator.predict_proba(X[pool])
+        take = proba.max(axis=1) >= threshold
+        if not take.any():
+            break
+        fit = np.concatenate([fit, pool[take]])
+        y = np.concatenate([y, estimator.classes_[proba.argmax(axis=1)[take]]])
+        pool, pseudo, done = pool[~take], pseudo + int(take.sum()), done + 1
+        estimator = fit_model(fit, y)
+
+    scores = {"labelled": int(len(fit) - pseudo), "pseudo_labelled": pseudo,
+              "unlabelled": int(blank.sum()), "rounds": done}
+    if n_test:
+        scores["accuracy"] = float((estimator.predict(X[test]) == labels[test].astype(str)).mean())
+    return CategoryModel(estimator.classes_, estimator.coef_, estimator.intercept_, idf, scores)
+
+
+def train_cached(texts, labels, **params):
+    """``train`` memoised in-process on a hash of the texts, labels and parameters."""
+    digest = hashlib.sha256()
+    for values in (_texts(texts), _labels(labels)):
+        digest.update("\x1f".join("" if value is None else value for value in values).encode())
+        digest.update(b"\x1e")
+    key = (digest.hexdigest(), tuple(sorted(params.items())))
+    return _models.get_or_fit(key, lambda: train(texts, labels, **params))
+
+
+def first_rows(chunks, rows=MAX_TRAINING_ROWS):
+    """At most ``rows`` leading rows of DataFrame chunks, as one frame."""
+    parts, total = [], 0
+    for chunk in chunks:
+        parts.append(chunk.iloc[:rows - total])
+        total += len(parts[-1])
+        if total >= rows:
+            break
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def classify_file(source, out, column, model, chunksize=PREDICT_CHUNKSIZE):
+    """
+    Classify the ``column`` descriptions of the CSV ``source`` into the CSV
+    ``out`` chunk by chunk. Returns a ClassifyReport whose time includes
+    reading and writing.
+    """
+    start = time.perf_counter()
+    rows, totals = 0, pd.Series(0, index=model.classes, dtype="int64")
+    with pd.read_csv(source, chunksize=chunksize) as reader:
+        for chunk in reader:
+            if column not in chunk.columns:
+                raise ValueError(f"{source} has no {column!r} column")
+            predicted = model.predict_frame(chunk, column)
+            predicted.to_csv(out, mode="a" if rows else "w", header=not rows, index=False)
+            rows += len(predicted)
+            totals = totals.add(predicted["predicted_category"].value_counts(), fill_value=0)
+    counts = totals.astype("int64").sort_values(ascending=False)
+    return ClassifyReport(rows, time.perf_counter() - start, counts)
+
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def get_model(path=None):
+    """The artefact at ``path`` (default ``default_path()``), loaded once per process; None if absent."""
+    path = path or default_path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    with _lock:
+        cached = _loaded.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, CategoryModel.load(path))
+            _loaded[path] = cached
+    return cached[1]
@@ -0,0 +1,148 @@
+"""
+Chart service: rendered PNGs memoised by data hash and chart parameters.
+
+Streamlit reruns every module on each widget change, and ``plt.subplots``
+figures handed to ``st.pyplot`` were never closed, so a long-running
+server kept every figure it had ever drawn. ``render`` instead draws onto
+a standalone ``matplotlib.figure.Figure`` (never registered with pyplot),
+saves it to PNG bytes and releases it in a ``finally`` block. The bytes are
+kept in a process-wide LRU bounded by ``BFSI_CHART_CACHE_MB``, keyed by a
+hash of the data and parameters, so redrawing an unchanged chart is a
+dictionary lookup. ``stats()`` reports live figures and cache memory.
+"""
+import hashlib
+import io
+import os
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+from bfsi import metrics
+from bfsi.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+DEFAULT_BUDGET_MB = 64
+DPI = 100
+
+Chart = namedtuple("Chart", ["png", "note"])
+
+
+def data_hash(*items):
+    """sha256 over arrays, pandas objects and plain values, in order."""
+    digest = hashlib.sha256()
+    for item in items:
+        if isinstance(item, (pd.Series, pd.DataFrame, pd.Index)):
+            digest.update(repr(getattr(item, "columns", getattr(item, "name", None))).encode())
+            digest.update(pd.util.hash_pandas_object(item, index=not isinstance(item, pd.Index)).values.tobytes())
+        elif isinstance(item, np.ndarray):
+            digest.update(str(item.dtype).encode() + repr(item.shape).encode())
+            digest.update(np.ascontiguousarray(item).tobytes())
+        elif isinstance(item, (list, tuple)):
+            digest.update(b"(" + data_hash(*item).encode() + b")")
+        else:
+            digest.update(repr(item).encode())
+    return digest.hexdigest()
+
+
+class ChartCache:
+    """Thread-safe LRU of Chart objects bounded by total PNG size."""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._charts = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.live_figures = 0
+
+    def get(self, key):
+        with self._lock:
+            chart = self._charts.get(key)
+            if chart is None:
+                self.misses += 1
+                return None
+            self._charts.move_to_end(key)
+            self.hits += 1
+            return chart
+
+    def put(self, key, chart):
+        with self._lock:
+            if key in self._charts:
+                self._bytes -= len(self._charts.pop(key).png)
+            self._charts[key] = chart
+            self._bytes += len(chart.png)
+            while self._bytes > self.budget_bytes and len(self._charts) > 1:
+                _, evicted = self._charts.popitem(last=False)
+                self._bytes -= len(evicted.png)
+
+    @contextmanager
+    def figure(self, figsize=None):
+        """A standalone Figure, counted as live until the block exits and then cleared."""
+        from matplotlib.figure import Figure
+        with self._lock:
+            self.live_figures += 1
+        fig = Figure(figsize=figsize)
+        try:
+            yield fig
+        finally:
+            fig.clear()
+            with self._lock:
+                self.live_figures -= 1
+
+    def clear(self):
+        with self._lock:
+            self._charts.clear()
+            self._bytes = 0
+
+    def stats(self):
+        # figures opened through pyplot elsewhere, without importing it here
+        plt = sys.modules.get("matplotlib.pyplot")
+        with self._lock:
+            return {"entries": len(self._charts), "bytes": self._bytes, "budget_bytes": self.budget_bytes,
+                    "hits": self.hits, "misses": self.misses, "live_figures": self.live_figures,
+                    "pyplot_figures": len(plt.get_fignums()) if plt is not None else 0}
+
+
+_cache = ChartCache(int(float(os.environ.get("BFSI_CHART_CACHE_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024))
+
+
+def get_cache():
+    return _cache
+
+
+def stats():
+    return _cache.stats()
+
+
+def show_chart(chart):
+    """Display a rendered chart and its aggregation note, if any, on the current Streamlit page."""
+    # the only Streamlit call in bfsi; the rest of the package runs without it
+    import streamlit as st
+
+    st.image(chart.png)
+    if chart.note:
+        st.caption(chart.note)
+
+
+def render(name, draw, data=(), params=(), figsize=None):
+    """
+    PNG for ``draw(ax)``, memoised on ``name``, ``data`` and ``params``.
+    ``draw`` may return a note (e.g. from bfsi.render) that is cached with
+    the image. Everything that changes the picture must be in ``data`` or
+    ``params``.
+    """
+    key = (name, data_hash(data, params, figsize))
+    chart = _cache.get(key)
+    if chart is not None:
+        return chart
+    buffer = io.BytesIO()
+    with metrics.stage("chart.render"), _cache.figure(figsize) as fig:
+        note = draw(fig.subplots())
+        fig.savefig(buffer, format="png", dpi=DPI, bbox_inches="tight")
+    chart = Chart(buffer.getvalue(), note)
+    _cache.put(key, chart)
+    return chart
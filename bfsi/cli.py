@@ -0,0 +1,354 @@
+"""
+Headless command-line entry point for back-office batch runs.
+
+    python -m bfsi documents data/ --out results/ --format parquet
+
+walks a directory laid out like data/ (one folder per document type),
+processes the files through the same extraction code as the Streamlit
+supervised module, and writes ``documents``, ``amounts`` and
+``transactions`` tables as numbered part files under the output
+directory. Every finished batch is recorded in ``manifest.jsonl``; a rerun
+skips files the manifest records as processed without error and
+unchanged since, so an interrupted job resumes where it stopped, and
+redoes failed or changed files, dropping their earlier rows.
+
+    python -m bfsi score applicants.csv --out scored.parquet
+
+scores a CSV or Parquet file of loan applicants in batch (see
+bfsi.scoring) and reports the throughput.
+
+    python -m bfsi train-risk labelled.csv --target defaulted
+
+fits the default-risk model (bfsi.risk_model) on a labelled applicant file
+and saves the artefact the loan module and ``score`` then use.
+
+    python -m bfsi train-categories data/synthetic_transactions.csv
+    python -m bfsi categorise statement.csv --out classified.csv
+
+trains the transaction category classifier (bfsi.categories) on a file
+of descriptions, blank categories self-trained, and classifies a
+statement CSV of any length chunk by chunk with the saved model.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from bfsi import catalogue, categories, documents, ocr, risk_model, scoring
+from bfsi.preprocess import PreprocessOptions
+
+MANIFEST = "manifest.jsonl"
+TABLES = ["documents", "amounts", "transactions"]
+
+
+def iter_input_files(root):
+    for folder, _, names in os.walk(root):
+        for name in sorted(names):
+            if documents.extension(name) in documents.SUPPORTED_EXTENSIONS:
+                yield os.path.join(folder, name)
+
+
+def load_manifest(out_dir):
+    """Return ``{path: entry}`` of the latest entry per file processed by earlier runs."""
+    path = os.path.join(out_dir, MANIFEST)
+    done = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    done[entry["path"]] = entry
+    return done
+
+
+def remove_orphan_parts(out_dir, manifest):
+    """Delete part files written by a batch that never reached the manifest, and half-written ones."""
+    parts = {entry["part"] for entry in manifest.values()}
+    for table in TABLES:
+        folder = os.path.join(out_dir, table)
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            if name.split(".")[0] not in parts or name.endswith(".tmp"):
+                os.remove(os.path.join(folder, name))
+
+
+def is_done(entry, path):
+    """Whether a manifest entry covers ``path`` as it is now, processed without error."""
+    if entry is None or entry.get("status") != "ok":
+        return False
+    stat = os.stat(path)
+    return entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime
+
+
+def next_part_number(manifest):
+    numbers = [int(entry["part"].split("-")[1]) for entry in manifest.values()]
+    return max(numbers) + 1 if numbers else 0
+
+
+def _write_frame(frame, path, fmt):
+    # written under another name first, so a crash never leaves half a part
+    tmp = f"{path}.tmp"
+    if fmt == "parquet":
+        frame.to_parquet(tmp, index=False)
+    else:
+        frame.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def write_part(frame, out_dir, table, part, fmt):
+    if frame.empty:
+        return
+    folder = os.path.join(out_dir, table)
+    os.makedirs(folder, exist_ok=True)
+    _write_frame(frame, os.path.join(folder, f"{part}.{fmt}"), fmt)
+
+
+def drop_rows(out_dir, part, paths):
+    """Remove the rows of ``paths`` from every table file of ``part``."""
+    import pandas as pd
+
+    for table in TABLES:
+        folder = os.path.join(out_dir, table)
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            stem, fmt = name.split(".", 1)
+            if stem != part or fmt not in ("parquet", "csv"):
+                continue
+            path = os.path.join(folder, name)
+            frame = pd.read_parquet(path) if fmt == "parquet" else pd.read_csv(path)
+            keep = ~frame["path"].isin(paths)
+            if keep.all():
+                continue
+            if keep.any():
+                _write_frame(frame[keep], path, fmt)
+            else:
+                os.remove(path)
+
+
+def compact_manifest(out_dir, manifest):
+    """
+    Drop the rows of reprocessed files from the earlier parts that still
+    hold them, then rewrite the manifest with the latest entry per file. A
+    crash in between leaves the old lines, and the next run finishes it.
+    """
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return
+    stale, lines = {}, 0
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                entry = json.loads(line)
+                lines += 1
+                if manifest[entry["path"]]["part"] != entry["part"]:
+                    stale.setdefault(entry["part"], set()).add(entry["path"])
+    if lines == len(manifest):
+        return
+    for part, paths in stale.items():
+        drop_rows(out_dir, part, paths)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as handle:
+        for entry in manifest.values():
+            handle.write(json.dumps(entry) + "\n")
+    os.replace(tmp, path)
+
+
+def process_batch(batch, root, workers, options):
+    """Run one batch of paths; returns the three result tables and manifest entries."""
+    import pandas as pd
+
+    doc_rows, amount_rows, transaction_frames, entries = [], [], [], {}
+    by_type = {}
+    for path in batch:
+        with open(path, "rb") as handle:
+            data = handle.read()
+        rel = os.path.relpath(path, root)
+        stat = os.stat(path)
+        entries[rel] = {"path": rel, "sha256": hashlib.sha256(data).hexdigest(),
+                        "size": stat.st_size, "mtime": stat.st_mtime}
+        doc_type = documents.doc_type_for_path(rel, default="Unknown")
+        by_type.setdefault(doc_type, []).append((rel, os.path.basename(path), data))
+
+    for doc_type, jobs in by_type.items():
+        for result in documents.iter_documents(jobs, doc_type, workers, options):
+            rel = result.key
+            values = result.values
+            entries[rel]["status"] = "error" if result.error is not None else "ok"
+            doc_rows.append({
+                "path": rel,
+                "doc_type": doc_type,
+                "sha256": entries[rel]["sha256"],
+                "error": None if result.error is None else str(result.error),
+                "n_values": len(values),
+                "total": float(sum(values)),
+                "text": result.text,
+            })
+            amount_rows.extend({"path": rel, "value": float(value)} for value in values)
+            if result.transactions is not None and not result.transactions.empty:
+                transaction_frames.append(result.transactions.assign(path=rel))
+
+    transactions = (pd.concat(transaction_frames, ignore_index=True) if transaction_frames
+                    else pd.DataFrame())
+    # explicit dtypes keep the part files schema-compatible when a batch has
+    # no errors or no text at all
+    docs = pd.DataFrame(doc_rows).astype({"error": "string", "text": "string"})
+    return docs, pd.DataFrame(amount_rows), transactions, list(entries.values())
+
+
+def run_documents(args):
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            sys.exit("Parquet output requires pyarrow; install it or use --format csv.")
+    os.makedirs(args.out, exist_ok=True)
+    manifest = load_manifest(args.out)
+    remove_orphan_parts(args.out, manifest)
+    compact_manifest(args.out, manifest)
+
+    # failed and changed files are processed again
+    files = list(iter_input_files(args.root))
+    pending = [path for path in files if not is_done(manifest.get(os.path.relpath(path, args.root)), path)]
+    print(f"{len(files) - len(pending)} file(s) already processed, {len(pending)} to go", file=sys.stderr)
+
+    options = None if args.no_preprocess else PreprocessOptions()
+    part_number = next_part_number(manifest)
+    start = time.perf_counter()
+    processed = 0
+    for offset in range(0, len(pending), args.batch_size):
+        batch = pending[offset:offset + args.batch_size]
+        part = f"part-{part_number:05d}"
+        part_number += 1
+        docs, amounts, transactions, entries = process_batch(batch, args.root, args.workers, options)
+        for table, frame in zip(TABLES, (docs, amounts, transactions)):
+            write_part(frame, args.out, table, part, args.format)
+        # The manifest is written last: a crash before this line leaves
+        # orphan parts that the next run deletes and redoes.
+        with open(os.path.join(args.out, MANIFEST), "a", encoding="utf-8") as handle:
+            for entry in entries:
+                handle.write(json.dumps(dict(entry, part=part)) + "\n")
+        # a reprocessed file's rows now live in this part only
+        manifest.update((entry["path"], dict(entry, part=part)) for entry in entries)
+        compact_manifest(args.out, manifest)
+        processed += len(batch)
+        errors = sum(entry["status"] == "error" for entry in entries)
+        print(f"{part}: {len(batch)} file(s), {errors} error(s), "
+              f"{processed}/{len(pending)} done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+def run_score(args):
+    try:
+        formats = {scoring.file_format(args.applicants), scoring.file_format(args.out)}
+        if "parquet" in formats:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                sys.exit("Parquet files require pyarrow; install it or use .csv files.")
+        products = catalogue.Catalogue(catalogue.read_products(args.catalogue)) if args.catalogue else None
+        model = None if args.formula else (risk_model.RiskModel.load(args.model) if args.model
+                                           else risk_model.get_model())
+        report = scoring.score_file(args.applicants, args.out, chunksize=args.chunksize,
+                                    products=products, model=model)
+    except (ValueError, OSError) as e:
+        sys.exit(str(e))
+    print(f"risk from the trained model ({model.describe()})" if model else "risk from the formula", file=sys.stderr)
+    print(report, file=sys.stderr)
+    print(scoring.band_summary(report).to_string(index=False), file=sys.stderr)
+
+
+def run_train_risk(args):
+    import pandas as pd
+
+    try:
+        df = scoring.read_applicants(args.applicants, scoring.file_format(args.applicants))
+        model = risk_model.train(df, target=args.target, holdout=args.holdout)
+    except ValueError as e:
+        sys.exit(str(e))
+    model.save(args.out)
+    print(f"Saved {args.out}: {model.describe()}", file=sys.stderr)
+    weights = pd.Series(model.coef, index=risk_model.FEATURES, name="standardised coefficient")
+    print(weights.to_string(), file=sys.stderr)
+
+
+def run_train_categories(args):
+    import pandas as pd
+
+    try:
+        df = pd.read_csv(args.transactions, usecols=[args.text_column, args.label_column])
+        model = categories.train(df[args.text_column], df[args.label_column], threshold=args.threshold)
+    except ValueError as e:
+        sys.exit(str(e))
+    model.save(args.out)
+    print(f"Saved {args.out}: {model.describe()}", file=sys.stderr)
+
+
+def run_categorise(args):
+    try:
+        model = categories.CategoryModel.load(args.model) if args.model else categories.get_model()
+        if model is None:
+            sys.exit(f"No category model at {categories.default_path()}; run train-categories first.")
+        report = categories.classify_file(args.statement, args.out, args.text_column, model,
+                                          chunksize=args.chunksize)
+    except (ValueError, OSError) as e:
+        sys.exit(str(e))
+    print(f"{report.rows:,} line(s) classified in {report.seconds:.2f}s "
+          f"({report.rows / max(report.seconds, 1e-9):,.0f} rows/s)", file=sys.stderr)
+    print(report.counts.to_string(), file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m bfsi", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    docs = commands.add_parser("documents", help="OCR and extract values from a directory of documents")
+    docs.add_argument("root", help="input directory, one folder per document type (see data/)")
+    docs.add_argument("--out", required=True, help="output directory for tables and the manifest")
+    docs.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    docs.add_argument("--workers", type=int, default=ocr.default_workers(), help="OCR pages in flight at a time (the worker pool has BFSI_OCR_WORKERS processes)")
+    docs.add_argument("--batch-size", type=int, default=50, help="files per checkpoint")
+    docs.add_argument("--no-preprocess", action="store_true", help="OCR images at full resolution")
+    docs.set_defaults(func=run_documents)
+
+    score = commands.add_parser("score", help="score a CSV or Parquet file of loan applicants")
+    score.add_argument("applicants", help="applicant file (.csv or .parquet), one applicant per row")
+    score.add_argument("--out", required=True, help="scored output file (.csv or .parquet)")
+    score.add_argument("--chunksize", type=int, default=scoring.DEFAULT_CHUNKSIZE, help="rows scored at a time")
+    score.add_argument("--catalogue", help="loan catalogue (.json or .csv); default $BFSI_LOAN_CATALOGUE or the built-in loans")
+    score.add_argument("--model", help="risk model artefact; default $BFSI_RISK_MODEL when it exists")
+    score.add_argument("--formula", action="store_true", help="score with the risk formula even if a model exists")
+    score.set_defaults(func=run_score)
+
+    train = commands.add_parser("train-risk", help="train the default-risk model on a labelled applicant file")
+    train.add_argument("applicants", help="applicant file (.csv or .parquet) with a 0/1 target column")
+    train.add_argument("--target", default="defaulted", help="target column, 1 for applicants who defaulted")
+    train.add_argument("--out", default=risk_model.default_path(), help="artefact path (default: %(default)s)")
+    train.add_argument("--holdout", type=float, default=0.2, help="share of rows kept out to report the AUC")
+    train.set_defaults(func=run_train_risk)
+
+    train_cat = commands.add_parser("train-categories", help="train the transaction category classifier on a CSV")
+    train_cat.add_argument("transactions", help="CSV of descriptions and categories; blank categories are self-trained")
+    train_cat.add_argument("--text-column", default="Description", help="description column")
+    train_cat.add_argument("--label-column", default="Category", help="category column")
+    train_cat.add_argument("--threshold", type=float, default=categories.SELF_TRAINING_THRESHOLD,
+                           help="probability needed to pseudo-label an unlabelled row")
+    train_cat.add_argument("--out", default=categories.default_path(), help="artefact path (default: %(default)s)")
+    train_cat.set_defaults(func=run_train_categories)
+
+    classify = commands.add_parser("categorise", help="classify the descriptions of a statement CSV")
+    classify.add_argument("statement", help="CSV with one transaction per row")
+    classify.add_argument("--out", required=True, help="output CSV with predicted_category and category_confidence")
+    classify.add_argument("--text-column", default="Description", help="description column")
+    classify.add_argument("--model", help="category model artefact; default $BFSI_CATEGORY_MODEL")
+    classify.add_argument("--chunksize", type=int, default=categories.PREDICT_CHUNKSIZE, help="rows classified at a time")
+    classify.set_defaults(func=run_categorise)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
@@ -0,0 +1,269 @@
+"""
+Clustering for the unsupervised module.
+
+``cluster_columns`` picks the algorithm by shape and size:
+
+* one column: exact 1-D optimal breaks (k-means in one dimension solved by
+  dynamic programming over the sorted values, Jenks-style). Up to
+  ``MAX_BREAK_POINTS`` distinct values the breaks are exact; beyond that
+  the values are first grouped into that many quantile bins (keeping their
+  exact sums), so a few million amounts cluster in a couple of seconds;
+* several columns: KMeans on standardised features, or above
+  ``MINIBATCH_ROWS`` rows MiniBatchKMeans fitted on a random sample of at
+  most ``FIT_SAMPLE`` rows and then used to label every row.
+
+When ``n_clusters`` is None, k is chosen by silhouette score on a random
+sample. Fitted models are cached by a hash of the feature data, so reruns
+and repeated uploads only pay for prediction.
+"""
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+from bfsi import metrics
+from bfsi.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+K_RANGE = (2, 8)
+MAX_BREAK_POINTS = 1024
+MINIBATCH_ROWS = 20_000
+FIT_SAMPLE = 200_000
+SILHOUETTE_SAMPLE = 3000
+MODEL_CACHE_ENTRIES = 32
+
+ClusterResult = namedtuple("ClusterResult", ["index", "labels", "model", "scores"])
+
+
+class ClusterModel:
+    """A fitted clustering that labels new rows with ``predict``."""
+
+    def __init__(self, method, columns, mean, scale, thresholds=None, estimator=None, centers=None):
+        self.method = method
+        self.columns = list(columns)
+        self.mean = mean
+        self.scale = scale
+        self.thresholds = thresholds
+        self.estimator = estimator
+        self._centers = centers
+
+    @property
+    def k(self):
+        if self.estimator is not None:
+            return int(self.estimator.n_clusters)
+        return len(self.thresholds) + 1
+
+    @property
+    def centers(self):
+        """Cluster centres in the original units, for breaks sorted ascending."""
+        if self.estimator is not None:
+            return self.estimator.cluster_centers_ * self.scale + self.mean
+        return self._centers
+
+    def predict(self, X):
+        values = _features(X, self.columns)
+        if self.estimator is not None:
+            return self.estimator.predict((values - self.mean) / self.scale)
+        # breaks label clusters in ascending order of value
+        return np.searchsorted(self.thresholds, values[:, 0], side="right")
+
+
+def _features(X, columns):
+    if hasattr(X, "columns"):
+        X = X[columns]
+    values = np.asarray(X, dtype=float)
+    return values.reshape(-1, 1) if values.ndim == 1 else values
+
+
+def _weighted_points(x):
+    """
+    Sorted points with weights and first/second moment sums, plus the value
+    each point starts at. Distinct values are used as-is while there are few
+    enough, otherwise quantile bins.
+    """
+    uniques, counts = np.unique(x, return_counts=True)
+    if uniques.size <= MAX_BREAK_POINTS:
+        starts = np.r_[uniques[0], (uniques[1:] + uniques[:-1]) / 2]
+        return counts.astype(float), uniques * counts, uniques ** 2 * counts, starts
+    edges = np.unique(np.quantile(x, np.linspace(0, 1, MAX_BREAK_POINTS + 1)))
+    bins = np.searchsorted(edges[1:-1], x, side="right")
+    size = edges.size - 1
+    weights = np.bincount(bins, minlength=size).astype(float)
+    s1 = np.bincount(bins, weights=x, minlength=size)
+    s2 = np.bincount(bins, weights=x * x, minlength=size)
+    keep = weights > 0
+    return weights[keep], s1[keep], s2[keep], edges[:-1][keep]
+
+
+def optimal_breaks(x, k_max):
+    """
+    Exact 1-D k-means over the weighted points of ``x`` for every k up to
+    ``k_max``. Returns ``{k: thresholds}``; a value ``>= thresholds[i]``
+    belongs to cluster ``i + 1`` or above.
+    """
+    weights, s1, s2, starts = _weighted_points(x)
+    m = weights.size
+    k_max = min(k_max, m)
+    cw, c1, c2 = (np.r_[0.0, np.cumsum(a)] for a in (weights, s1, s2))
+    # cost[i, j]: within-cluster sum of squares of points i..j-1
+    w = cw[None, :] - cw[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost = (c2[None, :] - c2[:, None]) - (c1[None, :] - c1[:, None]) ** 2 / w
+    cost[w <= 0] = np.inf
+    cost = np.maximum(cost, 0.0)
+
+    layer = cost[0]
+    back = []
+    for _ in range(1, k_max):
+        total = layer[:, None] + cost
+        back.append(np.argmin(total, axis=0))
+        layer = total[back[-1], np.arange(m + 1)]
+
+    breaks = {}
+    for k in range(1, k_max + 1):
+        cuts = []
+        j = m
+        for step in range(k - 2, -1, -1):
+            j = back[step][j]
+            cuts.append(j)
+        breaks[k] = starts[np.array(sorted(cuts), dtype=int)]
+    return breaks
+
+
+def _fit_breaks(values, columns, k_range, n_clusters, sample):
+    from sklearn.metrics import silhouette_score
+
+    x = values[:, 0]
+    mean, scale = x.mean(), x.std() or 1.0
+    # standardised for numerical stability of the moment sums
+    z = (x - mean) / scale
+    k_max = n_clusters or k_range[1]
+    breaks = optimal_breaks(z, k_max)
+    scores = {}
+    if n_clusters is None:
+        z_sample = z[sample]
+        for k in range(k_range[0], max(breaks) + 1):
+            labels = np.searchsorted(breaks[k], z_sample, side="right")
+            if 1 < np.unique(labels).size < z_sample.size:
+                scores[k] = float(silhouette_score(z_sample.reshape(-1, 1), labels))
+        n_clusters = max(scores, key=scores.get) if scores else max(breaks)
+    thresholds = breaks[min(n_clusters, max(breaks))] * scale + mean
+    labels = np.searchsorted(thresholds, x, side="right")
+    centers = np.bincount(labels, weights=x) / np.bincount(labels)
+    return ClusterModel("optimal breaks", columns, mean, scale, thresholds=thresholds,
+                        centers=centers.reshape(-1, 1)), scores
+
+
+def _fit_kmeans(values, columns, k_range, n_clusters, sample, rng, random_state):
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    from sklearn.metrics import silhouette_score
+
+    mean, scale = values.mean(axis=0), values.std(axis=0)
+    scale[scale == 0] = 1.0
+    z = (values - mean) / scale
+    scores = {}
+    if n_clusters is None:
+        z_sample = z[sample]
+        distinct = np.unique(z_sample, axis=0).shape[0]
+        for k in range(k_range[0], min(k_range[1], distinct - 1) + 1):
+            labels = KMeans(n_clusters=k, n_init="auto", random_state=random_state).fit_predict(z_sample)
+            scores[k] = float(silhouette_score(z_sample, labels))
+        n_clusters = max(scores, key=scores.get) if scores else 1
+    if len(z) > MINIBATCH_ROWS:
+        method = "minibatch k-means"
+        if len(z) > FIT_SAMPLE:
+            z = z[rng.choice(len(z), size=FIT_SAMPLE, replace=False)]
+        estimator = MiniBatchKMeans(n_clusters=n_clusters, batch_size=4096, n_init=3,
+                                    random_state=random_state).fit(z)
+    else:
+        method = "k-means"
+        estimator = KMeans(n_clusters=n_clusters, n_init="auto", random_state=random_state).fit(z)
+    return ClusterModel(method, columns, mean, scale, estimator=estimator), scores
+
+
+def fit_clusters(values, columns, n_clusters=None, k_range=K_RANGE, random_state=0):
+    """Fit a ClusterModel on a NaN-free 2-D array; returns the model and ``{k: silhouette}``."""
+    rng = np.random.default_rng(random_state)
+    sample = rng.choice(len(values), size=min(SILHOUETTE_SAMPLE, len(values)), replace=False)
+    if values.shape[1] == 1:
+        return _fit_breaks(values, columns, k_range, n_clusters, sample)
+    return _fit_kmeans(values, columns, k_range, n_clusters, sample, rng, random_state)
+
+
+class ModelCache:
+    """Small LRU of fitted models keyed by data hash and fit parameters."""
+
+    def __init__(self, entries=MODEL_CACHE_ENTRIES):
+        self.entries = entries
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_fit(self, key, fit):
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+        value = fit()
+        with self._lock:
+            self._models[key] = value
+            while len(self._models) > self.entries:
+                self._models.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+_models = ModelCache()
+
+
+def get_models():
+    return _models
+
+
+def data_hash(values, columns):
+    digest = hashlib.sha256(repr(list(columns)).encode())
+    digest.update(np.ascontiguousarray(values, dtype=float).data)
+    return digest.hexdigest()
+
+
+@metrics.stage("clustering")
+def cluster_columns(df, columns, n_clusters=None, k_range=K_RANGE, random_state=0):
+    """
+    Cluster the rows of ``df`` on ``columns`` (rows with NaNs dropped).
+    ``n_clusters=None`` chooses k in ``k_range`` by silhouette.
+    """
+    columns = list(columns)
+    X = df[columns].dropna()
+    values = X.to_numpy(dtype=float)
+    if len(values) == 0:
+        raise ValueError("No complete rows to cluster")
+    key = (data_hash(values, columns), n_clusters, tuple(k_range), random_state)
+    model, scores = _models.get_or_fit(
+        key, lambda: fit_clusters(values, columns, n_clusters, k_range, random_state))
+    return ClusterResult(X.index, model.predict(values), model, scores)
+
+
+def cluster_sizes(model, frames):
+    """Rows per cluster when ``model`` labels every frame in ``frames`` (NaN rows skipped)."""
+    sizes = np.zeros(model.k, dtype=np.int64)
+    for frame in frames:
+        frame = frame[model.columns].dropna()
+        if len(frame):
+            sizes += np.bincount(model.predict(frame), minlength=model.k)
+    return sizes
+
+
+def cluster_column(df, col, n_clusters=3, random_state=0):
+    """Single-column clustering. Returns the clustered rows (NaNs dropped) and their labels."""
+    result = cluster_columns(df, [col], n_clusters=n_clusters, random_state=random_state)
+    return df.loc[result.index, [col]], result.labels
+
+
+def with_clusters(df, index, labels):
+    """Copy of ``df`` with a ``Cluster`` column, None for rows left out."""
+    df = df.copy()
+    df["Cluster"] = None
+    df.loc[index, "Cluster"] = labels
+    return df
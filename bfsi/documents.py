@@ -0,0 +1,243 @@
+"""
+Document-level extraction shared by the Streamlit supervised module and the
+batch CLI: which values to take from a CSV, an OCR'd page or a parsed
+statement, and a streaming driver that runs a mixed set of files through
+the OCR, PDF and statement pipelines.
+
+The supervised module keeps each uploaded document's result in a
+process-wide ``ResultCache`` keyed by the file's content hash, the
+document type and the preprocessing options, so a rerun after adding a
+file to the upload only processes the new or changed files.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from bfsi import ocr, pdf, statement, uploads
+
+DOC_TYPES = ["Invoices", "Bank Statements", "Payslips", "Balance Sheets", "Profit/Loss Statements"]
+
+# Folder-name keywords used to infer the document type in batch runs,
+# matching the layout of data/
+FOLDER_KEYWORDS = [
+    ("bank", "Bank Statements"),
+    ("payslip", "Payslips"),
+    ("balance", "Balance Sheets"),
+    ("invoice", "Invoices"),
+    ("profit", "Profit/Loss Statements"),
+]
+
+SUPPORTED_EXTENSIONS = ["csv", "pdf"] + ocr.IMAGE_EXTENSIONS
+RESULT_CACHE_ENTRIES = 256
+
+DocumentResult = namedtuple("DocumentResult", ["key", "text", "values", "transactions", "error"])
+# one processed upload: extracted text, its values as a streaming.Partial,
+# the statement table (bank statements only) and a caption for the UI
+FileResult = namedtuple("FileResult", ["text", "part", "transactions", "note"])
+
+
+def extension(name):
+    return name.split(".")[-1].lower()
+
+
+def doc_type_for_path(path, default=None):
+    """Infer the document type from the folders a file sits in."""
+    folders = os.path.dirname(path).lower()
+    for keyword, doc_type in FOLDER_KEYWORDS:
+        if keyword in folders:
+            return doc_type
+    return default
+
+
+def value_column(columns, numeric_columns):
+    """The column a CSV contributes values from: ``Amount``, else the first numeric one."""
+    if "Amount" in columns:
+        return "Amount"
+    return numeric_columns[0] if numeric_columns else None
+
+
+def csv_values(df):
+    """The values of ``value_column`` as a list."""
+    import numpy as np
+    column = value_column(df.columns, df.select_dtypes(include=np.number).columns.tolist())
+    return df[column].dropna().tolist() if column is not None else []
+
+
+def extracted_values(text, table=None):
+    """Transaction amounts from a parsed statement, else every amount in the text."""
+    if table is not None and not table.empty:
+        return statement.transaction_amounts(table).tolist()
+    return [float(x) for x in ocr.find_amounts(text)]
+
+
+def ocr_text(raw, is_statement):
+    """Display text and statement table (bank statements only) of one OCR result."""
+    if not is_statement:
+        return raw, None
+    lines = statement.lines_from_tsv(raw)
+    return statement.text_from_lines(lines), statement.parse_lines(lines)
+
+
+def file_result(text, table=None, note=None):
+    from bfsi.streaming import Partial
+    return FileResult(text, Partial(extracted_values(text, table)), table, note)
+
+
+def result_key(data, doc_type, options=None):
+    """Cache key of an uploaded document (bytes or a SpooledFile): its content and what shapes its extraction."""
+    return (uploads.content_digest(data).hex(), doc_type, options.signature() if options is not None else None)
+
+
+class ResultCache:
+    """Thread-safe LRU of FileResults by ``result_key``."""
+
+    def __init__(self, entries=RESULT_CACHE_ENTRIES):
+        self.entries = entries
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.entries:
+                self._results.popitem(last=False)
+
+
+_results = ResultCache()
+
+
+def get_results():
+    return _results
+
+
+def batch_key(keys):
+    """One string key for a set of ``result_key`` tuples, e.g. to name their background job."""
+    return hashlib.sha256(repr(sorted(keys, key=repr)).encode()).hexdigest()
+
+
+def process_files(jobs, doc_type, workers=None, options=None, context=None):
+    """
+    Extract ``(key, name, data)`` images and PDFs, ``data`` as bytes or a
+    SpooledFile, as the supervised module shows them, putting each file's FileResult in the ResultCache under its
+    ``key`` (a ``result_key``) as soon as it is done. Files with failures
+    are not cached; they are returned as ``{key: (FileResult or None,
+    [error messages])}``. ``context`` is a jobs.JobContext when this runs as
+    a background job: progress is reported per page and a cancellation
+    stops at the next one.
+    """
+    import contextlib
+
+    is_statement = doc_type == "Bank Statements"
+    images = [(key, data) for key, name, data in jobs if extension(name) != "pdf"]
+    pdfs = [(key, name, data) for key, name, data in jobs if extension(name) == "pdf"]
+    names = {key: name for key, name, _ in jobs}
+    failed = {}
+    done = 0
+
+    def progress(fraction, message):
+        if context is not None:
+            context.progress(fraction / len(jobs), message)
+
+    if images:
+        with contextlib.closing(ocr.iter_ocr(images, workers, options=options,
+                                             output="data" if is_statement else "text")) as results:
+            for result in results:
+                if result.error is not None:
+                    failed[result.key] = (None, [f"Error processing image: {result.error}"])
+                else:
+                    text, table = ocr_text(result.text, is_statement)
+                    _results.put(result.key, file_result(
+                        text, table, result.report.summary() if result.report is not None else None))
+                done += 1
+                progress(done, f"OCR {done}/{len(images)} done: {names[result.key]}")
+
+    # PDFs: text-layer pages are read directly, scanned pages are OCR'd page
+    # by page on the worker pool
+    for key, name, data in pdfs:
+        pages, errors, text_layer_pages = {}, [], 0
+        try:
+            with contextlib.closing(pdf.iter_pdf_pages(data, workers, options=options)) as pdf_pages:
+                for page in pdf_pages:
+                    if page.error is not None:
+                        errors.append(f"Error processing page {page.number}: {page.error}")
+                    else:
+                        pages[page.number] = page.text
+                        text_layer_pages += page.source == "text"
+                    progress(done + page.number / page.count, f"{name}: page {page.number} of {page.count}")
+        except Exception as e:
+            if context is not None and context.cancelled:
+                raise
+            errors.append(f"Error processing PDF: {e}")
+        outcome = None
+        if pages:
+            text = "\n".join(pages[number] for number in sorted(pages))
+            outcome = file_result(text, statement.parse_statement_text(text) if is_statement else None,
+                                  f"{len(pages)} page(s), {text_layer_pages} read from the PDF text layer without OCR")
+        # documents with failed pages are not cached, so they are processed
+        # again when retried ("Process again" in the app, or the next CLI run)
+        if errors or outcome is None:
+            failed[key] = (outcome, errors)
+        else:
+            _results.put(key, outcome)
+        done += 1
+    return failed
+
+
+def iter_documents(jobs, doc_type, workers=None, options=None):
+    """
+    Process ``(key, name, data)`` jobs and yield a DocumentResult per file.
+    Images are OCR'd together on the worker pool and come back as they
+    finish; PDFs follow, each page-parallel. Bank statements also carry the
+    parsed ``transactions`` frame.
+    """
+    import pandas as pd
+
+    is_statement = doc_type == "Bank Statements"
+    images = []
+    pdfs = []
+    for key, name, data in jobs:
+        ext = extension(name)
+        if ext == "csv":
+            try:
+                df = pd.read_csv(io.BytesIO(data))
+                yield DocumentResult(key, None, csv_values(df), None, None)
+            except Exception as e:
+                yield DocumentResult(key, None, [], None, e)
+        elif ext in ocr.IMAGE_EXTENSIONS:
+            images.append((key, data))
+        elif ext == "pdf":
+            pdfs.append((key, data))
+        else:
+            yield DocumentResult(key, None, [], None, ValueError(f"Unsupported file format: {name}"))
+
+    results = ocr.iter_ocr(images, workers, options=options, output="data" if is_statement else "text")
+    for result in results:
+        if result.error is not None:
+            yield DocumentResult(result.key, None, [], None, result.error)
+            continue
+        text, table = ocr_text(result.text, is_statement)
+        yield DocumentResult(result.key, text, extracted_values(text, table), table, None)
+
+    for key, data in pdfs:
+        pages = {}
+        try:
+            for page in pdf.iter_pdf_pages(data, workers, options=options):
+                if page.error is not None:
+                    raise page.error
+                pages[page.number] = page.text
+        except Exception as e:
+            yield DocumentResult(key, None, [], None, e)
+            continue
+        text = "\n".join(pages[number] for number in sorted(pages))
+        table = statement.parse_statement_text(text) if is_statement else None
+        yield DocumentResult(key, text, extracted_values(text, table), table, None)
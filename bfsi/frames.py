@@ -0,0 +1,165 @@
+"""
+Parsed-CSV cache shared by the analysis modules.
+
+Streamlit reruns the whole script on every widget change, so without this
+each column switch re-parses the full upload. Uploads are parsed once per
+content hash into a process-wide LRU cache bounded by a memory budget,
+and each cached frame memoises what the UI derives from it (dtypes,
+numeric columns, ``describe()`` and anything registered via ``memo``).
+A small per-session map from Streamlit's upload id to the cache entry
+means reruns skip even the hashing. Spooled uploads (bfsi.uploads) are
+parsed from disk under the hash taken while spooling.
+
+Cached frames are shared between sessions: callers must not modify
+``entry.df`` in place.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from bfsi import metrics, uploads
+
+DEFAULT_BUDGET_MB = 1024
+SESSION_KEY = "_bfsi_frames"
+SESSION_ENTRIES = 4
+
+
+class CsvEntry:
+    """A parsed CSV plus memoised artefacts derived from it."""
+
+    def __init__(self, digest, df):
+        self.digest = digest
+        self.df = df
+        self.nbytes = int(df.memory_usage(deep=True).sum())
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def memo(self, key, compute):
+        """Return ``compute()`` cached under ``key`` for the life of this entry."""
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        value = compute()
+        with self._lock:
+            return self._memo.setdefault(key, value)
+
+    @property
+    def dtypes(self):
+        return self.memo("dtypes", lambda: self.df.dtypes)
+
+    @property
+    def numeric_columns(self):
+        import numpy as np
+        return self.memo("numeric_columns",
+                         lambda: self.df.select_dtypes(include=np.number).columns.tolist())
+
+    @property
+    def text_columns(self):
+        return self.memo("text_columns",
+                         lambda: self.df.select_dtypes(include=["object", "string"]).columns.tolist())
+
+    def describe(self, column=None):
+        if column is None:
+            return self.memo("describe", self.df.describe)
+        return self.memo(("describe", column), self.df[column].describe)
+
+
+class FrameCache:
+    """Thread-safe LRU of CsvEntry objects bounded by total frame memory."""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            total = sum(item.nbytes for item in self._entries.values())
+            # never evict the entry just added, even if it alone exceeds the budget
+            while total > self.budget_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                total -= evicted.nbytes
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries),
+                    "bytes": sum(item.nbytes for item in self._entries.values()),
+                    "budget_bytes": self.budget_bytes, "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = FrameCache(int(float(os.environ.get("BFSI_FRAME_CACHE_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024))
+
+
+def get_cache():
+    return _cache
+
+
+def load_csv(data, **read_kwargs):
+    """Parse CSV bytes, or return the cached entry for identical content and options."""
+    import pandas as pd
+
+    digest = hashlib.sha256(data).hexdigest()
+    key = (digest, tuple(sorted(read_kwargs.items())))
+    entry = _cache.get(key)
+    if entry is None:
+        with metrics.stage("csv.read"):
+            entry = CsvEntry(digest, pd.read_csv(io.BytesIO(data), **read_kwargs))
+        _cache.put(key, entry)
+    return entry
+
+
+def load_spooled(spooled, **read_kwargs):
+    """CsvEntry for a SpooledFile, read through a memory map; shares entries with ``load_csv``."""
+    import pandas as pd
+
+    key = (spooled.sha256, tuple(sorted(read_kwargs.items())))
+    entry = _cache.get(key)
+    if entry is None:
+        with metrics.stage("csv.read"):
+            entry = CsvEntry(spooled.sha256, pd.read_csv(spooled.path, memory_map=True, **read_kwargs))
+        _cache.put(key, entry)
+    return entry
+
+
+def load_upload(file, session=None, **read_kwargs):
+    """
+    CsvEntry for a Streamlit upload or a SpooledFile. Pass ``st.session_state`` as ``session``
+    to remember the last few uploads of the session by upload id, so a rerun
+    neither re-reads nor re-hashes the file.
+    """
+    upload_key = (getattr(file, "file_id", None) or file.name, tuple(sorted(read_kwargs.items())))
+    if session is not None:
+        recent = session.setdefault(SESSION_KEY, OrderedDict())
+        entry = recent.get(upload_key)
+        if entry is not None:
+            recent.move_to_end(upload_key)
+            return entry
+    if isinstance(file, uploads.SpooledFile):
+        entry = load_spooled(file, **read_kwargs)
+    else:
+        entry = load_csv(file.getvalue(), **read_kwargs)
+    if session is not None:
+        recent[upload_key] = entry
+        while len(recent) > SESSION_ENTRIES:
+            recent.popitem(last=False)
+    return entry
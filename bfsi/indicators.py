@@ -0,0 +1,198 @@
+"""
+Technical indicators for daily closing prices.
+
+Everything works on one date-aligned wide frame of closes (one column per
+ticker, see ``stocks.aligned_closes``), so each indicator is a single
+vectorised rolling or exponential-mean call across all tickers: log
+returns, SMA, EMA, annualised rolling volatility, RSI (Wilder smoothing),
+MACD, Bollinger bands and drawdown from the running peak.
+
+``compute`` can continue from the state returned for the rows before, and
+then gives exactly the values a computation over the whole history would:
+rolling windows re-read only the last ``window`` closes, the exponential
+means restart from their last values and drawdown from the running peak.
+``IndicatorEngine`` memoises results per (ticker, window) and, when rows
+are appended to a ticker's history, computes only the new rows.
+"""
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+from bfsi import metrics
+from bfsi.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+DEFAULT_WINDOW = 20
+MACD_SPANS = (12, 26, 9)
+BOLLINGER_WIDTH = 2.0
+TRADING_DAYS = 252
+ENGINE_ENTRIES = 512
+
+INDICATORS = ["Log return", "SMA", "EMA", "Volatility", "RSI", "MACD", "MACD signal",
+              "MACD histogram", "Bollinger upper", "Bollinger lower", "Drawdown"]
+
+
+def _ewm(values, last=None, **kwargs):
+    """Recursive (adjust=False) exponential mean, continuing from ``last`` (one value per column)."""
+    if last is not None:
+        values = pd.concat([last.to_frame().T, values])
+    mean = values.ewm(adjust=False, ignore_na=True, **kwargs).mean()
+    return mean if last is None else mean.iloc[1:]
+
+
+def compute(close, window=DEFAULT_WINDOW, state=None):
+    """
+    Indicators for the wide frame ``close`` as a frame with (indicator,
+    ticker) columns, and the state to continue from. Passing the state of
+    the call over the rows just before ``close`` (same columns) gives the
+    values of a computation over the whole history.
+    """
+    close = close.astype(float)
+    state = state or {}
+    if close.empty:
+        return pd.DataFrame(index=close.index, columns=pd.MultiIndex.from_product([INDICATORS, close.columns])), state
+    fast_span, slow_span, signal_span = MACD_SPANS
+
+    # rolling windows read the closes kept from the previous call as well
+    full = close if "tail" not in state else pd.concat([state["tail"], close])
+    skip = len(full) - len(close)
+    log_return = np.log(full).diff()
+    rolling = full.rolling(window, min_periods=window)
+    sma = rolling.mean()
+    band = rolling.std() * BOLLINGER_WIDTH
+    volatility = log_return.rolling(window, min_periods=window).std() * np.sqrt(TRADING_DAYS)
+
+    change = full.diff().iloc[skip:]
+    gain = _ewm(change.clip(lower=0), state.get("gain"), alpha=1 / window)
+    loss = _ewm((-change).clip(lower=0), state.get("loss"), alpha=1 / window)
+    ema = _ewm(close, state.get("ema"), span=window)
+    fast = _ewm(close, state.get("fast"), span=fast_span)
+    slow = _ewm(close, state.get("slow"), span=slow_span)
+    macd = fast - slow
+    signal = _ewm(macd, state.get("signal"), span=signal_span)
+    peak = (close.cummax() if "peak" not in state
+            else pd.concat([state["peak"].to_frame().T, close]).cummax().iloc[1:])
+
+    # closes seen so far, so the warm-up rows stay blank across calls
+    count = close.notna().cumsum() + state.get("count", 0)
+    macd_ready = count >= slow_span
+    result = pd.concat({
+        "Log return": log_return.iloc[skip:],
+        "SMA": sma.iloc[skip:],
+        "EMA": ema.where(count >= window),
+        "Volatility": volatility.iloc[skip:],
+        "RSI": (100 * gain / (gain + loss)).where(count > window),
+        "MACD": macd.where(macd_ready),
+        "MACD signal": signal.where(macd_ready),
+        "MACD histogram": (macd - signal).where(macd_ready),
+        "Bollinger upper": (sma + band).iloc[skip:],
+        "Bollinger lower": (sma - band).iloc[skip:],
+        "Drawdown": close / peak - 1,
+    }, axis=1)
+    state = {"tail": full.iloc[-window:], "count": count.iloc[-1], "gain": gain.iloc[-1],
+             "loss": loss.iloc[-1], "ema": ema.iloc[-1], "fast": fast.iloc[-1], "slow": slow.iloc[-1],
+             "signal": signal.iloc[-1], "peak": peak.ffill().iloc[-1]}
+    return result, state
+
+
+# ``first``/``last``/``rows`` describe the dates computed and ``digest`` the
+# ticker's closes on them, so a changed history is recomputed, not extended;
+# ``values`` holds the results as a (rows, indicator) array
+_Entry = namedtuple("_Entry", ["first", "last", "rows", "digest", "values", "state"])
+
+
+def _digest(column):
+    return hashlib.sha1(np.ascontiguousarray(column.to_numpy(dtype=float))).hexdigest()
+
+
+def _split_state(state, ticker):
+    return {name: value[ticker] for name, value in state.items()}
+
+
+def _join_state(states, tickers):
+    joined = {name: pd.Series([state[name] for state in states], index=tickers)
+              for name in states[0] if name != "tail"}
+    joined["tail"] = pd.concat([state["tail"] for state in states], axis=1, keys=tickers)
+    return joined
+
+
+class IndicatorEngine:
+    """Indicator results memoised per (ticker, window), extended when rows are appended."""
+
+    def __init__(self, entries=ENGINE_ENTRIES):
+        self.entries = entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _reusable(self, entry, column):
+        if entry is None or entry.rows == 0 or entry.first != column.index[0] or entry.last > column.index[-1]:
+            return False
+        known = column.iloc[:entry.rows]
+        return known.index[-1] == entry.last and _digest(known) == entry.digest
+
+    @metrics.stage("indicators")
+    def indicators(self, close, window=DEFAULT_WINDOW):
+        """``compute`` over all of ``close``, reusing and extending memoised tickers."""
+        close = close.astype(float)
+        if close.empty:
+            return compute(close, window)[0]
+        groups = {}
+        with self._lock:
+            for ticker in close.columns:
+                entry = self._entries.get((ticker, window))
+                if not self._reusable(entry, close[ticker]):
+                    entry = None
+                else:
+                    self._entries.move_to_end((ticker, window))
+                # tickers cached up to the same date continue together
+                groups.setdefault(None if entry is None else entry.rows, []).append((ticker, entry))
+
+        arrays = {}
+        for rows, members in groups.items():
+            tickers = [ticker for ticker, _ in members]
+            if rows is None:
+                result, state = compute(close[tickers], window)
+            elif rows == len(close):
+                result, state = None, None
+            else:
+                result, state = compute(close[tickers].iloc[rows:], window,
+                                        _join_state([entry.state for _, entry in members], tickers))
+            # (rows, indicator, ticker), matching the (indicator, ticker) column order
+            new = None if result is None else result.to_numpy().reshape(len(result), len(INDICATORS), len(tickers))
+            for i, (ticker, entry) in enumerate(members):
+                if new is None:
+                    arrays[ticker] = entry.values
+                    continue
+                values = new[:, :, i] if entry is None else np.concatenate([entry.values, new[:, :, i]])
+                arrays[ticker] = values
+                self._store((ticker, window), _Entry(close.index[0], close.index[-1], len(close),
+                                                     _digest(close[ticker]), values, _split_state(state, ticker)))
+
+        stacked = np.stack([arrays[ticker] for ticker in close.columns], axis=2)
+        return pd.DataFrame(stacked.reshape(len(close), -1), index=close.index,
+                            columns=pd.MultiIndex.from_product([INDICATORS, list(close.columns)]))
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_engine = IndicatorEngine()
+
+
+def get_engine():
+    return _engine
+
+
+def latest(table):
+    """Last available value of every indicator, one row per ticker."""
+    return table.ffill().iloc[-1].unstack(0)[INDICATORS] if len(table) else pd.DataFrame(columns=INDICATORS)
@@ -0,0 +1,276 @@
+"""
+Background jobs that outlive a Streamlit script run.
+
+Any widget click reruns the script from the top and abandons whatever the
+previous run was still doing, so long OCR work is submitted here instead:
+``JobQueue.submit`` hands a function to a thread of the process-wide
+queue and returns at once, and each script run only reads the job's
+status, progress and result, rerunning itself until the job finishes.
+
+The job table is kept in SQLite (``$BFSI_JOBS_DB``, default
+``jobs.sqlite3`` in the bfsi cache directory), so every session of the
+server, including a refreshed browser tab, sees the same jobs. The
+functions and their results stay in this process; jobs left queued or
+running by a server process that has since exited are marked failed when
+the queue starts.
+
+* ``submit`` is idempotent per (owner, key): while a job for the same
+  content exists, a rerun gets that job back rather than a new one
+  (``retry=True`` starts again after a failure or cancellation);
+* at most ``$BFSI_JOBS_PER_USER`` jobs of one owner (default 2) run at
+  once, the rest wait queued in submission order, and at most
+  ``$BFSI_JOB_THREADS`` (default 4) run in all, so one user's large upload
+  never holds up everyone else;
+* ``cancel`` drops a queued job at once; a running one stops at its next
+  ``JobContext.check`` or ``JobContext.progress`` call.
+
+A job runs in a copy of the submitting thread's context variables, so
+what the script run bound (its session metrics, its owner on the OCR
+scheduler) applies to the job too.
+"""
+import contextlib
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from bfsi import metrics
+from bfsi.ocr_cache import cache_dir
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE = (QUEUED, RUNNING)
+DEFAULT_THREADS = 4
+DEFAULT_PER_USER = 2
+RESULT_ENTRIES = 64
+# finished jobs older than this are dropped from the table on start-up
+KEEP_SECONDS = 7 * 24 * 3600
+# how long a script run waits before rerunning to poll an active job
+POLL_SECONDS = 1.0
+OWNER_KEY = "_bfsi_job_owner"
+
+_COLUMNS = ["id", "owner", "kind", "key", "label", "status", "progress", "message", "error",
+            "created", "started", "finished", "pid"]
+Job = namedtuple("Job", _COLUMNS)
+
+
+class Cancelled(Exception):
+    """Raised inside a job by ``JobContext.check`` once it has been cancelled."""
+
+
+class JobContext:
+    """Passed to a job function to report progress and notice cancellation."""
+
+    def __init__(self, queue, job_id):
+        self.job_id = job_id
+        self._queue = queue
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise Cancelled()
+
+    def progress(self, fraction, message=None):
+        """Record progress (0 to 1) and a status line; raises Cancelled if cancelled."""
+        self._queue._update(self.job_id, progress=max(0.0, min(1.0, float(fraction))), message=message)
+        self.check()
+
+
+def default_path():
+    return os.environ.get("BFSI_JOBS_DB") or os.path.join(cache_dir(), "jobs.sqlite3")
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # exists but belongs to someone else
+        return True
+    return True
+
+
+class JobQueue:
+    """Thread pool running job functions, with their status in a SQLite table."""
+
+    def __init__(self, path=None, threads=None, per_owner=None):
+        self.path = path or default_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.threads = threads or int(os.environ.get("BFSI_JOB_THREADS", DEFAULT_THREADS))
+        self.per_owner = per_owner or int(os.environ.get("BFSI_JOBS_PER_USER", DEFAULT_PER_USER))
+        self._lock = threading.Lock()
+        self._waiting = deque()
+        self._funcs = {}
+        self._contexts = {}
+        self._running = {}
+        self._results = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="bfsi-job")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, owner TEXT NOT NULL, kind TEXT NOT NULL, key TEXT NOT NULL,"
+                " label TEXT, status TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0, message TEXT,"
+                " error TEXT, created REAL NOT NULL, started REAL, finished REAL, pid INTEGER)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_owner_key ON jobs(owner, key)")
+            conn.execute("DELETE FROM jobs WHERE finished < ?", (time.time() - KEEP_SECONDS,))
+            stale = [(FAILED, "The server stopped before the job finished", time.time(), job_id)
+                     for job_id, pid in conn.execute("SELECT id, pid FROM jobs WHERE status IN (?, ?)", ACTIVE)
+                     if pid != os.getpid() and not _alive(pid)]
+            conn.executemany("UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ?", stale)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # a short-lived connection per call, as in ocr_cache
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _update(self, job_id, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(*row) if row else None
+
+    def jobs_for(self, owner, limit=20):
+        """An owner's most recent jobs, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE owner = ?"
+                                " ORDER BY created DESC LIMIT ?", (owner, limit)).fetchall()
+        return [Job(*row) for row in rows]
+
+    def find(self, owner, key):
+        """The latest job of ``owner`` for ``key``, or None."""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE owner = ? AND key = ?"
+                               " ORDER BY created DESC LIMIT 1", (owner, key)).fetchone()
+        return Job(*row) if row else None
+
+    def result(self, job_id):
+        """Return value of a finished job run by this process, or None."""
+        with self._lock:
+            return self._results.get(job_id)
+
+    def submit(self, owner, kind, key, func, label="", retry=False):
+        """
+        Queue ``func(context)`` as a job of ``owner`` and return its Job.
+        An earlier job for the same owner and key is returned instead while
+        it is active, or when it has finished and ``retry`` is false.
+        """
+        with self._lock:
+            existing = self.find(owner, key)
+            if existing is not None and (existing.status in ACTIVE or not retry):
+                # results stay in the process that ran the job, so another
+                # server process's job is not reused
+                if existing.status not in ACTIVE or existing.pid == os.getpid():
+                    return existing
+            job_id = uuid.uuid4().hex
+            with self._connect() as conn:
+                conn.execute("INSERT INTO jobs (id, owner, kind, key, label, status, created, pid)"
+                             " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (job_id, owner, kind, key, label, QUEUED, time.time(), os.getpid()))
+            self._funcs[job_id] = (owner, func, contextvars.copy_context())
+            self._contexts[job_id] = JobContext(self, job_id)
+            self._waiting.append(job_id)
+            self._dispatch()
+        return self.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns False if it is not active here."""
+        with self._lock:
+            context = self._contexts.get(job_id)
+            if context is None:
+                return False
+            context._cancelled.set()
+            if job_id in self._waiting:
+                self._waiting.remove(job_id)
+                self._funcs.pop(job_id)
+                self._contexts.pop(job_id)
+                self._update(job_id, status=CANCELLED, finished=time.time())
+            else:
+                self._update(job_id, message="Cancelling...")
+        return True
+
+    def _dispatch(self):
+        """Start waiting jobs whose owner is under the limit; called with the lock held."""
+        for job_id in list(self._waiting):
+            owner, func, variables = self._funcs[job_id]
+            if self._running.get(owner, 0) >= self.per_owner:
+                continue
+            self._waiting.remove(job_id)
+            self._running[owner] = self._running.get(owner, 0) + 1
+            self._executor.submit(variables.run, self._run, job_id, owner, func, self._contexts[job_id])
+
+    def _run(self, job_id, owner, func, context):
+        result, status, error = None, DONE, None
+        try:
+            started = time.time()
+            job = self.get(job_id)
+            metrics.record("jobs.wait", started - job.created)
+            context.check()
+            self._update(job_id, status=RUNNING, started=started)
+            with metrics.stage(f"jobs.{job.kind}"):
+                result = func(context)
+        except Cancelled:
+            status = CANCELLED
+        except Exception as e:
+            status, error = FAILED, f"{type(e).__name__}: {e}"
+        finally:
+            with self._lock:
+                self._update(job_id, status=status, error=error, finished=time.time(),
+                             progress=1.0 if status == DONE else self.get(job_id).progress)
+                if result is not None:
+                    self._results[job_id] = result
+                    while len(self._results) > RESULT_ENTRIES:
+                        self._results.popitem(last=False)
+                self._funcs.pop(job_id, None)
+                self._contexts.pop(job_id, None)
+                self._running[owner] -= 1
+                self._dispatch()
+
+    def stats(self):
+        with self._lock:
+            return {"queued": len(self._waiting), "running": sum(self._running.values()),
+                    "threads": self.threads, "per_owner": self.per_owner}
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+
+def session_owner(session):
+    """
+    Owner of a Streamlit session's jobs: the verified e-mail address when
+    there is one, so jobs are found again after a refresh, else an id kept
+    for the life of the session.
+    """
+    owner = session.get("user_email")
+    if owner:
+        return owner
+    if OWNER_KEY not in session:
+        session[OWNER_KEY] = f"session-{uuid.uuid4().hex}"
+    return session[OWNER_KEY]
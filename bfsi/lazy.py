@@ -0,0 +1,24 @@
+"""Deferred imports so a module only pays for the heavy packages it uses."""
+import importlib
+
+
+class LazyModule:
+    """Stand-in for a module that imports it on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    """``pd = lazy_import("pandas")`` defers importing pandas until ``pd.<attr>`` is used."""
+    return LazyModule(name)
@@ -0,0 +1,154 @@
+"""Education loan catalogue, applicant risk scoring and recommendations."""
+
+# Predefined education loan schemes with additional details
+EDUCATION_LOANS = [
+    {
+        "name": "SBI Education Loan",
+        "min_academic_score": 70,
+        "min_credit_score": 750,
+        "max_annual_income": 2000000,
+        "description": "Offers competitive rates for higher studies in India and abroad.",
+        "tenure": "15 years",
+        "interest_rate": "7.5%"
+    },
+    {
+        "name": "HDFC Education Loan",
+        "min_academic_score": 75,
+        "min_credit_score": 720,
+        "max_annual_income": 1800000,
+        "description": "Covers tuition fees and other expenses with attractive interest rates.",
+        "tenure": "10-15 years",
+        "interest_rate": "8.0%"
+    },
+    {
+        "name": "Axis Bank Education Loan",
+        "min_academic_score": 65,
+        "min_credit_score": 700,
+        "max_annual_income": 1500000,
+        "description": "Quick approval process and broad coverage for educational expenses.",
+        "tenure": "10 years",
+        "interest_rate": "9.0%"
+    },
+    {
+        "name": "PNB Education Loan",
+        "min_academic_score": 60,
+        "min_credit_score": 680,
+        "max_annual_income": 1600000,
+        "description": "Competitive rates with extensive support for educational financing.",
+        "tenure": "10 years",
+        "interest_rate": "10.0%"
+    },
+    {
+        "name": "Canara Bank Education Loan",
+        "min_academic_score": 70,
+        "min_credit_score": 700,
+        "max_annual_income": 1700000,
+        "description": "Provides comprehensive financial support with flexible repayment options.",
+        "tenure": "15 years",
+        "interest_rate": "7.8%"
+    }
+]
+
+# Columns of an applicant file, matched ignoring case, spaces and
+# punctuation (``Academic Score`` -> ``academic_score``). Blank optional
+# values mean "not provided", as in the single-applicant form.
+REQUIRED_APPLICANT_COLUMNS = ["academic_score", "credit_score", "marks_12"]
+OPTIONAL_APPLICANT_COLUMNS = ["ug_marks", "past_loan_amount", "emi_bounces", "annual_income"]
+
+# Risk score upper bounds and the loans recommended below each one
+RISK_BANDS = [
+    (20, ["SBI Education Loan", "HDFC Education Loan", "Canara Bank Education Loan"]),
+    (40, ["Axis Bank Education Loan"]),
+    (float("inf"), ["PNB Education Loan"]),
+]
+
+
+def risk_score(academic_score, credit_score, marks_12, ug_marks=None,
+               past_loan_amount=0.0, emi_bounces=0):
+    """
+    Simple risk calculation (adjust weights/thresholds as needed). Pass
+    ``ug_marks=None`` when undergraduate marks were not provided, and leave
+    the past-loan terms at zero when no loan was taken.
+    """
+    risk = 0
+    risk += (100 - academic_score) * 0.1
+    risk += (850 - credit_score) * 0.05
+    risk += (100 - marks_12) * 0.1
+    if ug_marks is not None:
+        risk += (100 - ug_marks) * 0.05
+    risk += (past_loan_amount / 100000) * 0.2
+    risk += emi_bounces * 5
+    return risk
+
+
+def risk_scores(academic_score, credit_score, marks_12, ug_marks=None,
+                past_loan_amount=0.0, emi_bounces=0):
+    """
+    ``risk_score`` over arrays of applicants, term by term in the same
+    order, so each score equals the single-applicant one. NaN ``ug_marks``
+    count as not provided.
+    """
+    import numpy as np
+
+    risk = (100 - np.asarray(academic_score, dtype=float)) * 0.1
+    risk += (850 - np.asarray(credit_score, dtype=float)) * 0.05
+    risk += (100 - np.asarray(marks_12, dtype=float)) * 0.1
+    if ug_marks is not None:
+        ug_marks = np.asarray(ug_marks, dtype=float)
+        risk += np.where(np.isnan(ug_marks), 0.0, (100 - ug_marks) * 0.05)
+    risk += (np.asarray(past_loan_amount, dtype=float) / 100000) * 0.2
+    risk += np.asarray(emi_bounces, dtype=float) * 5
+    return risk
+
+
+def risk_bands(risks):
+    """Index into RISK_BANDS of each risk score, ``len(RISK_BANDS)`` when none applies (NaN)."""
+    import numpy as np
+
+    uppers = np.array([upper for upper, _ in RISK_BANDS])
+    # a score belongs to the first band whose bound it is below
+    return np.searchsorted(uppers, risks, side="right")
+
+
+def applicant_columns(columns):
+    """``{applicant column: file column}`` for the columns of an applicant file."""
+    import re
+
+    found = {re.sub(r"[^a-z0-9]+", "_", str(column).lower()).strip("_"): column for column in columns}
+    missing = [name for name in REQUIRED_APPLICANT_COLUMNS if name not in found]
+    if missing:
+        raise ValueError(f"Applicant file is missing column(s): {', '.join(missing)}")
+    return {name: found[name] for name in REQUIRED_APPLICANT_COLUMNS + OPTIONAL_APPLICANT_COLUMNS
+            if name in found}
+
+
+def applicant_values(df):
+    """``{applicant column: float array}`` of an applicant frame; blanks are NaN."""
+    import pandas as pd
+
+    return {name: pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+            for name, column in applicant_columns(df.columns).items()}
+
+
+def score_applicants(df, values=None):
+    """
+    Copy of an applicant frame with ``risk_score`` and ``risk_band`` (index
+    into RISK_BANDS) columns. Blank required values give a NaN score.
+    """
+    import numpy as np
+
+    values = dict(applicant_values(df) if values is None else values)
+    values.pop("annual_income", None)
+    for name in ("past_loan_amount", "emi_bounces"):
+        if name in values:
+            values[name] = np.nan_to_num(values[name])
+    risk = risk_scores(**values)
+    return df.assign(risk_score=risk, risk_band=risk_bands(risk))
+
+
+def recommend_loans(risk, loans=EDUCATION_LOANS):
+    """Loan recommendation logic based on risk thresholds."""
+    for upper, names in RISK_BANDS:
+        if risk < upper:
+            return [loan for loan in loans if loan["name"] in names]
+    return []
@@ -0,0 +1,269 @@
+"""
+Per-stage timing and memory instrumentation.
+
+Wrap a stage with ``stage(name)``, as a context manager or decorator::
+
+    with metrics.stage("csv.read"):
+        df = pd.read_csv(...)
+
+    @metrics.stage("clustering")
+    def cluster_columns(...): ...
+
+Each completed stage records its wall time and the process RSS before and
+after it. Durations measured elsewhere (e.g. tesseract time reported back
+by OCR workers) go through ``record``, and current levels such as a queue
+depth through ``set_gauge``. Samples are kept in the
+process-wide registry and, when the app has called ``bind_session`` for
+the current script run, in that session's registry too; each keeps the
+last ``WINDOW`` samples per stage for percentiles.
+
+Exports, both optional:
+
+* ``$BFSI_METRICS_FILE`` ending in ``.prom`` is rewritten at most every
+  ``$BFSI_METRICS_INTERVAL`` seconds (default 15) with a Prometheus text
+  snapshot of the process registry; any other name gets one JSON line per
+  recorded stage appended;
+* ``prometheus_text()`` returns the same snapshot, e.g. for a download.
+
+The app's admin panel is shown only when the page URL carries
+``?admin=<token>`` matching ``$BFSI_ADMIN_TOKEN``.
+"""
+import contextlib
+import contextvars
+import hmac
+import json
+import os
+import threading
+import time
+from collections import deque
+
+WINDOW = 1000
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+SESSION_KEY = "_bfsi_metrics"
+DEFAULT_EXPORT_INTERVAL = 15.0
+
+_session = contextvars.ContextVar("bfsi_session_metrics", default=None)
+_gauges = {}
+_gauges_lock = threading.Lock()
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # peak rather than current RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class _Series:
+    """Recent samples and running totals of one stage."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.seconds = deque(maxlen=WINDOW)
+        self.rss_delta = deque(maxlen=WINDOW)
+        self.rss = None
+
+
+class Registry:
+    """Thread-safe per-stage samples."""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, rss_delta=None, rss=None):
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                series = self._series[name] = _Series()
+            series.count += 1
+            series.total += seconds
+            series.seconds.append(seconds)
+            if rss_delta is not None:
+                series.rss_delta.append(rss_delta)
+            if rss is not None:
+                series.rss = rss
+
+    def snapshot(self):
+        """``{stage: (count, total seconds, recent seconds, recent RSS deltas, last RSS)}``."""
+        with self._lock:
+            return {name: (s.count, s.total, list(s.seconds), list(s.rss_delta), s.rss)
+                    for name, s in self._series.items()}
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+_registry = Registry()
+
+
+def get_registry():
+    return _registry
+
+
+def session_registry(session):
+    """The Registry kept in a Streamlit session (any dict-like)."""
+    registry = session.get(SESSION_KEY)
+    if registry is None:
+        registry = session[SESSION_KEY] = Registry()
+    return registry
+
+
+def bind_session(session):
+    """Also record stages of the current script run into ``session``'s registry."""
+    _session.set(session_registry(session))
+
+
+def record(name, seconds, rss_delta=None, rss=None):
+    """Record one sample of ``name`` in the process and bound session registries."""
+    _registry.add(name, seconds, rss_delta, rss)
+    bound = _session.get()
+    if bound is not None:
+        bound.add(name, seconds, rss_delta, rss)
+    _exporter.export(name, seconds, rss_delta, rss)
+
+
+def set_gauge(name, value, description=""):
+    """Set the current value of the process-wide gauge ``name`` (exported as ``bfsi_<name>``)."""
+    with _gauges_lock:
+        _gauges[name] = (value, description)
+
+
+def gauges():
+    """``{name: value}`` of every gauge set so far."""
+    with _gauges_lock:
+        return {name: value for name, (value, _) in _gauges.items()}
+
+
+class stage(contextlib.ContextDecorator):
+    """Time a block or function as stage ``name`` (see module docstring)."""
+
+    def __init__(self, name):
+        self.name = name
+        self._starts = threading.local()
+
+    def __enter__(self):
+        # a stack, so one decorated function may recurse or run in several threads
+        stack = self._starts.__dict__.setdefault("stack", [])
+        stack.append((time.perf_counter(), rss_bytes()))
+        return self
+
+    def __exit__(self, *exc):
+        start, rss_before = self._starts.stack.pop()
+        seconds = time.perf_counter() - start
+        rss = rss_bytes()
+        delta = rss - rss_before if rss is not None and rss_before is not None else None
+        record(self.name, seconds, delta, rss)
+        return False
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    position = q * (len(ordered) - 1)
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def summary(registry=None):
+    """Per-stage count, latency percentiles (ms, over the recent window) and mean RSS change (MB)."""
+    import pandas as pd
+
+    rows = []
+    for name, (count, total, seconds, deltas, rss) in sorted((registry or _registry).snapshot().items()):
+        row = {"stage": name, "count": count, "mean ms": 1e3 * total / count}
+        for q in QUANTILES:
+            row[f"p{q * 100:g} ms"] = 1e3 * _percentile(seconds, q)
+        row["max ms"] = 1e3 * max(seconds)
+        row["mean RSS change MB"] = sum(deltas) / len(deltas) / 2**20 if deltas else float("nan")
+        rows.append(row)
+    columns = ["stage", "count", "mean ms"] + [f"p{q * 100:g} ms" for q in QUANTILES] + ["max ms", "mean RSS change MB"]
+    return pd.DataFrame(rows, columns=columns).set_index("stage")
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(registry=None):
+    """Prometheus text exposition of a registry (default: the process registry)."""
+    lines = ["# HELP bfsi_stage_seconds Wall time of instrumented stages (quantiles over recent samples).",
+             "# TYPE bfsi_stage_seconds summary"]
+    snapshot = sorted((registry or _registry).snapshot().items())
+    for name, (count, total, seconds, _, _) in snapshot:
+        stage_label = f'stage="{_label(name)}"'
+        for q in QUANTILES:
+            lines.append(f'bfsi_stage_seconds{{{stage_label},quantile="{q:g}"}} {_percentile(seconds, q):.6g}')
+        lines.append(f"bfsi_stage_seconds_sum{{{stage_label}}} {total:.6g}")
+        lines.append(f"bfsi_stage_seconds_count{{{stage_label}}} {count}")
+    lines += ["# HELP bfsi_stage_rss_delta_bytes Mean change in process RSS across recent runs of a stage.",
+              "# TYPE bfsi_stage_rss_delta_bytes gauge"]
+    for name, (_, _, _, deltas, _) in snapshot:
+        if deltas:
+            lines.append(f'bfsi_stage_rss_delta_bytes{{stage="{_label(name)}"}} {sum(deltas) / len(deltas):.6g}')
+    with _gauges_lock:
+        current = sorted(_gauges.items())
+    for name, (value, description) in current:
+        lines += [f"# HELP bfsi_{name} {description or name}", f"# TYPE bfsi_{name} gauge",
+                  f"bfsi_{name} {value:.6g}"]
+    rss = rss_bytes()
+    if rss is not None:
+        lines += ["# HELP bfsi_process_rss_bytes Resident set size of the app process.",
+                  "# TYPE bfsi_process_rss_bytes gauge", f"bfsi_process_rss_bytes {rss}"]
+    return "\n".join(lines) + "\n"
+
+
+class _Exporter:
+    """Writes samples to ``$BFSI_METRICS_FILE`` as JSON lines or a Prometheus snapshot."""
+
+    def __init__(self):
+        self.path = os.environ.get("BFSI_METRICS_FILE")
+        self.interval = float(os.environ.get("BFSI_METRICS_INTERVAL", DEFAULT_EXPORT_INTERVAL))
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def export(self, name, seconds, rss_delta, rss):
+        if not self.path:
+            return
+        try:
+            if self.path.endswith(".prom"):
+                now = time.monotonic()
+                with self._lock:
+                    if now - self._last < self.interval:
+                        return
+                    self._last = now
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as handle:
+                    handle.write(prometheus_text())
+                os.replace(tmp, self.path)
+            else:
+                line = json.dumps({"time": time.time(), "pid": os.getpid(), "stage": name,
+                                   "seconds": seconds, "rss_delta": rss_delta, "rss": rss})
+                with self._lock, open(self.path, "a", encoding="utf-8") as handle:
+                    handle.write(line + "\n")
+        except OSError:
+            # metrics must never break the page
+            pass
+
+
+_exporter = _Exporter()
+
+
+def admin_enabled(query_params):
+    """True when the page was opened with ``?admin=`` set to ``$BFSI_ADMIN_TOKEN``."""
+    token = os.environ.get("BFSI_ADMIN_TOKEN")
+    given = query_params.get("admin") if query_params is not None else None
+    return bool(token) and isinstance(given, str) and hmac.compare_digest(given, token)
@@ -0,0 +1,159 @@
+"""
+OCR helpers shared by app.py and the supervised/ modules.
+
+Images are recognised on the worker pool of the shared OCR scheduler
+(bfsi.ocr_scheduler), so a multi-file upload uses every core instead of
+running tesseract one page at a time in the Streamlit script thread, and
+all sessions together never run more tesseract processes than there are
+cores. Results go through the persistent cache in ocr_cache, so
+a page that was already recognised in any session is never OCR'd again.
+Spooled uploads (bfsi.uploads) are opened by the workers from disk rather
+than sent to them as bytes.
+"""
+import contextlib
+import io
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from bfsi import metrics, uploads
+from bfsi.ocr_cache import cache_key, get_cache
+from bfsi.ocr_scheduler import default_slots, get_scheduler
+
+AMOUNT_PATTERN = re.compile(r'\d+\.\d{2}')
+IMAGE_EXTENSIONS = ["png", "jpg", "jpeg", "tiff"]
+
+# ``report`` is the PreprocessReport for pages that were preprocessed and
+# recognised in this call; cached pages and failures carry None
+OcrResult = namedtuple("OcrResult", ["key", "text", "error", "report"])
+
+
+def default_workers():
+    """Pages one call keeps in flight by default: every slot of the shared pool."""
+    return default_slots()
+
+
+def find_amounts(text):
+    """Return every ``123.45`` style amount found in the OCR text."""
+    return AMOUNT_PATTERN.findall(text)
+
+
+def _recognise(image, config, output="text"):
+    import pytesseract
+    if output == "data":
+        # word-level TSV with bounding boxes, see bfsi.statement
+        return pytesseract.image_to_data(image, config=config)
+    return pytesseract.image_to_string(image, config=config)
+
+
+def _cache_config(config, options, output="text"):
+    if output != "text":
+        config = f"{config}|output={output}"
+    return config if options is None else f"{config}|{options.signature()}"
+
+
+def recognise_image(image, config="", options=None, output="text"):
+    """
+    OCR a PIL image, running the preprocessing stage first when ``options``
+    (a PreprocessOptions) is given. ``output="data"`` returns tesseract's
+    word-box TSV instead of plain text. Returns ``(text, report)``.
+    """
+    if options is None:
+        return _recognise(image, config, output), None
+    from bfsi.preprocess import preprocess_image
+    prepared, report = preprocess_image(image, options)
+    start = time.perf_counter()
+    text = _recognise(prepared, config, output)
+    report.ocr_seconds = time.perf_counter() - start
+    return text, report
+
+
+def image_to_text(data, config="", options=None):
+    """
+    OCR one image file, given as bytes or a SpooledFile, on the shared pool.
+    It is one ``iter_ocr`` job, so it shares that cache key: a page OCR'd
+    here or there is not OCR'd again by the other.
+    """
+    with contextlib.closing(iter_ocr([(None, data)], workers=1, config=config, options=options)) as results:
+        result = next(results)
+    if result.error is not None:
+        raise result.error
+    return result.text
+
+
+def _content_key(data, config):
+    if isinstance(data, uploads.SpooledFile):
+        # continues the hash taken while spooling, same key as for the bytes
+        return cache_key(config=config, prefix=data.hasher())
+    return cache_key(data, config=config)
+
+
+def _ocr_source(source, config, options, output):
+    """Worker task: OCR an image given as a path or as bytes."""
+    from PIL import Image
+    with Image.open(source if isinstance(source, str) else io.BytesIO(source)) as image:
+        return recognise_image(image, config, options, output)
+
+
+def iter_ocr(jobs, workers=None, config="", options=None, output="text"):
+    """
+    Run OCR over ``(key, image)`` jobs, the image as bytes or a SpooledFile,
+    and yield an OcrResult for each
+    as soon as its page finishes, so callers can render results while the
+    rest of the upload is still being recognised. ``error`` is the raised
+    exception (and ``text`` is None) when a page fails. Pass PreprocessOptions
+    as ``options`` to preprocess each page inside the worker before OCR, and
+    ``output="data"`` to get tesseract's word-box TSV instead of plain text.
+
+    Cached pages are yielded first without touching the pool, and identical
+    pages within one upload are recognised only once. At most ``workers``
+    pages of this call are queued on the shared scheduler at a time.
+    """
+    cache = get_cache()
+    cache_config = _cache_config(config, options, output)
+    pending = {}
+    for key, data in jobs:
+        digest = _content_key(data, cache_config)
+        text = cache.get(digest) if cache is not None else None
+        if text is not None:
+            yield OcrResult(key, text, None, None)
+        else:
+            pending.setdefault(digest, (data, []))[1].append(key)
+    if not pending:
+        return
+
+    run = _run_pending(pending, workers or default_workers(), config, options, output)
+    with metrics.stage("ocr.batch"):
+        for digest, result, error in run:
+            text, report = result if error is None else (None, None)
+            if report is not None:
+                # measured in the worker
+                metrics.record("ocr.preprocess", report.preprocess_seconds)
+                metrics.record("ocr.tesseract", report.ocr_seconds)
+            if text is not None and cache is not None:
+                cache.put(digest, text)
+            for key in pending[digest][1]:
+                yield OcrResult(key, text, error, report)
+
+
+def _run_pending(pending, workers, config, options, output):
+    scheduler = get_scheduler()
+    waiting = list(pending.items())
+    in_flight = {}
+    try:
+        while waiting or in_flight:
+            while waiting and len(in_flight) < workers:
+                digest, (data, _) = waiting.pop(0)
+                in_flight[scheduler.submit(_ocr_source, uploads.source(data), config, options, output)] = digest
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                digest = in_flight.pop(future)
+                try:
+                    yield digest, future.result(), None
+                except Exception as e:
+                    yield digest, None, e
+    finally:
+        # a Streamlit rerun abandons the generator; drop the queued pages
+        for future in in_flight:
+            future.cancel()
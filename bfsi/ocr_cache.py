@@ -0,0 +1,123 @@
+"""
+Persistent OCR result cache.
+
+Entries are keyed by a SHA-256 of the image content plus the tesseract
+config, stored in a SQLite file and evicted least-recently-used once the
+stored text exceeds the size budget. The file lives on local disk so every
+session and every server restart shares it.
+"""
+import contextlib
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_MAX_MB = 256
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_dir():
+    return os.environ.get("BFSI_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "bfsi")
+
+
+def cache_key(*parts, config="", prefix=None):
+    """
+    Hash the given byte strings together with the tesseract config.
+    ``prefix`` is a SHA-256 object already fed the leading content, e.g. a
+    spooled upload's ``hasher()``.
+    """
+    digest = prefix or hashlib.sha256()
+    for part in parts:
+        digest.update(part)
+    digest.update(b"\0config=" + config.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class OCRCache:
+    def __init__(self, path=None, max_bytes=None):
+        if path is None:
+            os.makedirs(cache_dir(), exist_ok=True)
+            path = os.path.join(cache_dir(), "ocr_cache.sqlite3")
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("BFSI_OCR_CACHE_MB", DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.path = path
+        self.max_bytes = max_bytes
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                " key TEXT PRIMARY KEY, text TEXT NOT NULL,"
+                " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ocr_cache_last_used ON ocr_cache(last_used)")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps the cache usable from the
+        # Streamlit script threads of every session. The connection's own
+        # context manager commits but does not close it.
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT text FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE ocr_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def put(self, key, text):
+        size = len(text.encode("utf-8"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ocr_cache (key, text, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, text, size, time.time()),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+        excess = total - self.max_bytes
+        while excess > 0:
+            rows = conn.execute(
+                "SELECT key, size FROM ocr_cache ORDER BY last_used LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, size in rows:
+                victims.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            conn.executemany("DELETE FROM ocr_cache WHERE key = ?", victims)
+
+    def stats(self):
+        with self._connect() as conn:
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_cache"
+            ).fetchone()
+        return {"entries": entries, "bytes": total, "max_bytes": self.max_bytes, "path": self.path}
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM ocr_cache")
+
+
+def get_cache():
+    """Return the process-wide cache, or None when BFSI_OCR_CACHE=0."""
+    global _cache
+    if os.environ.get("BFSI_OCR_CACHE", "1") == "0":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = OCRCache()
+        return _cache
@@ -0,0 +1,174 @@
+"""
+Process-wide OCR scheduler shared by every session.
+
+All OCR, of uploaded images, scanned PDF pages and the standalone pages,
+runs on one process pool of ``slots`` workers (``$BFSI_OCR_WORKERS``,
+default the core count), and at most ``slots`` pages are handed to the
+pool at a time, so however many sessions upload at once the server never
+runs more tesseract processes than it has cores. Pages wait in one queue
+per owner (the user of a session, see ``bind_owner``) and each freed slot
+goes to the owner with the fewest pages on the pool, taking turns among
+equals: a user with a 200-page upload delays someone else's single page
+by one page at most, not by the whole upload.
+
+Each worker sets ``OMP_THREAD_LIMIT`` (``$BFSI_OCR_THREADS``, default 1)
+before tesseract starts; tesseract's own OpenMP threads would otherwise
+multiply with the workers and oversubscribe the cores again.
+
+The wait of every page is recorded as the ``ocr.queue_wait`` stage in
+bfsi.metrics, and the queued pages and busy slots as the
+``ocr_queue_depth`` and ``ocr_running`` gauges.
+"""
+import contextvars
+import functools
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from bfsi import metrics
+
+DEFAULT_THREADS = 1
+DEFAULT_OWNER = "default"
+
+_owner = contextvars.ContextVar("bfsi_ocr_owner", default=None)
+
+_Task = namedtuple("_Task", ["future", "fn", "args", "queued"])
+
+
+def default_slots():
+    """Pool size from BFSI_OCR_WORKERS, falling back to the core count."""
+    env = os.environ.get("BFSI_OCR_WORKERS")
+    if env:
+        return max(1, int(env))
+    return os.cpu_count() or 1
+
+
+def bind_owner(owner):
+    """Queue the OCR submitted from the current script run (or job) under ``owner``."""
+    _owner.set(owner)
+
+
+def _init_worker(threads):
+    os.environ["OMP_THREAD_LIMIT"] = str(threads)
+
+
+def _call(fn, args):
+    """Worker side of a task: ``fn(*args)``, with errors made safe to send back."""
+    try:
+        return fn(*args)
+    except Exception as e:
+        try:
+            pickle.loads(pickle.dumps(e))
+        except Exception:
+            # e.g. pytesseract's TesseractNotFoundError cannot be unpickled,
+            # and an error the pool cannot read back breaks the whole pool
+            raise RuntimeError(f"{type(e).__name__}: {e}") from None
+        raise
+
+
+class OcrScheduler:
+    """Fair, slot-limited front of the OCR process pool."""
+
+    def __init__(self, slots=None, threads=None):
+        self.slots = slots or default_slots()
+        self.threads = threads or int(os.environ.get("BFSI_OCR_THREADS", DEFAULT_THREADS))
+        self._queues = OrderedDict()
+        self._running = 0
+        self._owner_running = {}
+        self._pool = None
+        # re-entrant: a pool future that is already done runs its callback
+        # inside _dispatch
+        self._lock = threading.RLock()
+
+    def submit(self, fn, *args, owner=None):
+        """
+        Queue ``fn(*args)`` (a picklable module-level function) for the pool
+        and return a Future. Cancelling the Future before the page reaches
+        the pool drops it from the queue.
+        """
+        owner = owner or _owner.get() or DEFAULT_OWNER
+        future = Future()
+        with self._lock:
+            self._queues.setdefault(owner, deque()).append(_Task(future, fn, args, time.perf_counter()))
+            self._dispatch()
+        return future
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn rather than fork: the Streamlit server is multi-threaded
+            self._pool = ProcessPoolExecutor(max_workers=self.slots,
+                                             mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker, initargs=(self.threads,))
+        return self._pool
+
+    def _reset_pool(self, pool):
+        if self._pool is pool and pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _dispatch(self):
+        """Hand queued pages to free slots, one owner after another; called with the lock held."""
+        while self._running < self.slots and self._queues:
+            owner = min(self._queues, key=lambda name: self._owner_running.get(name, 0))
+            queue = self._queues.pop(owner)
+            task = queue.popleft()
+            # the owner goes to the back of the line
+            if queue:
+                self._queues[owner] = queue
+            if not task.future.set_running_or_notify_cancel():
+                continue
+            metrics.record("ocr.queue_wait", time.perf_counter() - task.queued)
+            pool = self._get_pool()
+            try:
+                pool_future = pool.submit(_call, task.fn, task.args)
+            except (BrokenProcessPool, RuntimeError) as e:
+                self._reset_pool(pool)
+                task.future.set_exception(e)
+                continue
+            self._running += 1
+            self._owner_running[owner] = self._owner_running.get(owner, 0) + 1
+            pool_future.add_done_callback(functools.partial(self._finished, owner, task.future, pool))
+        self._publish()
+
+    def _finished(self, owner, future, pool, pool_future):
+        # pages still queued in a pool that was reset come back cancelled
+        error = BrokenProcessPool("The OCR pool was reset") if pool_future.cancelled() else pool_future.exception()
+        with self._lock:
+            self._running -= 1
+            self._owner_running[owner] -= 1
+            if not self._owner_running[owner]:
+                del self._owner_running[owner]
+            if isinstance(error, BrokenProcessPool):
+                self._reset_pool(pool)
+            self._dispatch()
+        if error is None:
+            future.set_result(pool_future.result())
+        else:
+            future.set_exception(error)
+
+    def _publish(self):
+        metrics.set_gauge("ocr_queue_depth", sum(len(queue) for queue in self._queues.values()),
+                          "OCR pages waiting for a slot.")
+        metrics.set_gauge("ocr_running", self._running, "OCR pages on the worker pool.")
+
+    def stats(self):
+        with self._lock:
+            return {"slots": self.slots, "threads_per_worker": self.threads, "running": self._running,
+                    "queued": {owner: len(queue) for owner, queue in self._queues.items()}}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = OcrScheduler()
+        return _scheduler
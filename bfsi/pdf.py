@@ -0,0 +1,129 @@
+"""
+PDF ingestion for the supervised module.
+
+Pages that carry an embedded text layer are read directly and never OCR'd.
+The remaining pages are rasterised and recognised on the shared OCR
+scheduler's worker pool one page per task, with only a bounded number of pages in flight, so a long
+statement is never held fully rasterised in memory.
+"""
+import os
+import tempfile
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from bfsi import metrics, ocr, uploads
+from bfsi.ocr_cache import cache_key, get_cache
+from bfsi.ocr_scheduler import get_scheduler
+
+DEFAULT_DPI = 300
+# Fewer characters than this on a page is treated as "no text layer"
+MIN_TEXT_CHARS = 16
+
+PdfPage = namedtuple("PdfPage", ["number", "count", "text", "source", "error"])
+
+
+def _require_pdfium():
+    try:
+        import pypdfium2
+    except ImportError:
+        raise RuntimeError("PDF support requires the pypdfium2 package (pip install pypdfium2).")
+    return pypdfium2
+
+
+@metrics.stage("pdf.text_layer")
+def _page_text(doc, index):
+    page = doc[index]
+    try:
+        textpage = page.get_textpage()
+        try:
+            return textpage.get_text_range()
+        finally:
+            textpage.close()
+    finally:
+        page.close()
+
+
+def _ocr_pdf_page(path, index, dpi, config, options):
+    """Worker task: rasterise one page and OCR it."""
+    pdfium = _require_pdfium()
+    doc = pdfium.PdfDocument(path)
+    try:
+        page = doc[index]
+        try:
+            image = page.render(scale=dpi / 72).to_pil()
+            image.info["dpi"] = (dpi, dpi)
+        finally:
+            page.close()
+    finally:
+        doc.close()
+    try:
+        return ocr.recognise_image(image, config, options)[0]
+    finally:
+        image.close()
+
+
+def iter_pdf_pages(data, workers=None, config="", dpi=DEFAULT_DPI, options=None):
+    """
+    Yield a ``PdfPage(number, count, text, source, error)`` for each page of
+    the PDF in ``data`` (bytes or a SpooledFile) as soon as it is available. ``source`` is ``"text"`` for pages
+    read from the text layer and ``"ocr"`` for rasterised pages. Text-layer
+    pages come back in page order; OCR'd pages in completion order.
+    ``options`` are the PreprocessOptions applied to rasterised pages.
+    """
+    pdfium = _require_pdfium()
+    workers = workers or ocr.default_workers()
+    cache = get_cache()
+    digest = uploads.content_digest(data)
+
+    # Workers open the document themselves, so it has to be on disk; a
+    # spooled upload already is
+    if isinstance(data, uploads.SpooledFile):
+        path, temporary = data.path, False
+    else:
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        temporary = True
+    doc = pdfium.PdfDocument(path)
+    count = len(doc)
+    in_flight = {}
+    try:
+        for index in range(count):
+            text = _page_text(doc, index)
+            if len(text.strip()) >= MIN_TEXT_CHARS:
+                yield PdfPage(index + 1, count, text, "text", None)
+                continue
+
+            key = cache_key(digest, f"pdf-page={index};dpi={dpi}".encode(),
+                            config=ocr._cache_config(config, options))
+            text = cache.get(key) if cache is not None else None
+            if text is not None:
+                yield PdfPage(index + 1, count, text, "ocr", None)
+            else:
+                future = get_scheduler().submit(_ocr_pdf_page, path, index, dpi, config, options)
+                in_flight[future] = (index, key)
+                # Keep at most two pages per worker queued
+                if len(in_flight) >= 2 * workers:
+                    yield from _drain(in_flight, count, cache)
+        while in_flight:
+            yield from _drain(in_flight, count, cache)
+    finally:
+        for future in in_flight:
+            future.cancel()
+        doc.close()
+        if temporary:
+            os.remove(path)
+
+
+def _drain(in_flight, count, cache):
+    done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+    for future in done:
+        index, key = in_flight.pop(future)
+        try:
+            text = future.result()
+        except Exception as e:
+            yield PdfPage(index + 1, count, None, "ocr", e)
+            continue
+        if cache is not None:
+            cache.put(key, text)
+        yield PdfPage(index + 1, count, text, "ocr", None)
@@ -0,0 +1,118 @@
+"""
+Cross-asset statistics for the stock module.
+
+Everything takes daily log returns of the date-aligned closes from
+``stocks.aligned_closes`` (one column per ticker) and covers every ticker,
+or every pair of tickers, at once:
+
+* ``return_matrices`` gives the covariance and correlation matrices from a
+  few matrix products over the whole returns matrix. Like
+  ``DataFrame.corr``, each pair uses only the dates both tickers have a
+  return for, but without a loop over pairs;
+* ``rolling_against`` gives rolling correlation and beta of every ticker
+  against a benchmark (a ticker or the equal-weight portfolio) from
+  windowed cumulative sums over the whole frame.
+"""
+import warnings
+from collections import namedtuple
+
+from bfsi import metrics
+from bfsi.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+EQUAL_WEIGHT = "Equal-weight portfolio"
+DEFAULT_ROLLING_WINDOW = 60
+TRADING_DAYS = 252
+
+Rolling = namedtuple("Rolling", ["correlation", "beta"])
+
+
+def log_returns(closes):
+    """Daily log returns of a wide frame of closes (the first date has none)."""
+    return np.log(closes).diff().iloc[1:]
+
+
+@metrics.stage("portfolio.matrices")
+def return_matrices(returns, min_periods=2):
+    """
+    ``(covariance, correlation)`` of the columns of ``returns``, each pair
+    over the dates both have a value; NaN for pairs with fewer than
+    ``min_periods`` such dates.
+    """
+    values = returns.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    present = valid.astype(float)
+    with warnings.catch_warnings():
+        # columns without any return stay NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        centred = np.where(valid, values - np.nanmean(values, axis=0), 0.0)
+    # [i, j] entries are sums over the dates both ticker i and ticker j have
+    n = present.T @ present
+    sx = centred.T @ present
+    sxx = (centred * centred).T @ present
+    sxy = centred.T @ centred
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cross = sxy - sx * sx.T / n
+        spread = sxx - sx * sx / n
+        covariance = cross / (n - 1)
+        correlation = np.clip(cross / np.sqrt(spread * spread.T), -1.0, 1.0)
+    covariance[n < min_periods] = np.nan
+    correlation[n < min_periods] = np.nan
+    labels = returns.columns
+    return (pd.DataFrame(covariance, index=labels, columns=labels),
+            pd.DataFrame(correlation, index=labels, columns=labels))
+
+
+def benchmark_returns(returns, benchmark=EQUAL_WEIGHT):
+    """Returns of a ticker in ``returns``, or of the equal-weight portfolio of all of them."""
+    if benchmark == EQUAL_WEIGHT:
+        return returns.mean(axis=1).rename(EQUAL_WEIGHT)
+    return returns[benchmark]
+
+
+def _window_sums(values, window):
+    """Sums over the trailing ``window`` rows of each column; NaN before the first full window."""
+    cumulative = np.cumsum(np.vstack([np.zeros((1, values.shape[1])), values]), axis=0)
+    sums = np.full(values.shape, np.nan)
+    sums[window - 1:] = cumulative[window:] - cumulative[:-window]
+    return sums
+
+
+@metrics.stage("portfolio.rolling")
+def rolling_against(returns, benchmark, window=DEFAULT_ROLLING_WINDOW, min_periods=None):
+    """
+    Rolling correlation and beta of every column of ``returns`` against the
+    ``benchmark`` returns, over the trailing ``window`` dates where both
+    have a value (at least ``min_periods``, default the whole window).
+    """
+    min_periods = window if min_periods is None else min_periods
+    x = returns.to_numpy(dtype=float)
+    y = np.broadcast_to(benchmark.reindex(returns.index).to_numpy(dtype=float)[:, None], x.shape)
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    x, y = np.where(valid, x, 0.0), np.where(valid, y, 0.0)
+    n, sx, sy = (_window_sums(a, window) for a in (valid.astype(float), x, y))
+    sxy, sxx, syy = (_window_sums(a, window) for a in (x * y, x * x, y * y))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cross = sxy - sx * sy / n
+        spread_x = sxx - sx * sx / n
+        spread_y = syy - sy * sy / n
+        correlation = np.clip(cross / np.sqrt(spread_x * spread_y), -1.0, 1.0)
+        beta = cross / spread_y
+    short = ~(n >= min_periods)
+    correlation[short] = np.nan
+    beta[short] = np.nan
+    return Rolling(pd.DataFrame(correlation, index=returns.index, columns=returns.columns),
+                   pd.DataFrame(beta, index=returns.index, columns=returns.columns))
+
+
+def summary(returns, benchmark):
+    """Annualised return and volatility, and correlation and beta against ``benchmark``, per ticker."""
+    whole = rolling_against(returns, benchmark, window=max(len(returns), 1), min_periods=2)
+    return pd.DataFrame({
+        "Annualised return": returns.mean() * TRADING_DAYS,
+        "Annualised volatility": returns.std() * np.sqrt(TRADING_DAYS),
+        "Correlation": whole.correlation.iloc[-1] if len(returns) else np.nan,
+        "Beta": whole.beta.iloc[-1] if len(returns) else np.nan,
+    })
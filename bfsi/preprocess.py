@@ -0,0 +1,154 @@
+"""
+Image preprocessing in front of tesseract.
+
+Large scans are downscaled to a target DPI, converted to grayscale (or
+binarised), deskewed and cropped to their content before OCR. Each step is
+switched by PreprocessOptions, and preprocess_image() returns a report with
+the pixel reduction so the UI can show the OCR time saved per page.
+"""
+from dataclasses import dataclass, field
+
+# Scans without DPI metadata are assumed to be a page this wide
+ASSUMED_PAGE_WIDTH_IN = 8.5
+# Deskew analysis runs on a copy no larger than this
+DESKEW_ANALYSIS_SIDE = 1000
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    target_dpi: int = 300          # 0 disables downscaling; never upscales
+    mode: str = "grayscale"        # "none", "grayscale" or "binary"
+    deskew: bool = True
+    max_skew: float = 5.0          # degrees searched either side of level
+    crop: bool = True
+    crop_margin: int = 10          # pixels kept around the content box
+
+    def signature(self):
+        """Stable string for OCR cache keys; changes whenever the output would."""
+        return (f"dpi={self.target_dpi};mode={self.mode};deskew={int(self.deskew)}:{self.max_skew};"
+                f"crop={int(self.crop)}:{self.crop_margin}")
+
+
+@dataclass
+class PreprocessReport:
+    original_size: tuple
+    final_size: tuple
+    steps: list = field(default_factory=list)
+    preprocess_seconds: float = 0.0
+    ocr_seconds: float = 0.0
+
+    @property
+    def pixel_ratio(self):
+        final = self.final_size[0] * self.final_size[1]
+        return (self.original_size[0] * self.original_size[1]) / final if final else 1.0
+
+    @property
+    def estimated_saved_seconds(self):
+        """
+        Estimated OCR time saved versus the full-resolution image, assuming
+        tesseract time scales with pixel count, less the preprocessing cost.
+        """
+        return self.ocr_seconds * (self.pixel_ratio - 1) - self.preprocess_seconds
+
+    def summary(self):
+        (w0, h0), (w1, h1) = self.original_size, self.final_size
+        steps = ", ".join(self.steps) or "no changes"
+        return (f"Preprocessed {w0}x{h0} -> {w1}x{h1} ({steps}); OCR {self.ocr_seconds:.2f}s, "
+                f"~{self.estimated_saved_seconds:.2f}s saved (estimated)")
+
+
+def _otsu_threshold(pixels):
+    import numpy as np
+    hist = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    cum_mean = np.cumsum(hist * np.arange(256))
+    mean_bg = cum_mean / np.maximum(weight_bg, 1)
+    mean_fg = (cum_mean[-1] - cum_mean) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+
+def _ink_mask(gray):
+    """Boolean array that is True where the (grayscale) image has ink."""
+    import numpy as np
+    pixels = np.asarray(gray, dtype=np.uint8)
+    return pixels < _otsu_threshold(pixels)
+
+
+def _skew_angle(gray, max_skew):
+    """Projection-profile skew estimate: the angle whose row sums are sharpest."""
+    import numpy as np
+    from PIL import Image
+
+    small = gray.copy()
+    small.thumbnail((DESKEW_ANALYSIS_SIDE, DESKEW_ANALYSIS_SIDE))
+    ink = Image.fromarray((_ink_mask(small) * 255).astype(np.uint8))
+
+    def score(angle):
+        rotated = np.asarray(ink.rotate(angle, resample=Image.NEAREST), dtype=np.float64)
+        return np.var(rotated.sum(axis=1))
+
+    # coarse 1 degree sweep, then refine around the best angle
+    best = max(np.arange(-max_skew, max_skew + 0.5, 1.0), key=score)
+    return float(max(np.arange(best - 0.8, best + 0.9, 0.2), key=score))
+
+
+def preprocess_image(image, options):
+    """Apply the enabled steps to a PIL image; returns ``(image, report)``."""
+    import time
+    from PIL import Image, ImageOps
+
+    start = time.perf_counter()
+    report = PreprocessReport(original_size=image.size, final_size=image.size)
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        # flatten transparency onto white so it does not read as ink
+        rgba = image.convert("RGBA")
+        image = Image.new("RGB", rgba.size, "white")
+        image.paste(rgba, mask=rgba.split()[-1])
+
+    if options.target_dpi:
+        dpi = image.info.get("dpi", (0, 0))[0] or image.width / ASSUMED_PAGE_WIDTH_IN
+        if dpi > options.target_dpi:
+            scale = options.target_dpi / dpi
+            image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                                 Image.LANCZOS)
+            report.steps.append(f"downscale {dpi:.0f}->{options.target_dpi} dpi")
+
+    gray = image.convert("L") if image.mode != "L" else image
+
+    if options.crop:
+        import numpy as np
+        ink = _ink_mask(gray)
+        rows = np.flatnonzero(ink.any(axis=1))
+        cols = np.flatnonzero(ink.any(axis=0))
+        if rows.size and cols.size:
+            m = options.crop_margin
+            box = (max(0, cols[0] - m), max(0, rows[0] - m),
+                   min(gray.width, cols[-1] + 1 + m), min(gray.height, rows[-1] + 1 + m))
+            if box != (0, 0, gray.width, gray.height):
+                gray = gray.crop(box)
+                image = image.crop(box)
+                report.steps.append("crop")
+
+    if options.deskew:
+        angle = _skew_angle(gray, options.max_skew)
+        if abs(angle) >= 0.1:
+            gray = gray.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+            image = image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor="white")
+            report.steps.append(f"deskew {angle:+.1f} deg")
+
+    if options.mode == "binary":
+        import numpy as np
+        image = Image.fromarray(np.where(_ink_mask(gray), 0, 255).astype(np.uint8))
+        report.steps.append("binarise")
+    elif options.mode == "grayscale":
+        image = gray
+        report.steps.append("grayscale")
+
+    report.final_size = image.size
+    report.preprocess_seconds = time.perf_counter() - start
+    return image, report
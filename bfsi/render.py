@@ -0,0 +1,142 @@
+"""
+Point-budgeted drawing for the analysis charts.
+
+Matplotlib time (and the size of what Streamlit ships to the browser)
+grows with the number of artists, so every chart draws at most
+``POINT_BUDGET`` marks whatever the input size:
+
+* lines are downsampled with Largest-Triangle-Three-Buckets, which keeps
+  the visual shape (peaks and troughs) of the series;
+* per-row bar charts become binned bars: the mean of each run of rows,
+  with a thin min-max range line so spikes stay visible;
+* scatters become a hexbin density, or for labelled points (clusters) a
+  grid coloured by the dominant label in each cell.
+
+Each helper draws onto a given Axes and returns a short note describing
+the aggregation, or None when the data was drawn as-is.
+"""
+import os
+import warnings
+
+from bfsi.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+POINT_BUDGET = int(os.environ.get("BFSI_POINT_BUDGET", 2000))
+GRID_SIZE = 80
+# above this many bars each bar is no longer its own patch
+MAX_BARS = 200
+
+
+def _budget(budget):
+    return POINT_BUDGET if budget is None else budget
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype("int64").astype(float)
+    return values.astype(float)
+
+
+def lttb_indices(x, y, n_out):
+    """Indices of the ``n_out`` points Largest-Triangle-Three-Buckets keeps."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.asarray(y, dtype=float)
+    # bucket i covers rows edges[i]:edges[i + 1]; first and last rows are kept
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        following = slice(stop, edges[i + 2] if i + 2 < len(edges) else n)
+        cx, cy = x[following].mean(), y[following].mean()
+        area = np.abs((x[a] - cx) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (cy - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample_series(series, budget=None):
+    """An LTTB-downsampled copy of a Series (for ``st.line_chart`` and friends)."""
+    series = series.dropna()
+    return series.iloc[lttb_indices(series.index, series.values, _budget(budget))]
+
+
+def line(ax, x, y, budget=None, **kwargs):
+    budget = _budget(budget)
+    n = len(x)
+    if n > budget:
+        keep = lttb_indices(x, y, budget)
+        x, y = np.asarray(x)[keep], np.asarray(y)[keep]
+    ax.plot(x, y, **kwargs)
+    return f"{n:,} points drawn as {budget:,} (LTTB)" if n > budget else None
+
+
+def lines(ax, frame, budget=None):
+    """
+    One labelled line per column of a wide frame, or per ``(label, series)``
+    pair, each drawn with ``line`` and NaNs skipped. Returns the notes of
+    the downsampled lines, joined, or None.
+    """
+    notes = []
+    for i, (label, series) in enumerate(frame.items() if hasattr(frame, "columns") else frame):
+        series = series.dropna()
+        note = line(ax, series.index, series.values, budget, label=label, color=f"C{i}")
+        if note:
+            notes.append(f"{label}: {note}")
+    return "; ".join(notes) or None
+
+
+def bars(ax, values, budget=None, **kwargs):
+    """One bar per value, or above the budget one bar per run of consecutive values."""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    budget = _budget(budget)
+    if n <= MAX_BARS:
+        ax.bar(np.arange(n), values, **kwargs)
+        return None
+    color = kwargs.get("color")
+    if n <= budget:
+        # one filled step artist draws far faster than n Rectangle patches
+        ax.stairs(np.nan_to_num(values), np.arange(n + 1) - 0.5, fill=True, color=color)
+        return None
+    size = -(-n // budget)
+    padded = np.full(size * -(-n // size), np.nan)
+    padded[:n] = values
+    runs = padded.reshape(-1, size)
+    starts = np.arange(len(runs)) * size
+    with warnings.catch_warnings():
+        # runs that are all NaN stay NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        means, lows, highs = np.nanmean(runs, axis=1), np.nanmin(runs, axis=1), np.nanmax(runs, axis=1)
+    ax.stairs(np.nan_to_num(means), np.append(starts, n), fill=True, color=color)
+    ax.vlines(starts + size / 2, lows, highs, color="black", linewidth=0.5)
+    return f"{n:,} rows drawn as {len(runs):,} bars of {size:,} rows (mean, line shows min-max)"
+
+
+def scatter(ax, x, y, labels=None, budget=None, cmap="viridis", gridsize=GRID_SIZE, **kwargs):
+    """Scatter, or a hexbin density (dominant-label grid when ``labels`` is given) above the budget."""
+    n = len(x)
+    if n <= _budget(budget):
+        ax.scatter(x, y, c=labels, cmap=cmap if labels is not None else None, **kwargs)
+        return None
+    x, y = _as_float(x), np.asarray(y, dtype=float)
+    if labels is None:
+        ax.hexbin(x, y, gridsize=gridsize, bins="log", mincnt=1, cmap=cmap)
+        return f"{n:,} points drawn as a hexbin density (log counts)"
+    labels = np.asarray(labels)
+    x_edges = np.linspace(x.min(), x.max(), gridsize + 1)
+    y_edges = np.linspace(y.min(), y.max(), gridsize + 1)
+    classes = np.unique(labels)
+    counts = np.stack([np.histogram2d(x[labels == c], y[labels == c], bins=[x_edges, y_edges])[0]
+                       for c in classes])
+    dominant = np.ma.masked_where(counts.sum(axis=0) == 0, classes[counts.argmax(axis=0)])
+    ax.pcolormesh(x_edges, y_edges, dominant.T, cmap=cmap, vmin=classes.min(), vmax=classes.max())
+    return f"{n:,} points drawn as a {gridsize}x{gridsize} grid coloured by the most common cluster"
+
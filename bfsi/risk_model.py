@@ -0,0 +1,192 @@
+"""
+Trained default-risk model for the loan module.
+
+``train`` fits a logistic regression on a labelled applicant file (the
+applicant columns of bfsi.loans plus a 0/1 target column such as
+``defaulted``), and ``RiskModel.save`` writes it as a small JSON artefact.
+The standardisation is folded into one weight per feature, so inference
+needs neither scikit-learn nor a scaler:
+
+* ``RiskModel.probability`` scores one applicant with plain Python floats,
+  in a few microseconds;
+* ``RiskModel.probabilities`` scores a batch as one matrix-vector product.
+
+``get_model`` loads the artefact at ``$BFSI_RISK_MODEL`` (default
+``risk_model.json`` in the bfsi cache directory) once per process, again
+only if the file changes, and returns None when there is none; the loan
+module then keeps the formula. The model's risk score is the default
+probability in percent, so RISK_BANDS and catalogue risk ranges read as
+probability thresholds.
+"""
+import json
+import math
+import os
+import threading
+
+from bfsi import loans, metrics
+from bfsi.lazy import lazy_import
+from bfsi.ocr_cache import cache_dir
+
+np = lazy_import("numpy")
+
+FEATURES = ["academic_score", "credit_score", "marks_12", "ug_marks", "ug_marks_provided",
+            "past_loan_amount", "emi_bounces", "annual_income"]
+FORMAT_VERSION = 1
+# a blank income scores as the training mean
+INCOME = FEATURES.index("annual_income")
+
+
+def default_path():
+    return os.environ.get("BFSI_RISK_MODEL") or os.path.join(cache_dir(), "risk_model.json")
+
+
+def feature_matrix(values):
+    """
+    ``(rows, FEATURES)`` array from applicant columns (see
+    ``loans.applicant_values``). Blank UG marks are recorded as not
+    provided, blank past-loan terms as zero and blank income as NaN.
+    """
+    rows = len(values["academic_score"])
+
+    def column(name, blank):
+        present = values.get(name)
+        return np.full(rows, blank) if present is None else np.asarray(present, dtype=float)
+
+    ug_marks = column("ug_marks", np.nan)
+    return np.column_stack([
+        column("academic_score", np.nan), column("credit_score", np.nan), column("marks_12", np.nan),
+        np.nan_to_num(ug_marks), (~np.isnan(ug_marks)).astype(float),
+        np.nan_to_num(column("past_loan_amount", 0.0)), np.nan_to_num(column("emi_bounces", 0.0)),
+        column("annual_income", np.nan),
+    ])
+
+
+def _sigmoid(z):
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+class RiskModel:
+    """Logistic default model over FEATURES with the scaling folded into the weights."""
+
+    def __init__(self, mean, scale, coef, intercept, scores=None):
+        self.mean = [float(value) for value in mean]
+        self.scale = [float(value) for value in scale]
+        self.coef = [float(value) for value in coef]
+        self.intercept = float(intercept)
+        # kept as ``metrics`` in saved artefacts
+        self.metrics = dict(scores or {})
+        # z = bias + sum(weight * x) on raw feature values
+        self.weights = [c / s for c, s in zip(self.coef, self.scale)]
+        self.bias = self.intercept - sum(w * m for w, m in zip(self.weights, self.mean))
+        self._weights = np.array(self.weights)
+
+    def probability(self, academic_score, credit_score, marks_12, ug_marks=None,
+                    past_loan_amount=0.0, emi_bounces=0, annual_income=None):
+        """Default probability of one applicant (arguments as ``loans.risk_score``)."""
+        w = self.weights
+        z = (self.bias + w[0] * academic_score + w[1] * credit_score + w[2] * marks_12
+             + w[5] * past_loan_amount + w[6] * emi_bounces
+             + w[7] * (self.mean[INCOME] if annual_income is None else annual_income))
+        if ug_marks is not None:
+            z += w[3] * ug_marks + w[4]
+        return _sigmoid(z)
+
+    def probabilities(self, values):
+        """Default probabilities of a batch of applicant columns; NaN where a required score is blank."""
+        X = feature_matrix(values)
+        X[:, INCOME] = np.where(np.isnan(X[:, INCOME]), self.mean[INCOME], X[:, INCOME])
+        z = X @ self._weights + self.bias
+        return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+    def describe(self):
+        auc = self.metrics.get("auc")
+        trained = f"trained on {self.metrics['rows']:,} applicants" if "rows" in self.metrics else "trained"
+        return trained + (f", holdout AUC {auc:.3f}" if auc is not None else "")
+
+    def to_dict(self):
+        return {"version": FORMAT_VERSION, "features": FEATURES, "mean": self.mean, "scale": self.scale,
+                "coef": self.coef, "intercept": self.intercept, "metrics": self.metrics}
+
+    def save(self, path):
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as handle:
+            json.dump(self.to_dict(), handle, indent=2)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+        if data.get("version") != FORMAT_VERSION or data.get("features") != FEATURES:
+            raise ValueError(f"{path} is not a risk model artefact this version can read")
+        return cls(data["mean"], data["scale"], data["coef"], data["intercept"], data.get("metrics"))
+
+
+def target_column(columns, target):
+    """The column of an applicant file named ``target`` (matched like the applicant columns)."""
+    import re
+
+    wanted = re.sub(r"[^a-z0-9]+", "_", target.lower()).strip("_")
+    for column in columns:
+        if re.sub(r"[^a-z0-9]+", "_", str(column).lower()).strip("_") == wanted:
+            return column
+    raise ValueError(f"Applicant file has no {target!r} column")
+
+
+@metrics.stage("risk_model.train")
+def train(df, target="defaulted", holdout=0.2, random_state=0):
+    """
+    Fit a RiskModel on a labelled applicant frame. Rows with a blank
+    required score or target are skipped; ``holdout`` of the rest is kept
+    out of the fit, including the standardisation and the income filled
+    in for blanks, to report the AUC in ``metrics``.
+    """
+    import pandas as pd
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import roc_auc_score
+
+    X = feature_matrix(loans.applicant_values(df))
+    y = pd.to_numeric(df[target_column(df.columns, target)], errors="coerce").to_numpy(dtype=float)
+    keep = ~np.isnan(X[:, :3]).any(axis=1) & ~np.isnan(y)
+    X, y = X[keep], y[keep].astype(int)
+    if len(np.unique(y)) < 2:
+        raise ValueError("Training needs both defaulted and repaid applicants")
+    order = np.random.default_rng(random_state).permutation(len(X))
+    n_test = int(len(X) * holdout)
+    test, fit = order[:n_test], order[n_test:]
+
+    income = X[fit, INCOME]
+    income_mean = np.nanmean(income) if not np.isnan(income).all() else 0.0
+    X[:, INCOME] = np.where(np.isnan(X[:, INCOME]), income_mean, X[:, INCOME])
+    mean, scale = X[fit].mean(axis=0), X[fit].std(axis=0)
+    scale[scale == 0] = 1.0
+
+    estimator = LogisticRegression(max_iter=1000).fit((X[fit] - mean) / scale, y[fit])
+    scores = {"rows": int(len(fit)), "target": target, "default_rate": float(y.mean())}
+    if n_test and len(np.unique(y[test])) == 2:
+        scores["auc"] = float(roc_auc_score(y[test], estimator.predict_proba((X[test] - mean) / scale)[:, 1]))
+    return RiskModel(mean, scale, estimator.coef_[0], estimator.intercept_[0], scores)
+
+
+_models = {}
+_lock = threading.Lock()
+
+
+def get_model(path=None):
+    """The artefact at ``path`` (default ``default_path()``), loaded once per process; None if absent."""
+    path = path or default_path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    with _lock:
+        cached = _models.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, RiskModel.load(path))
+            _models[path] = cached
+    return cached[1]
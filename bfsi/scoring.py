@@ -0,0 +1,162 @@
+"""
+Batch loan-risk scoring over applicant files.
+
+A CSV or Parquet file with one applicant per row (columns as in
+``loans.REQUIRED_APPLICANT_COLUMNS`` and ``OPTIONAL_APPLICANT_COLUMNS``)
+is scored with ``loans.score_applicants`` and matched against the loan
+catalogue (bfsi.catalogue): the risk terms are NumPy column arithmetic
+over a whole chunk and eligibility is checked against every product at
+once, so a file of tens of thousands of applicants takes about a second. Files are read and written in
+chunks of ``DEFAULT_CHUNKSIZE`` rows, so their size is not limited by
+memory. ``ScoringReport`` gives the rows scored and the throughput.
+
+    python -m bfsi score applicants.csv --out scored.parquet
+"""
+import os
+import time
+from collections import namedtuple
+
+from bfsi import catalogue, loans, metrics
+
+DEFAULT_CHUNKSIZE = 500_000
+FORMATS = ("csv", "parquet")
+
+
+class ScoringReport(namedtuple("ScoringReport", ["rows", "seconds", "band_counts", "band_matched"])):
+    """
+    Rows scored, wall time, and applicants (and those eligible for at least
+    one loan) per RISK_BANDS index; the last entries count unscored rows.
+    """
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+    def __str__(self):
+        return f"{self.rows:,} applicant(s) scored in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s)"
+
+
+def file_format(name):
+    fmt = os.path.splitext(str(name))[1].lower().lstrip(".")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported applicant file {name!r}; expected .csv or .parquet")
+    return fmt
+
+
+def iter_applicants(source, fmt, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrame chunks of an applicant file (path or file object)."""
+    import pandas as pd
+
+    if hasattr(source, "seek"):
+        source.seek(0)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+        return
+    with pd.read_csv(source, chunksize=chunksize) as reader:
+        yield from reader
+
+
+def read_applicants(source, fmt):
+    """A whole applicant file as one DataFrame."""
+    import pandas as pd
+    return pd.concat(iter_applicants(source, fmt), ignore_index=True)
+
+
+def band_summary(report):
+    """Applicants and applicants eligible for a loan per risk band of a ScoringReport."""
+    import pandas as pd
+
+    labels, lower = [], None
+    for upper, _ in loans.RISK_BANDS:
+        labels.append(f"below {upper:g}" if lower is None else
+                      f"{lower:g} and above" if upper == float("inf") else f"{lower:g} to {upper:g}")
+        lower = upper
+    return pd.DataFrame({
+        "Risk band": labels + ["unscored (blank values)"],
+        "Applicants": report.band_counts,
+        "Eligible for a loan": report.band_matched,
+    })
+
+
+@metrics.stage("loans.score")
+def score(df, products=None, model=None):
+    """
+    Copy of an applicant frame with ``risk_score``, ``risk_band``,
+    ``eligible_loans`` (number of catalogue products) and
+    ``recommended_loans`` (the lowest-rate eligible ones) columns. With a
+    ``model`` (bfsi.risk_model) the risk score is its default probability
+    in percent, also given as ``default_probability``.
+    """
+    import numpy as np
+
+    if products is None:
+        products = catalogue.get_catalogue()
+    values = loans.applicant_values(df)
+    if model is None:
+        scored = loans.score_applicants(df, values)
+    else:
+        probability = model.probabilities(values)
+        scored = df.assign(default_probability=probability, risk_score=100 * probability,
+                           risk_band=loans.risk_bands(100 * probability))
+    income = values.get("annual_income", np.full(len(df), np.nan))
+    counts, names = products.match(values["academic_score"], values["credit_score"], income,
+                                   scored["risk_score"].to_numpy())
+    return scored.assign(eligible_loans=counts, recommended_loans=names)
+
+
+def _tally(scored):
+    """Applicants and applicants with an eligible loan per risk band."""
+    import numpy as np
+    size = len(loans.RISK_BANDS) + 1
+    bands = scored["risk_band"].to_numpy()
+    return (np.bincount(bands, minlength=size),
+            np.bincount(bands, weights=scored["eligible_loans"].to_numpy() > 0, minlength=size).astype(np.int64))
+
+
+def score_frame(df, products=None, model=None):
+    """Score an in-memory applicant frame; returns the scored frame and a ScoringReport."""
+    start = time.perf_counter()
+    scored = score(df, products, model)
+    counts, matched = _tally(scored)
+    return scored, ScoringReport(len(scored), time.perf_counter() - start, counts.tolist(), matched.tolist())
+
+
+def _write(scored, out, fmt, writer):
+    """Append a scored chunk to ``out``; returns the writer to pass with the next chunk."""
+    if fmt == "csv":
+        scored.to_csv(out, mode="a" if writer else "w", header=writer is None, index=False)
+        return True
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    table = pa.Table.from_pandas(scored, preserve_index=False)
+    if writer is None:
+        writer = pq.ParquetWriter(out, table.schema)
+    # later chunks may infer narrower types for all-blank columns
+    writer.write_table(table.cast(writer.schema))
+    return writer
+
+
+def score_file(source, out, chunksize=DEFAULT_CHUNKSIZE, products=None, model=None):
+    """
+    Score the applicant file ``source`` into the file ``out``, chunk by
+    chunk, in the formats given by their extensions. Returns a
+    ScoringReport whose time includes reading and writing.
+    """
+    fmt, out_fmt = file_format(source), file_format(out)
+    start = time.perf_counter()
+    rows, counts, matched, writer = 0, 0, 0, None
+    try:
+        for chunk in iter_applicants(source, fmt, chunksize):
+            scored = score(chunk, products, model)
+            rows += len(scored)
+            chunk_counts, chunk_matched = _tally(scored)
+            counts, matched = counts + chunk_counts, matched + chunk_matched
+            writer = _write(scored, out, out_fmt, writer)
+    finally:
+        if hasattr(writer, "close"):
+            writer.close()
+    empty = [0] * (len(loans.RISK_BANDS) + 1)
+    return ScoringReport(rows, time.perf_counter() - start,
+                         counts.tolist() if rows else empty, matched.tolist() if rows else empty)
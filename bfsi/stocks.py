@@ -0,0 +1,98 @@
+"""Stock price preparation for the stock analysis module."""
+
+REQUIRED_COLUMNS = ["Date", "Close"]
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# How ``aligned_closes`` fills dates a ticker has no close for
+FILL_RULES = {
+    "previous close": "carry the last close forward inside each ticker's history",
+    "interpolate": "interpolate linearly in time inside each ticker's history",
+    "none": "leave gaps empty (statistics use the dates both tickers have)",
+    "common dates": "keep only dates every ticker has a close for",
+}
+
+# Tried in order; the first format that parses every date wins, so
+# DD-MM-YYYY exports (like data/*.csv) are never read month-first
+DATE_FORMATS = ["%d-%m-%Y", "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d.%m.%Y",
+                "%Y/%m/%d", "%d-%b-%Y", "%d %b %Y", "%b %d, %Y", "%Y-%m-%d %H:%M:%S"]
+
+
+def has_price_columns(df):
+    return all(column in df.columns for column in REQUIRED_COLUMNS)
+
+
+def parse_dates(values):
+    """
+    Parse a date column with one explicit format for the whole column: the
+    first of DATE_FORMATS that parses every value, else the one that parses
+    the most. Unparseable values become NaT.
+    """
+    import pandas as pd
+
+    values = values.astype(str).str.strip()
+    present = values.ne("") & values.ne("nan")
+    best, best_count = None, -1
+    for fmt in DATE_FORMATS:
+        parsed = pd.to_datetime(values, format=fmt, errors="coerce")
+        count = int(parsed[present].notna().sum())
+        if count == int(present.sum()):
+            return parsed
+        if count > best_count:
+            best, best_count = parsed, count
+    return best
+
+
+def ohlcv(df):
+    """
+    Typed OHLCV frame: ``Date`` plus the five price/volume columns as floats
+    (NaN where the file has none), oldest first, one row per date.
+    """
+    import numpy as np
+    import pandas as pd
+
+    frame = pd.DataFrame({"Date": parse_dates(df["Date"])})
+    for column in OHLCV_COLUMNS:
+        frame[column] = (pd.to_numeric(df[column], errors="coerce") if column in df.columns
+                         else np.nan)
+    frame = frame.dropna(subset=["Date"])
+    # exports are usually newest first; reversing is cheaper than a sort
+    if frame["Date"].is_monotonic_decreasing:
+        frame = frame.iloc[::-1]
+    elif not frame["Date"].is_monotonic_increasing:
+        frame = frame.sort_values("Date", kind="stable")
+    return frame.drop_duplicates("Date", keep="last").reset_index(drop=True)
+
+
+def close_series(df):
+    """Closing prices indexed by date, sorted oldest first."""
+    return ohlcv(df).set_index("Date")["Close"]
+
+
+def ticker_for_name(name):
+    """Ticker used in the stock store for an uploaded file name, e.g. ``apple stock.csv`` -> ``APPLE_STOCK``."""
+    import os
+    import re
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return re.sub(r"[^A-Z0-9]+", "_", stem.upper()).strip("_") or "UNKNOWN"
+
+
+def aligned_closes(series, fill="previous close"):
+    """
+    One date-aligned frame of closing prices, one column per ticker, from a
+    wide frame or ``(name, Series)`` pairs, with gaps filled by one of
+    FILL_RULES. Dates before a ticker's first or after its last close stay
+    NaN unless ``fill`` drops them.
+    """
+    import pandas as pd
+
+    if fill not in FILL_RULES:
+        raise ValueError(f"Unknown fill rule {fill!r}; expected one of {', '.join(FILL_RULES)}")
+    wide = series if isinstance(series, pd.DataFrame) else pd.concat(dict(series), axis=1)
+    wide = wide.sort_index()
+    if fill == "previous close":
+        return wide.ffill(limit_area="inside")
+    if fill == "interpolate":
+        return wide.interpolate(method="time", limit_area="inside")
+    if fill == "common dates":
+        return wide.dropna()
+    return wide
@@ -0,0 +1,191 @@
+"""
+Local columnar store for daily stock data.
+
+OHLCV rows are ingested once, with an explicit date format, into Parquet
+files partitioned by ticker::
+
+    <root>/ticker=APPLE_STOCK/part-20240918-20250124-<id>.parquet
+
+Ingesting the same or a newer export again only appends the days after
+the last stored date, as a new part file. Queries go through a pyarrow
+dataset, so they read only the tickers, date range and columns asked for.
+Closing prices are also kept in memory per ticker and re-read only when
+the ticker's part files change (``version``), so adding one file to an
+upload reads just that ticker. ``compact`` merges a ticker's parts when many small appends pile up.
+
+The root defaults to ``$BFSI_STOCK_DIR`` or ``stocks/`` under the bfsi
+cache directory. Requires pyarrow.
+"""
+import os
+import threading
+import uuid
+
+from bfsi import metrics, stocks
+from bfsi.ocr_cache import cache_dir
+
+PARTITION = "ticker"
+
+
+def default_root():
+    return os.environ.get("BFSI_STOCK_DIR") or os.path.join(cache_dir(), "stocks")
+
+
+def available():
+    try:
+        import pyarrow.dataset  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class StockStore:
+    """Parquet dataset of OHLCV rows partitioned by ticker."""
+
+    def __init__(self, root=None):
+        self.root = root or default_root()
+        # appends for one ticker must not interleave within this process
+        self._lock = threading.Lock()
+        # ticker -> (version, closes)
+        self._closes = {}
+        self._closes_lock = threading.Lock()
+
+    def _ticker_dir(self, ticker):
+        return os.path.join(self.root, f"{PARTITION}={ticker}")
+
+    def _dataset(self, path=None):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        partitioning = ds.partitioning(pa.schema([(PARTITION, pa.string())]), flavor="hive")
+        return ds.dataset(path or self.root, format="parquet",
+                          partitioning=None if path else partitioning)
+
+    def tickers(self):
+        if not os.path.isdir(self.root):
+            return []
+        prefix = f"{PARTITION}="
+        return sorted(name[len(prefix):] for name in os.listdir(self.root)
+                      if name.startswith(prefix) and os.listdir(os.path.join(self.root, name)))
+
+    def version(self, ticker):
+        """The ticker's part file names; they change whenever it is appended to or compacted."""
+        try:
+            names = os.listdir(self._ticker_dir(ticker))
+        except FileNotFoundError:
+            return ()
+        return tuple(sorted(name for name in names if name.endswith(".parquet")))
+
+    def last_date(self, ticker):
+        """Latest stored date for ``ticker``, or None."""
+        import pandas as pd
+        import pyarrow.compute as pc
+        if ticker not in self.tickers():
+            return None
+        value = pc.max(self._dataset(self._ticker_dir(ticker)).to_table(columns=["Date"])["Date"]).as_py()
+        return None if value is None else pd.Timestamp(value)
+
+    @metrics.stage("stocks.ingest")
+    def ingest(self, ticker, df):
+        """
+        Append the rows of an OHLCV export newer than what is stored for
+        ``ticker``. Returns the number of new days written.
+        """
+        frame = stocks.ohlcv(df)
+        with self._lock:
+            last = self.last_date(ticker)
+            if last is not None:
+                frame = frame[frame["Date"] > last]
+            if frame.empty:
+                return 0
+            self._write_part(ticker, frame)
+        return len(frame)
+
+    def _write_part(self, ticker, frame):
+        folder = self._ticker_dir(ticker)
+        os.makedirs(folder, exist_ok=True)
+        name = f"part-{frame['Date'].iloc[0]:%Y%m%d}-{frame['Date'].iloc[-1]:%Y%m%d}-{uuid.uuid4().hex[:8]}.parquet"
+        # written under a dot-name, which dataset discovery ignores, then renamed
+        tmp = os.path.join(folder, f".{name}.tmp")
+        frame.to_parquet(tmp, index=False)
+        os.replace(tmp, os.path.join(folder, name))
+
+    def compact(self, ticker):
+        """Rewrite a ticker's part files as one file."""
+        with self._lock:
+            folder = self._ticker_dir(ticker)
+            parts = [name for name in os.listdir(folder) if name.endswith(".parquet")]
+            if len(parts) < 2:
+                return
+            frame = self._dataset(folder).to_table().to_pandas()
+            frame = frame.sort_values("Date", kind="stable").drop_duplicates("Date", keep="last")
+            self._write_part(ticker, frame.reset_index(drop=True))
+            for name in parts:
+                os.remove(os.path.join(folder, name))
+
+    def load(self, tickers=None, start=None, end=None, columns=("Close",)):
+        """
+        Rows for ``tickers`` (all when None) with ``start <= Date <= end``,
+        reading only ``Date``, ``ticker`` and ``columns`` (None for all of
+        OHLCV). Sorted by ticker
+        then date.
+        """
+        import pandas as pd
+        import pyarrow.dataset as ds
+
+        stored = self.tickers()
+        tickers = stored if tickers is None else [t for t in tickers if t in stored]
+        columns = list(stocks.OHLCV_COLUMNS if columns is None else columns)
+        if not tickers:
+            return pd.DataFrame(columns=[PARTITION, "Date"] + columns)
+        condition = ds.field(PARTITION).isin(tickers)
+        if start is not None:
+            condition &= ds.field("Date") >= pd.Timestamp(start)
+        if end is not None:
+            condition &= ds.field("Date") <= pd.Timestamp(end)
+        table = self._dataset().to_table(columns=[PARTITION, "Date"] + columns, filter=condition)
+        frame = table.to_pandas()
+        frame = frame.sort_values([PARTITION, "Date"], kind="stable")
+        # a concurrent append from another process could repeat a day
+        return frame.drop_duplicates([PARTITION, "Date"], keep="last").reset_index(drop=True)
+
+    def date_range(self, tickers=None):
+        """``(first, last)`` stored date across ``tickers``, or ``(None, None)``."""
+        frame = self.load(tickers, columns=[])
+        if frame.empty:
+            return None, None
+        return frame["Date"].min(), frame["Date"].max()
+
+    def close_series(self, ticker):
+        """A ticker's stored closes indexed by date, read once per ``version``."""
+        version = self.version(ticker)
+        with self._closes_lock:
+            cached = self._closes.get(ticker)
+        if cached is None or cached[0] != version:
+            with metrics.stage("stocks.read"):
+                frame = self.load([ticker], columns=["Close"])
+            cached = (version, frame.set_index("Date")["Close"].rename(ticker))
+            with self._closes_lock:
+                self._closes[ticker] = cached
+        return cached[1]
+
+    def close_prices(self, tickers=None, start=None, end=None):
+        """Wide frame of closing prices, one column per ticker, indexed by date."""
+        import pandas as pd
+
+        stored = self.tickers()
+        tickers = stored if tickers is None else sorted(t for t in tickers if t in stored)
+        if not tickers:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name="Date"), columns=pd.Index([], name=PARTITION))
+        wide = pd.concat([self.close_series(ticker) for ticker in tickers], axis=1).sort_index()
+        wide.index.name, wide.columns.name = "Date", PARTITION
+        return wide.loc[start:end]
+
+
+_store = None
+
+
+def get_store():
+    """Process-wide store at the default root."""
+    global _store
+    if _store is None:
+        _store = StockStore()
+    return _store
@@ -0,0 +1,444 @@
+"""
+Chunked CSV mode for files larger than memory.
+
+A CSV is read in chunks and the statistics the analysis modules show are
+computed incrementally: count/mean/std/min/max are merged per chunk,
+quartiles come from a fixed-size reservoir sample (exact while the column
+fits in the reservoir), and value counts are kept until a column turns out
+to have too many distinct values for a pie chart. Histograms and range
+counts need the final min/max, so they take a second chunked pass, which
+is memoised. Only the first chunk is ever kept as a preview.
+
+Multi-file uploads are summarised from per-file ``Partial`` results: each
+file's running stats are merged into an ``Aggregate``, and its histogram
+and range counts are memoised per set of bin edges, so adding a file whose
+values stay inside the current range only counts the new file.
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from bfsi import metrics, uploads
+from bfsi.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+DEFAULT_CHUNKSIZE = 200_000
+RESERVOIR_SIZE = 20_000
+MAX_UNIQUE = 10
+# Uploads larger than this default to streaming mode in the UI
+STREAMING_THRESHOLD_BYTES = int(float(os.environ.get("BFSI_STREAMING_MB", 200)) * 1024 * 1024)
+
+SESSION_KEY = "_bfsi_scans"
+# enough for the streamed CSVs of one multi-file upload
+SESSION_ENTRIES = 16
+AGGREGATE_SESSION_KEY = "_bfsi_aggregates"
+
+
+def _reservoir_update(sample, values, seen, size, rng):
+    """
+    Algorithm R, vectorised over a chunk: fold ``values`` (rows along axis 0)
+    into ``sample`` after ``seen`` earlier rows. Returns the new sample.
+    """
+    room = size - len(sample)
+    if room > 0:
+        sample = np.concatenate([sample, values[:room]])
+        values = values[room:]
+        seen += room
+    if len(values) == 0:
+        return sample
+    positions = seen + np.arange(len(values))
+    accept = rng.random(len(values)) < size / (positions + 1)
+    slots = rng.integers(0, size, size=int(accept.sum()))
+    sample[slots] = values[accept]
+    return sample
+
+
+class ColumnStats:
+    """Mergeable running statistics for one numeric column."""
+
+    def __init__(self, reservoir_size=RESERVOIR_SIZE, max_unique=MAX_UNIQUE, seed=0):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.reservoir_size = reservoir_size
+        self.max_unique = max_unique
+        self._sample = np.empty(0)
+        self._counts = {}
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        n = values.size
+        if n == 0:
+            return
+        # Chan et al. parallel update of mean and sum of squared deviations
+        chunk_mean = values.mean()
+        chunk_m2 = ((values - chunk_mean) ** 2).sum()
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta ** 2 * self.count * n / total
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._update_sample(values)
+        if self._counts is not None:
+            uniques, counts = np.unique(values, return_counts=True)
+            for value, c in zip(uniques.tolist(), counts.tolist()):
+                self._counts[value] = self._counts.get(value, 0) + c
+            if len(self._counts) > self.max_unique:
+                self._counts = None
+        self.count = total
+
+    def _update_sample(self, values):
+        self._sample = _reservoir_update(self._sample, values, self.count, self.reservoir_size, self._rng)
+
+    def merge(self, other):
+        """A new ColumnStats covering both inputs, e.g. the same column across files."""
+        merged = ColumnStats(self.reservoir_size, self.max_unique)
+        total = self.count + other.count
+        if total == 0:
+            return merged
+        delta = other.mean - self.mean
+        merged.count = total
+        merged.mean = self.mean + delta * other.count / total
+        merged.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / total
+        merged.min = min(self.min, other.min)
+        merged.max = max(self.max, other.max)
+        if self._counts is not None and other._counts is not None:
+            counts = dict(self._counts)
+            for value, c in other._counts.items():
+                counts[value] = counts.get(value, 0) + c
+            merged._counts = counts if len(counts) <= self.max_unique else None
+        else:
+            merged._counts = None
+        # draw from both reservoirs in proportion to the rows each stands
+        # for; weighted sampling without replacement would over-represent
+        # the smaller side
+        size = min(self.reservoir_size, self._sample.size + other._sample.size)
+        take = max(min(self._sample.size, round(size * self.count / total)), size - other._sample.size)
+        merged._sample = np.concatenate([merged._rng.choice(self._sample, size=take, replace=False),
+                                         merged._rng.choice(other._sample, size=size - take, replace=False)])
+        return merged
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float("nan")
+
+    @property
+    def exact_quantiles(self):
+        return self.count <= self.reservoir_size
+
+    def sample(self):
+        return self._sample
+
+    def value_counts(self):
+        """Counts per distinct value, or None once there are more than ``max_unique``."""
+        if self._counts is None:
+            return None
+        return pd.Series(self._counts, dtype="int64").sort_values(ascending=False)
+
+    def describe(self, name=None):
+        """Same shape as ``Series.describe()``; quartiles are approximate past the reservoir size."""
+        if self.count == 0:
+            values = [0.0] + [float("nan")] * 7
+        else:
+            q = np.percentile(self._sample, [25, 50, 75]).tolist()
+            values = [float(self.count), self.mean, self.std, self.min, *q, self.max]
+        return pd.Series(values, index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"], name=name)
+
+
+def iter_chunks(source, chunksize=DEFAULT_CHUNKSIZE, **read_kwargs):
+    """Yield DataFrame chunks from a path, a SpooledFile, bytes or a seekable file object."""
+    if isinstance(source, uploads.SpooledFile):
+        # a CsvScan keeps the SpooledFile as its source, so the file stays
+        # on disk for every pass
+        source = source.path
+        read_kwargs.setdefault("memory_map", True)
+    elif isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    with pd.read_csv(source, chunksize=chunksize, **read_kwargs) as reader:
+        yield from reader
+
+
+class CsvScan:
+    """Result of one streaming pass over a CSV, with memoised second passes."""
+
+    def __init__(self, source, chunksize, read_kwargs):
+        self.source = source
+        self.chunksize = chunksize
+        self.read_kwargs = read_kwargs
+        self.preview = None
+        self.columns = []
+        self.numeric_columns = []
+        self.text_columns = []
+        self.rows = 0
+        self.stats = {}
+        self._rows_sample = None
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def _scan(self):
+        rng = np.random.default_rng(0)
+        for chunk in iter_chunks(self.source, self.chunksize, **self.read_kwargs):
+            if self.preview is None:
+                self.preview = chunk.head()
+                self.columns = chunk.columns.tolist()
+                # dtypes come from the first chunk; later chunks are coerced
+                self.numeric_columns = chunk.select_dtypes(include=np.number).columns.tolist()
+                self.text_columns = chunk.select_dtypes(include=["object", "string"]).columns.tolist()
+                self.stats = {column: ColumnStats() for column in self.numeric_columns}
+                self._rows_sample = np.empty((0, len(self.numeric_columns)))
+            numeric = self._numeric(chunk).to_numpy(dtype=float)
+            for position, stats in enumerate(self.stats.values()):
+                stats.update(numeric[:, position])
+            self._rows_sample = _reservoir_update(self._rows_sample, numeric, self.rows, RESERVOIR_SIZE, rng)
+            self.rows += len(chunk)
+        if self.preview is None:
+            self.preview = pd.DataFrame()
+        return self
+
+    def _numeric(self, chunk, columns=None):
+        columns = self.numeric_columns if columns is None else columns
+        return chunk[columns].apply(pd.to_numeric, errors="coerce")
+
+    def memo(self, key, compute):
+        """Return ``compute()`` cached under ``key`` for the life of this scan."""
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+        value = compute()
+        with self._lock:
+            return self._memo.setdefault(key, value)
+
+    def sample_rows(self):
+        """A uniform sample of whole rows over the numeric columns, as a DataFrame."""
+        return pd.DataFrame(self._rows_sample, columns=self.numeric_columns)
+
+    def iter_frames(self, columns):
+        """Second pass: ``columns`` as numeric frames, chunk by chunk."""
+        for chunk in iter_chunks(self.source, self.chunksize, usecols=columns, **self.read_kwargs):
+            yield self._numeric(chunk, columns)
+
+    def iter_chunks(self, columns):
+        """Second pass: ``columns`` as read, chunk by chunk."""
+        yield from iter_chunks(self.source, self.chunksize, usecols=columns, **self.read_kwargs)
+
+    def iter_column(self, column):
+        """Second pass: the column's values chunk by chunk, NaNs dropped."""
+        for frame in self.iter_frames([column]):
+            values = frame[column].to_numpy(dtype=float)
+            yield values[~np.isnan(values)]
+
+    def describe(self):
+        return pd.DataFrame({column: stats.describe() for column, stats in self.stats.items()})
+
+    def histogram(self, column, bins=10):
+        """``(counts, edges)`` like ``np.histogram`` over the whole column."""
+        return self.memo(("histogram", column, bins),
+                         lambda: streamed_histogram(self.iter_column(column), self.stats[column], bins))
+
+    def pie_data(self, column, n_bins=5):
+        """Labels and sizes matching ``analysis.pie_data`` on the full column."""
+        def compute():
+            counts = self.stats[column].value_counts()
+            if counts is not None:
+                # counts are kept as floats; label them in the column's own dtype
+                return counts.index.astype(self.preview[column].dtype).astype(str), counts.values
+            return streamed_binned_counts(self.iter_column(column), self.stats[column], n_bins)
+        return self.memo(("pie", column, n_bins), compute)
+
+
+class Partial:
+    """
+    One file's values for an Aggregate: an in-memory array (OCR results) or
+    a streamed CSV column, with its running stats and with histogram and
+    range counts memoised per set of bin edges.
+    """
+
+    def __init__(self, values=None, scan=None, column=None):
+        if scan is not None:
+            self._source = (scan, column)
+            self.stats = scan.stats[column]
+        else:
+            values = np.asarray(values if values is not None else [], dtype=float)
+            self._source = values[~np.isnan(values)]
+            self.stats = ColumnStats()
+            self.stats.update(self._source)
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.stats.count
+
+    def _chunks(self):
+        if isinstance(self._source, tuple):
+            scan, column = self._source
+            yield from scan.iter_column(column)
+        else:
+            yield self._source
+
+    def _memo(self, key, compute):
+        with self._lock:
+            if key in self._counts:
+                return self._counts[key]
+        value = compute()
+        with self._lock:
+            return self._counts.setdefault(key, value)
+
+    def histogram(self, edges):
+        """Counts per bin of ``edges``, like ``np.histogram``."""
+        def compute():
+            counts = np.zeros(len(edges) - 1, dtype=np.int64)
+            for values in self._chunks():
+                counts += np.histogram(values, bins=edges)[0]
+            return counts
+        return self._memo(("histogram", edges.tobytes()), compute)
+
+    def range_counts(self, edges):
+        """Counts per right-closed range of ``edges``, like ``pd.cut``."""
+        def compute():
+            counts = np.zeros(len(edges) - 1, dtype=np.int64)
+            for values in self._chunks():
+                counts += pd.cut(values, bins=edges).value_counts().sort_index().to_numpy(dtype=np.int64)
+            return counts
+        return self._memo(("ranges", edges.tobytes()), compute)
+
+
+class Aggregate:
+    """
+    Values pooled from per-file Partials (OCR results and CSV columns) for
+    the supervised module's aggregate charts. Stats are merged as parts are
+    added; histograms and range counts are sums of the parts' memoised
+    counts, and streamed columns are re-read only for edges they have not
+    been counted with.
+    """
+
+    def __init__(self):
+        self.stats = ColumnStats()
+        self.parts = []
+
+    def __len__(self):
+        return self.stats.count
+
+    def add(self, part):
+        if len(part):
+            self.stats = self.stats.merge(part.stats)
+            self.parts.append(part)
+        return self
+
+    def describe(self):
+        return self.stats.describe()
+
+    def sample(self):
+        """All values while they fit in the reservoir, else a uniform sample (for box plots)."""
+        return self.stats.sample()
+
+    def histogram(self, bins=10):
+        edges = _edges(self.stats, bins)
+        return sum((part.histogram(edges) for part in self.parts), np.zeros(bins, dtype=np.int64)), edges
+
+    def binned_counts(self, n_bins=5):
+        from bfsi.analysis import range_labels
+        if not self.parts:
+            return [], np.array([], dtype=np.int64)
+        edges = _edges(self.stats, n_bins)
+        counts = sum(part.range_counts(edges) for part in self.parts)
+        # labelled with pd.cut's own (rounded) intervals
+        return range_labels(pd.cut(np.empty(0), bins=edges).categories), counts
+
+
+def column_partial(scan, column):
+    """The Partial of a streamed CSV column, made once per scan."""
+    return scan.memo(("partial", column), lambda: Partial(scan=scan, column=column))
+
+
+def aggregate(parts, session=None, key="values"):
+    """
+    Aggregate of ``parts`` in order. With a session, the aggregate of the
+    previous rerun under ``key`` is extended when its parts are a prefix of
+    ``parts`` (files added at the end of an upload), so only the new parts
+    are merged.
+    """
+    parts = [part for part in parts if len(part)]
+    previous = session.setdefault(AGGREGATE_SESSION_KEY, {}).get(key) if session is not None else None
+    if previous is not None and previous.parts == parts[:len(previous.parts)]:
+        if len(previous.parts) == len(parts):
+            return previous
+        result = Aggregate()
+        result.stats, result.parts = previous.stats, list(previous.parts)
+        parts = parts[len(previous.parts):]
+    else:
+        result = Aggregate()
+    for part in parts:
+        result.add(part)
+    if session is not None:
+        session[AGGREGATE_SESSION_KEY][key] = result
+    return result
+
+
+def _edges(stats, bins):
+    if stats.count == 0:
+        return np.linspace(0.0, 1.0, bins + 1)
+    low, high = stats.min, stats.max
+    if low == high:
+        # same fallback as np.histogram for a constant column
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, bins + 1)
+
+
+def streamed_histogram(chunks, stats, bins=10):
+    """``np.histogram`` over chunks, with edges from the first pass's min/max."""
+    edges = _edges(stats, bins)
+    counts = np.zeros(bins, dtype=np.int64)
+    for values in chunks:
+        counts += np.histogram(values, bins=edges)[0]
+    return counts, edges
+
+
+def streamed_binned_counts(chunks, stats, n_bins=5):
+    """Range counts with ``pd.cut`` semantics (right-closed bins), one chunk at a time."""
+    from bfsi.analysis import range_labels
+    edges = _edges(stats, n_bins)
+    total = None
+    for values in chunks:
+        counts = pd.cut(values, bins=edges).value_counts().sort_index()
+        total = counts if total is None else total + counts
+    if total is None:
+        return [], np.array([], dtype=np.int64)
+    return range_labels(total.index), total.values
+
+
+@metrics.stage("csv.scan")
+def scan_csv(source, chunksize=DEFAULT_CHUNKSIZE, **read_kwargs):
+    """One chunked pass over a CSV; see CsvScan."""
+    return CsvScan(source, chunksize, read_kwargs)._scan()
+
+
+def scan_upload(file, session=None, chunksize=DEFAULT_CHUNKSIZE):
+    """CsvScan for a Streamlit upload or a SpooledFile, remembered per session by upload id."""
+    key = (getattr(file, "file_id", None) or file.name, chunksize)
+    if session is not None:
+        recent = session.setdefault(SESSION_KEY, OrderedDict())
+        scan = recent.get(key)
+        if scan is not None:
+            recent.move_to_end(key)
+            return scan
+    scan = scan_csv(file, chunksize)
+    if session is not None:
+        recent[key] = scan
+        while len(recent) > SESSION_ENTRIES:
+            recent.popitem(last=False)
+    return scan
+
+
+def is_large_upload(file):
+    size = getattr(file, "size", None)
+    return size is not None and size > STREAMING_THRESHOLD_BYTES
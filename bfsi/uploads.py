@@ -0,0 +1,206 @@
+"""
+Upload ingestion: spool each upload to disk while hashing it.
+
+Readers used to take ``getvalue()`` copies of every Streamlit upload, and
+OCR jobs kept those copies (and pickled them again to the worker pool) for
+as long as a multi-file upload took to process. ``session_files`` instead
+streams each upload once, in CHUNK_BYTES pieces, into a spool directory
+under ``$BFSI_SPOOL_DIR`` (default the system temp directory), computing
+its SHA-256 on the way, and hands out a SpooledFile in its place. The
+readers then work from the file:
+
+* CSVs are parsed by pandas from the path with ``memory_map=True``;
+* OCR workers open images and PDFs by path, so only the path crosses the
+  process boundary and PDFs are no longer copied to a temp file;
+* cache keys come from the hash taken while spooling, so the content is
+  never read again just to hash it.
+
+Spooled files are named by their hash, so the same content uploaded in
+several sessions is stored once, and each is deleted as soon as no
+SpooledFile of it is left: a session drops the ones removed from its
+uploader on the next rerun and the rest when its state goes, a background
+job or a streaming scan holds the ones it still reads, and ``close``
+releases one at once. Whatever is left at exit goes with the spool
+directory.
+"""
+import atexit
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+
+from bfsi import metrics
+
+CHUNK_BYTES = 1024 * 1024
+SESSION_KEY = "_bfsi_uploads"
+
+
+class SpooledFile:
+    """
+    An upload spooled to disk. ``name``, ``size`` and ``file_id`` mirror the
+    Streamlit upload, so a SpooledFile can stand in for it; ``sha256`` is the
+    hex digest of the content.
+    """
+
+    def __init__(self, spool, path, name, size, hasher, file_id=None):
+        self.path = path
+        self.name = name
+        self.size = size
+        self.file_id = file_id
+        self.sha256 = hasher.hexdigest()
+        self._hasher = hasher
+        self._finalizer = weakref.finalize(self, spool._release, path)
+
+    @property
+    def digest(self):
+        return bytes.fromhex(self.sha256)
+
+    def hasher(self):
+        """A copy of the SHA-256 state after the content, to extend into derived keys."""
+        return self._hasher.copy()
+
+    def open(self):
+        return open(self.path, "rb")
+
+    def close(self):
+        """Give up this reference now; the file goes once no other refers to it."""
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"SpooledFile({self.name!r}, {self.size} bytes, {self.sha256[:12]})"
+
+
+class Spool:
+    """Directory of spooled uploads, one file per content, reference counted."""
+
+    def __init__(self, folder=None):
+        parent = folder or os.environ.get("BFSI_SPOOL_DIR") or None
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        # one directory per process, so a restart never sees another's files
+        self.folder = tempfile.mkdtemp(prefix="bfsi-uploads-", dir=parent)
+        self._files = {}
+        self._lock = threading.Lock()
+
+    @metrics.stage("upload.spool")
+    def add(self, file, name=None, file_id=None):
+        """Copy a file object or bytes into the spool and return its SpooledFile."""
+        if isinstance(file, (bytes, bytearray, memoryview)):
+            file = io.BytesIO(file)
+        elif hasattr(file, "seek"):
+            file.seek(0)
+        name = name or getattr(file, "name", "upload")
+        hasher = hashlib.sha256()
+        size = 0
+        fd, part = tempfile.mkstemp(suffix=".part", dir=self.folder)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                for chunk in iter(lambda: file.read(CHUNK_BYTES), b""):
+                    hasher.update(chunk)
+                    handle.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(part)
+            raise
+        path = os.path.join(self.folder, hasher.hexdigest() + os.path.splitext(name)[1].lower())
+        with self._lock:
+            if path in self._files:
+                os.remove(part)
+                self._files[path][0] += 1
+            else:
+                os.replace(part, path)
+                self._files[path] = [1, size]
+            self._publish()
+        return SpooledFile(self, path, name, size, hasher, file_id)
+
+    def _release(self, path):
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is None:
+                return
+            entry[0] -= 1
+            if entry[0] == 0:
+                del self._files[path]
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._publish()
+
+    def _publish(self):
+        metrics.set_gauge("upload_spool_files", len(self._files), "Uploads spooled to disk.")
+        metrics.set_gauge("upload_spool_bytes", sum(size for _, size in self._files.values()),
+                          "Bytes of uploads spooled to disk.")
+
+    def stats(self):
+        with self._lock:
+            return {"folder": self.folder, "files": len(self._files),
+                    "bytes": sum(size for _, size in self._files.values())}
+
+    def remove(self):
+        """Delete the spool directory and everything in it."""
+        with self._lock:
+            self._files.clear()
+            shutil.rmtree(self.folder, ignore_errors=True)
+
+
+_spool = None
+_spool_lock = threading.Lock()
+
+
+def get_spool():
+    global _spool
+    with _spool_lock:
+        if _spool is None:
+            _spool = Spool()
+            atexit.register(_spool.remove)
+        return _spool
+
+
+def session_files(session, scope, files):
+    """
+    SpooledFiles for the current uploads of one ``st.file_uploader`` (an
+    upload, a list of them or None), in the same shape. ``scope`` names the
+    uploader within the session. Each upload is spooled once per upload id;
+    those no longer in the uploader are dropped from the session.
+    """
+    if files is None:
+        uploads = []
+    elif isinstance(files, (list, tuple)):
+        uploads = list(files)
+    else:
+        uploads = [files]
+    held = session.setdefault(SESSION_KEY, {})
+    previous = held.get(scope, {})
+    current = {}
+    spooled = []
+    for upload in uploads:
+        upload_id = getattr(upload, "file_id", None) or upload.name
+        if upload_id not in current:
+            current[upload_id] = previous.get(upload_id) or get_spool().add(upload, upload.name, upload_id)
+        spooled.append(current[upload_id])
+    held[scope] = current
+    if isinstance(files, (list, tuple)):
+        return spooled
+    return spooled[0] if spooled else None
+
+
+def content_digest(data):
+    """SHA-256 digest of upload content given as bytes or a SpooledFile."""
+    if isinstance(data, SpooledFile):
+        return data.digest
+    return hashlib.sha256(data).digest()
+
+
+def source(data):
+    """What a reader opens for upload content: a SpooledFile's path, else the bytes themselves."""
+    return data.path if isinstance(data, SpooledFile) else data
@@ -1,7 +1,8 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+from bfsi import analysis, categories, charts, frames, render, streaming, uploads
+from bfsi.lazy import lazy_import
+
+plt = lazy_import("matplotlib.pyplot")
 
 # Helper function: Generate vibrant colors using a chosen colormap
 def get_vibrant_colors(n, cmap_name="Set1"):
@@ -14,49 +15,115 @@ def semi_supervised_module():
 
     # File uploader for CSV data
     file = st.file_uploader("Upload Semi-Structured CSV", type=["csv"])
+    file = uploads.session_files(st.session_state, "semi_supervised", file)
     
     if file is not None:
+        # Files too large to parse whole are read in chunks and summarised
+        stream_csv = st.sidebar.checkbox("Streaming CSV mode", value=streaming.is_large_upload(file),
+                                         help="Read the CSV in chunks and compute statistics incrementally")
         try:
-            # Read CSV into a DataFrame
-            df = pd.read_csv(file)
+            if stream_csv:
+                scan = streaming.scan_upload(file, st.session_state)
+                preview, numeric_cols = scan.preview, scan.numeric_columns
+            else:
+                # Read CSV into a DataFrame (parsed once per upload and cached across reruns)
+                entry = frames.load_upload(file, st.session_state)
+                df = entry.df
+                preview, numeric_cols = df.head(), entry.numeric_columns
             st.subheader("Data Preview")
-            st.dataframe(df.head())
+            st.dataframe(preview)
             
             # Identify numeric columns for visualization
-            numeric_cols = df.select_dtypes(include=np.number).columns.tolist()
             if numeric_cols:
                 col = st.selectbox("Select a numeric column for visualization", numeric_cols)
                 
-                # Bar Chart Visualization
-                st.markdown("**Bar Chart:** Distribution of the selected numeric column.")
-                fig, ax = plt.subplots()
-                df[col].plot(kind="bar", ax=ax, color=get_vibrant_colors(1, "Set2")[0], edgecolor="black")
-                ax.set_xlabel("Index")
-                ax.set_ylabel(col)
-                ax.set_title(f"Bar Chart of {col}")
-                st.pyplot(fig)
+                if stream_csv:
+                    # Histogram Visualization (a bar per row needs every row in memory)
+                    st.write("Summary Statistics:", scan.stats[col].describe(col))
+                    st.markdown("**Histogram:** Distribution of the selected numeric column.")
+                    counts, edges = scan.histogram(col)
+                    def draw_histogram(ax):
+                        ax.bar(edges[:-1], counts, width=edges[1:] - edges[:-1], align="edge",
+                               color=get_vibrant_colors(1, "Set2")[0], edgecolor="black")
+                        ax.set_xlabel(col)
+                        ax.set_ylabel("Frequency")
+                        ax.set_title(f"Histogram of {col} ({scan.rows:,} rows)")
+                    charts.show_chart(charts.render("histogram", draw_histogram, data=(counts, edges),
+                                             params=(col, scan.rows)))
+                    labels, sizes = scan.pie_data(col)
+                else:
+                    # Bar Chart Visualization
+                    st.markdown("**Bar Chart:** Distribution of the selected numeric column.")
+                    def draw_bars(ax):
+                        # Long columns are drawn as binned bars within the point budget
+                        note = render.bars(ax, df[col], color=get_vibrant_colors(1, "Set2")[0], edgecolor="black")
+                        ax.set_xlabel("Index")
+                        ax.set_ylabel(col)
+                        ax.set_title(f"Bar Chart of {col}")
+                        return note
+                    # Rendered once per (file content, column); the frame digest stands in for the data
+                    charts.show_chart(charts.render("bars", draw_bars, params=(entry.digest, col, render.POINT_BUDGET)))
+                    # Value counts when there are few unique values, otherwise ranges
+                    labels, sizes = entry.memo(("pie", col), lambda: analysis.pie_data(df[col]))
                 
                 # Pie Chart Visualization
                 st.markdown("**Pie Chart:** Proportions of data in defined ranges for the selected column.")
-                if df[col].nunique() <= 10:
-                    # If few unique values, show value counts directly
-                    data = df[col].value_counts()
-                    labels = data.index.astype(str)
-                    sizes = data.values
-                else:
-                    # Create bins for broader ranges
-                    bins = np.linspace(df[col].min(), df[col].max(), 6)
-                    data = pd.cut(df[col], bins=bins).value_counts().sort_index()
-                    labels = [f"{round(interval.left, 2)} - {round(interval.right, 2)}" for interval in data.index]
-                    sizes = data.values
-                pie_colors = get_vibrant_colors(len(labels), "Set2")
-                fig2, ax2 = plt.subplots()
-                ax2.pie(sizes, labels=labels, autopct="%1.1f%%", startangle=140, colors=pie_colors)
-                ax2.axis('equal')
-                ax2.set_title(f"Pie Chart of {col}")
-                st.pyplot(fig2)
+                def draw_pie(ax):
+                    pie_colors = get_vibrant_colors(len(labels), "Set2")
+                    ax.pie(sizes, labels=labels, autopct="%1.1f%%", startangle=140, colors=pie_colors)
+                    ax.axis('equal')
+                    ax.set_title(f"Pie Chart of {col}")
+                charts.show_chart(charts.render("pie", draw_pie, data=(list(labels), sizes), params=col))
             else:
                 st.info("No numeric columns found for visualization in the uploaded CSV.")
+
+            # Transaction categories: hashed TF-IDF of the descriptions and a
+            # linear model self-trained on the rows without a category
+            text_cols = scan.text_columns if stream_csv else entry.text_columns
+            if text_cols:
+                st.subheader("Transaction Categories")
+                text_col = st.selectbox("Description column", text_cols)
+                label_options = [categories.NO_LABELS] + [c for c in text_cols if c != text_col]
+                named = [i for i, c in enumerate(label_options) if str(c).strip().lower() == "category"]
+                label_col = st.selectbox("Category column (rows left blank are unlabelled)", label_options,
+                                         index=named[0] if named else 0)
+                if label_col != categories.NO_LABELS:
+                    # Trained once per (file, columns); the model then classifies later uploads too
+                    if stream_csv:
+                        def train_streamed():
+                            # Only the leading MAX_TRAINING_ROWS rows are read to train on
+                            rows = categories.first_rows(scan.iter_chunks([text_col, label_col]))
+                            return categories.train_cached(rows[text_col], rows[label_col])
+                        model = scan.memo(("categories", text_col, label_col), train_streamed)
+                    else:
+                        model = entry.memo(("categories", text_col, label_col),
+                                           lambda: categories.train_cached(df[text_col], df[label_col]))
+                    st.session_state[categories.SESSION_KEY] = model
+                else:
+                    model = st.session_state.get(categories.SESSION_KEY) or categories.get_model()
+
+                if model is None:
+                    st.info("Choose a category column to train the classifier, or train it on a labelled file first.")
+                else:
+                    st.caption(f"Classifier: {model.describe()}")
+                    if stream_csv:
+                        # Classified chunk by chunk; only the counts are kept
+                        counts = scan.memo(("category_counts", model.digest, text_col),
+                                           lambda: model.count_categories(scan.iter_chunks([text_col]), text_col))
+                    else:
+                        predicted = entry.memo(("predicted_categories", model.digest, text_col),
+                                               lambda: model.predict_frame(df, text_col))
+                        st.dataframe(predicted.head(100))
+                        counts = predicted["predicted_category"].value_counts()
+                        st.download_button("Download classified CSV", predicted.to_csv(index=False),
+                                           file_name="classified.csv", mime="text/csv")
+                    def draw_categories(ax):
+                        ax.barh(counts.index.astype(str)[::-1], counts.values[::-1],
+                                color=get_vibrant_colors(1, "Set2")[0], edgecolor="black")
+                        ax.set_xlabel("Rows")
+                        ax.set_title(f"Predicted categories of {text_col}")
+                    charts.show_chart(charts.render("categories", draw_categories,
+                                             data=(list(counts.index.astype(str)), counts.values), params=text_col))
         except Exception as e:
             st.error(f"Error reading CSV: {e}")
     else:
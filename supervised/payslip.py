@@ -1,49 +1,69 @@
+import os
+import sys
 import streamlit as st
-import pandas as pd
-import pytesseract
-from PIL import Image
-import re
 
-def extract_text_from_image(image):
-    return pytesseract.image_to_string(image)
+# Allow `streamlit run supervised/<module>.py` to import the shared bfsi package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bfsi import frames, jobs, ocr, ocr_scheduler, uploads
+from bfsi.preprocess import PreprocessOptions
+
+def extract_text_from_image(file):
+    return ocr.image_to_text(file, options=PreprocessOptions())
 
 def payslip_module():
     st.title("Payslip Analysis Module")
+    # this session's pages queue fairly against other sessions' on the shared OCR pool
+    ocr_scheduler.bind_owner(jobs.session_owner(st.session_state))
     st.markdown("Upload your payslips (CSV or image). For images, OCR will extract key information such as salary details and deductions.")
     
     files = st.file_uploader("Upload Payslip Documents", type=["csv", "png", "jpg", "jpeg"], accept_multiple_files=True)
+    # spooled to disk once per upload; the OCR workers open the files themselves
+    files = uploads.session_files(st.session_state, "payslip", files)
     
     if files:
-        for file in files:
+        slots = [st.container() for _ in files]
+        ocr_jobs = []
+        for idx, (slot, file) in enumerate(zip(slots, files)):
             ext = file.name.split(".")[-1].lower()
-            st.markdown(f"**Processing file: {file.name}**")
-            if ext == "csv":
-                try:
-                    df = pd.read_csv(file)
-                    st.markdown("**Payslip CSV Preview:**")
-                    st.dataframe(df.head())
-                    if "Net Salary" in df.columns:
-                        st.write("Net Salary Summary:", df["Net Salary"].describe())
-                    else:
-                        st.info("CSV does not include a 'Net Salary' column.")
-                except Exception as e:
-                    st.error(f"Error reading CSV: {e}")
-            elif ext in ["png", "jpg", "jpeg"]:
-                try:
-                    image = Image.open(file)
-                    text = extract_text_from_image(image)
+            with slot:
+                st.markdown(f"**Processing file: {file.name}**")
+                if ext == "csv":
+                    try:
+                        entry = frames.load_upload(file, st.session_state)
+                        df = entry.df
+                        st.markdown("**Payslip CSV Preview:**")
+                        st.dataframe(df.head())
+                        if "Net Salary" in df.columns:
+                            st.write("Net Salary Summary:", entry.describe("Net Salary"))
+                        else:
+                            st.info("CSV does not include a 'Net Salary' column.")
+                    except Exception as e:
+                        st.error(f"Error reading CSV: {e}")
+                elif ext in ["png", "jpg", "jpeg"]:
+                    ocr_jobs.append((idx, file))
+                else:
+                    st.info("Unsupported file format.")
+        
+        # OCR runs across the worker pool; each result is written into its
+        # file's container as soon as that page is recognised
+        progress = st.progress(0.0) if ocr_jobs else None
+        results = ocr.iter_ocr(ocr_jobs, options=PreprocessOptions())
+        for done, (idx, text, error, report) in enumerate(results, start=1):
+            with slots[idx]:
+                if error is not None:
+                    st.error(f"Error processing image: {error}")
+                else:
+                    if report is not None:
+                        st.caption(report.summary())
                     st.markdown("**Extracted Text from Payslip Image:**")
-                    st.text_area("", text, height=150)
+                    st.text_area("", text, height=150, key=f"ocr_text_{idx}")
                     # Optionally extract salary figures
-                    salaries = re.findall(r'\d+\.\d{2}', text)
+                    salaries = ocr.find_amounts(text)
                     if salaries:
                         st.write("Extracted Salary Figures:", salaries)
                     else:
                         st.info("No salary figures found in the image text.")
-                except Exception as e:
-                    st.error(f"Error processing image: {e}")
-            else:
-                st.info("Unsupported file format.")
+            progress.progress(done / len(ocr_jobs), text=f"OCR {done}/{len(ocr_jobs)} done: {files[idx].name}")
     else:
         st.info("Please upload at least one payslip document.")
 
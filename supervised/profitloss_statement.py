@@ -1,52 +1,72 @@
+import os
+import sys
 import streamlit as st
-import pandas as pd
-import pytesseract
-from PIL import Image
-import re
 
-def extract_text_from_image(image):
-    return pytesseract.image_to_string(image)
+# Allow `streamlit run supervised/<module>.py` to import the shared bfsi package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bfsi import frames, jobs, ocr, ocr_scheduler, uploads
+from bfsi.preprocess import PreprocessOptions
+
+def extract_text_from_image(file):
+    return ocr.image_to_text(file, options=PreprocessOptions())
 
 def profit_loss_module():
     st.title("Profit/Loss Statement Analysis Module")
+    # this session's pages queue fairly against other sessions' on the shared OCR pool
+    ocr_scheduler.bind_owner(jobs.session_owner(st.session_state))
     st.markdown("Upload profit/loss statements (CSV or image). The module extracts key financial information and provides a data preview.")
     
     files = st.file_uploader("Upload Profit/Loss Documents", type=["csv", "png", "jpg", "jpeg"], accept_multiple_files=True)
+    # spooled to disk once per upload; the OCR workers open the files themselves
+    files = uploads.session_files(st.session_state, "profitloss_statement", files)
     
     if files:
-        for file in files:
+        slots = [st.container() for _ in files]
+        ocr_jobs = []
+        for idx, (slot, file) in enumerate(zip(slots, files)):
             ext = file.name.split(".")[-1].lower()
-            st.markdown(f"**Processing file: {file.name}**")
-            if ext == "csv":
-                try:
-                    df = pd.read_csv(file)
-                    st.markdown("**Profit/Loss CSV Preview:**")
-                    st.dataframe(df.head())
-                    # If a 'Profit' or 'Loss' column exists, show summary
-                    if "Profit" in df.columns:
-                        st.write("Profit Summary:", df["Profit"].describe())
-                    elif "Loss" in df.columns:
-                        st.write("Loss Summary:", df["Loss"].describe())
-                    else:
-                        st.info("CSV does not include 'Profit' or 'Loss' columns.")
-                except Exception as e:
-                    st.error(f"Error reading CSV: {e}")
-            elif ext in ["png", "jpg", "jpeg"]:
-                try:
-                    image = Image.open(file)
-                    text = extract_text_from_image(image)
+            with slot:
+                st.markdown(f"**Processing file: {file.name}**")
+                if ext == "csv":
+                    try:
+                        entry = frames.load_upload(file, st.session_state)
+                        df = entry.df
+                        st.markdown("**Profit/Loss CSV Preview:**")
+                        st.dataframe(df.head())
+                        # If a 'Profit' or 'Loss' column exists, show summary
+                        if "Profit" in df.columns:
+                            st.write("Profit Summary:", entry.describe("Profit"))
+                        elif "Loss" in df.columns:
+                            st.write("Loss Summary:", entry.describe("Loss"))
+                        else:
+                            st.info("CSV does not include 'Profit' or 'Loss' columns.")
+                    except Exception as e:
+                        st.error(f"Error reading CSV: {e}")
+                elif ext in ["png", "jpg", "jpeg"]:
+                    ocr_jobs.append((idx, file))
+                else:
+                    st.info("Unsupported file format.")
+        
+        # OCR runs across the worker pool; each result is written into its
+        # file's container as soon as that page is recognised
+        progress = st.progress(0.0) if ocr_jobs else None
+        results = ocr.iter_ocr(ocr_jobs, options=PreprocessOptions())
+        for done, (idx, text, error, report) in enumerate(results, start=1):
+            with slots[idx]:
+                if error is not None:
+                    st.error(f"Error processing image: {error}")
+                else:
+                    if report is not None:
+                        st.caption(report.summary())
                     st.markdown("**Extracted Text from Profit/Loss Image:**")
-                    st.text_area("", text, height=150)
+                    st.text_area("", text, height=150, key=f"ocr_text_{idx}")
                     # Optionally extract profit/loss figures
-                    figures = re.findall(r'\d+\.\d{2}', text)
+                    figures = ocr.find_amounts(text)
                     if figures:
                         st.write("Extracted Figures:", figures)
                     else:
                         st.info("No profit/loss figures found in the image text.")
-                except Exception as e:
-                    st.error(f"Error processing image: {e}")
-            else:
-                st.info("Unsupported file format.")
+            progress.progress(done / len(ocr_jobs), text=f"OCR {done}/{len(ocr_jobs)} done: {files[idx].name}")
     else:
         st.info("Please upload at least one profit/loss statement document.")
 
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# Allow `python -m pytest` and plain `pytest` from the repository root to import bfsi
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep every on-disk cache and artefact of a test inside its tmp_path."""
+    monkeypatch.setenv("BFSI_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import pytest
+
+from bfsi import catalogue, loans
+
+
+def brute_force(products, academic, credit, income, risk):
+    """Names of the products an applicant is eligible for, by the rule in the module docstring."""
+    def number(product, field, default):
+        value = product.get(field)
+        return default if value is None else float(value)
+
+    if np.isnan(risk):
+        return []
+    chosen = [product for product in products
+              if academic >= number(product, "min_academic_score", -np.inf)
+              and credit >= number(product, "min_credit_score", -np.inf)
+              and (np.isnan(income) or income <= number(product, "max_annual_income", np.inf))
+              and number(product, "min_risk", -np.inf) <= risk < number(product, "max_risk", np.inf)]
+    order = sorted(range(len(chosen)), key=lambda i: (catalogue._rate(chosen[i].get("interest_rate")), i))
+    return [chosen[i]["name"] for i in order]
+
+
+@pytest.fixture
+def products():
+    rng = np.random.default_rng(3)
+    products = []
+    for i in range(40):
+        low = float(rng.choice([0, 10, 20, 35]))
+        product = {"name": f"Loan {i}", "interest_rate": f"{rng.choice([7.5, 8.0, 9.25, 10.0])}%",
+                   "min_academic_score": int(rng.integers(50, 80)),
+                   "min_credit_score": int(rng.integers(650, 780)),
+                   "max_annual_income": int(rng.integers(1000000, 2500000)),
+                   "min_risk": low, "max_risk": low + float(rng.choice([15, 30, np.inf]))}
+        # some thresholds are not set
+        if i % 5 == 0:
+            del product["max_annual_income"]
+        if i % 7 == 0:
+            del product["min_risk"]
+        products.append(product)
+    return products
+
+
+@pytest.fixture
+def applicants():
+    rng = np.random.default_rng(4)
+    n = 500
+    income = rng.integers(200000, 2600000, n).astype(float)
+    income[::9] = np.nan
+    risk = rng.uniform(0, 60, n)
+    risk[::13] = np.nan
+    return rng.integers(45, 100, n).astype(float), rng.integers(600, 800, n).astype(float), income, risk
+
+
+@pytest.mark.parametrize("batch_cells", [catalogue.BATCH_CELLS, 50])
+def test_match_agrees_with_eligible(monkeypatch, products, applicants, batch_cells):
+    monkeypatch.setattr(catalogue, "BATCH_CELLS", batch_cells)
+    index = catalogue.Catalogue(products)
+    academic, credit, income, risk = applicants
+    counts, names = index.match(academic, credit, income, risk, listed=3)
+    for i in range(len(risk)):
+        expected = brute_force(products, academic[i], credit[i], income[i], risk[i])
+        one = [product["name"] for product in index.eligible(academic[i], credit[i],
+                                                             -np.inf if np.isnan(income[i]) else income[i],
+                                                             risk[i])]
+        assert one == expected
+        assert counts[i] == len(expected)
+        assert names[i] == "; ".join(expected[:3])
+
+
+def test_default_products_follow_risk_bands():
+    index = catalogue.Catalogue(catalogue.default_products())
+    for risk in (5.0, 25.0, 60.0):
+        found = {product["name"] for product in index.eligible(100, 850, 0, risk)}
+        expected = {loan["name"] for loan in loans.recommend_loans(risk)}
+        assert found == expected
+
+
+def test_read_products(tmp_path):
+    path = tmp_path / "catalogue.json"
+    path.write_text(json.dumps({"products": loans.EDUCATION_LOANS}))
+    assert catalogue.read_products(str(path)) == loans.EDUCATION_LOANS
+    path.write_text(json.dumps([{"name": " "}]))
+    with pytest.raises(ValueError):
+        catalogue.read_products(str(path))
+    with pytest.raises(ValueError):
+        catalogue.read_products(str(tmp_path / "catalogue.txt"))
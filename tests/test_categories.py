@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bfsi import categories
+
+pytest.importorskip("sklearn")
+
+MERCHANTS = {
+    "Groceries": ["BIGBASKET ORDER", "DMART STORE", "RELIANCE FRESH"],
+    "Transport": ["UBER TRIP", "OLA CABS RIDE", "IRCTC TICKET"],
+    "Utilities": ["ELECTRICITY BILL BESCOM", "AIRTEL POSTPAID BILL", "WATER BILL BWSSB"],
+}
+
+
+@pytest.fixture
+def transactions():
+    rng = np.random.default_rng(6)
+    rows = []
+    for i in range(300):
+        category = list(MERCHANTS)[i % 3]
+        merchant = MERCHANTS[category][rng.integers(3)]
+        rows.append((f"UPI/{rng.integers(10 ** 8)}/{merchant} {rng.integers(100, 5000)}", category))
+    frame = pd.DataFrame(rows, columns=["Description", "Category"])
+    # unlabelled rows, blank and missing
+    frame.loc[::4, "Category"] = np.nan
+    frame.loc[1::9, "Category"] = " "
+    return frame
+
+
+def test_train_counts_blank_labels_as_unlabelled(transactions):
+    model = categories.train(transactions["Description"], transactions["Category"])
+    blank = transactions["Category"].isna() | (transactions["Category"].str.strip() == "")
+    assert model.metrics["unlabelled"] == blank.sum()
+    assert model.metrics["labelled"] + model.metrics["pseudo_labelled"] <= len(transactions)
+    assert model.metrics["accuracy"] > 0.9
+    assert sorted(model.classes) == sorted(MERCHANTS)
+
+
+def test_classify_file_matches_predict_frame(tmp_path, transactions):
+    model = categories.train(transactions["Description"], transactions["Category"])
+    source, out = tmp_path / "statement.csv", tmp_path / "classified.csv"
+    transactions.to_csv(source, index=False)
+    report = categories.classify_file(str(source), str(out), "Description", model, chunksize=70)
+    whole = model.predict_frame(transactions, "Description")
+    written = pd.read_csv(out)
+    assert report.rows == len(transactions)
+    assert written["predicted_category"].tolist() == whole["predicted_category"].tolist()
+    assert report.counts.to_dict() == whole["predicted_category"].value_counts().to_dict()
+    chunks = [transactions.iloc[start:start + 70] for start in range(0, len(transactions), 70)]
+    assert model.count_categories(chunks, "Description").to_dict() == report.counts.to_dict()
+
+
+def test_save_and_load(tmp_path, transactions):
+    model = categories.train(transactions["Description"], transactions["Category"])
+    path = tmp_path / "category_model.npz"
+    model.save(str(path))
+    loaded = categories.get_model(str(path))
+    assert loaded.digest == model.digest
+    assert loaded.metrics == model.metrics
+    texts = transactions["Description"].head(20)
+    assert (loaded.predict(texts)[0] == model.predict(texts)[0]).all()
+
+
+def test_holdout_rows_do_not_shape_the_idf(transactions):
+    model = categories.train(transactions["Description"], transactions["Category"])
+    labelled = np.flatnonzero(pd.notna(categories._labels(transactions["Category"])))
+    order = np.random.default_rng(0).permutation(labelled)
+    changed = transactions.copy()
+    # words only the holdout rows carry
+    test = order[:int(len(order) * 0.2)]
+    changed.loc[test, "Description"] += " HOLDOUTONLY"
+    other = categories.train(changed["Description"], changed["Category"])
+    assert np.array_equal(other.idf, model.idf)
@@ -0,0 +1,85 @@
+import json
+import os
+
+import pandas as pd
+
+from bfsi import cli
+
+
+def write(path, text, mtime=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as handle:
+        handle.write(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def run(root, out, capsys):
+    cli.main(["documents", str(root), "--out", str(out), "--format", "csv", "--batch-size", "2"])
+    return capsys.readouterr().err
+
+
+def manifest(out):
+    with open(out / cli.MANIFEST) as handle:
+        return [json.loads(line) for line in handle]
+
+
+def table(out, name):
+    folder = out / name
+    return pd.concat([pd.read_csv(folder / part) for part in sorted(os.listdir(folder))], ignore_index=True)
+
+
+def test_resume_skips_finished_files(tmp_path, capsys):
+    root, out = tmp_path / "data", tmp_path / "out"
+    write(root / "invoice" / "a.csv", "Amount\n1.5\n2.5\n")
+    write(root / "invoice" / "b.csv", "Amount\n7\n")
+    assert "0 file(s) already processed, 2 to go" in run(root, out, capsys)
+    assert "2 file(s) already processed, 0 to go" in run(root, out, capsys)
+    assert sorted(table(out, "amounts")["value"]) == [1.5, 2.5, 7.0]
+
+
+def test_failed_files_are_retried(tmp_path, capsys):
+    root, out = tmp_path / "data", tmp_path / "out"
+    write(root / "invoice" / "a.csv", "Amount\n1\n")
+    write(root / "invoice" / "bad.csv", "")
+    run(root, out, capsys)
+    assert {entry["path"]: entry["status"] for entry in manifest(out)}["invoice/bad.csv"] == "error"
+
+    assert "1 file(s) already processed, 1 to go" in run(root, out, capsys)
+    write(root / "invoice" / "bad.csv", "Amount\n4\n", mtime=1_700_000_000)
+    run(root, out, capsys)
+    docs = table(out, "documents")
+    assert sorted(docs["path"]) == ["invoice/a.csv", "invoice/bad.csv"]
+    assert docs["error"].isna().all()
+    assert sorted(table(out, "amounts")["value"]) == [1.0, 4.0]
+
+
+def test_changed_files_replace_their_earlier_rows(tmp_path, capsys):
+    root, out = tmp_path / "data", tmp_path / "out"
+    write(root / "invoice" / "a.csv", "Amount\n1\n2\n", mtime=1_600_000_000)
+    write(root / "invoice" / "b.csv", "Amount\n5\n")
+    write(root / "invoice" / "c.csv", "Amount\n9\n")
+    run(root, out, capsys)
+
+    write(root / "invoice" / "a.csv", "Amount\n1\n2\n3\n", mtime=1_700_000_000)
+    assert "2 file(s) already processed, 1 to go" in run(root, out, capsys)
+    amounts = table(out, "amounts")
+    assert sorted(amounts["value"]) == [1.0, 2.0, 3.0, 5.0, 9.0]
+    assert table(out, "documents")["path"].is_unique
+    # one entry per file, pointing at the part that now holds its rows
+    entries = manifest(out)
+    assert len(entries) == 3
+    assert {entry["part"] for entry in entries if entry["path"] == "invoice/a.csv"} == {"part-00002"}
+
+
+def test_fully_superseded_parts_are_removed(tmp_path, capsys):
+    root, out = tmp_path / "data", tmp_path / "out"
+    write(root / "invoice" / "a.csv", "Amount\n1\n", mtime=1_600_000_000)
+    run(root, out, capsys)
+    write(root / "invoice" / "a.csv", "Amount\n2\n", mtime=1_700_000_000)
+    run(root, out, capsys)
+    assert os.listdir(out / "amounts") == ["part-00001.csv"]
+    # numbering continues after the highest part, not the number of parts
+    write(root / "invoice" / "b.csv", "Amount\n3\n")
+    run(root, out, capsys)
+    assert sorted(os.listdir(out / "amounts")) == ["part-00001.csv", "part-00002.csv"]
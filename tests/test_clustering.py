@@ -0,0 +1,87 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bfsi import clustering
+
+
+def brute_force_cost(x, k):
+    """Lowest within-cluster sum of squares over every split of sorted ``x`` into k runs."""
+    x = np.sort(x)
+    best = np.inf
+    for cuts in itertools.combinations(range(1, len(x)), k - 1):
+        groups = np.split(x, cuts)
+        best = min(best, sum(((group - group.mean()) ** 2).sum() for group in groups))
+    return best
+
+
+def cost(x, thresholds):
+    labels = np.searchsorted(thresholds, x, side="right")
+    return sum(((x[labels == label] - x[labels == label].mean()) ** 2).sum() for label in np.unique(labels))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_optimal_breaks_match_brute_force(seed):
+    x = np.random.default_rng(seed).normal(size=12)
+    breaks = clustering.optimal_breaks(x, 4)
+    assert sorted(breaks) == [1, 2, 3, 4]
+    assert len(breaks[1]) == 0
+    for k in (2, 3, 4):
+        assert len(breaks[k]) == k - 1
+        assert cost(x, breaks[k]) == pytest.approx(brute_force_cost(x, k))
+
+
+def test_optimal_breaks_count_repeated_values():
+    x = np.array([1.0] * 50 + [2.0] + [10.0] * 5)
+    thresholds = clustering.optimal_breaks(x, 2)[2]
+    assert np.searchsorted(thresholds, [1.0, 2.0, 10.0], side="right").tolist() == [0, 0, 1]
+
+
+def blobs(centres, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.concatenate([rng.normal(centre, 1.0, rows) for centre in centres])
+
+
+def test_one_column_chooses_k_and_orders_clusters():
+    df = pd.DataFrame({"amount": blobs([0, 50, 100], 200)})
+    result = clustering.cluster_columns(df, ["amount"])
+    assert result.model.method == "optimal breaks"
+    assert result.model.k == 3
+    assert max(result.scores, key=result.scores.get) == 3
+    assert result.model.centers[:, 0] == pytest.approx([0, 50, 100], abs=0.5)
+    assert np.bincount(result.labels).tolist() == [200, 200, 200]
+
+
+def test_binned_breaks_beyond_max_points():
+    x = blobs([0, 100], 5 * clustering.MAX_BREAK_POINTS)
+    assert np.unique(x).size > clustering.MAX_BREAK_POINTS
+    result = clustering.cluster_columns(pd.DataFrame({"x": x}), ["x"], n_clusters=2)
+    assert np.bincount(result.labels).tolist() == [x.size // 2, x.size // 2]
+
+
+def test_several_columns_use_kmeans_and_skip_nan_rows():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({"a": np.r_[rng.normal(0, 1, 100), rng.normal(20, 1, 100)],
+                       "b": np.r_[rng.normal(0, 1, 100), rng.normal(-20, 1, 100)]})
+    df.loc[5, "a"] = np.nan
+    result = clustering.cluster_columns(df, ["a", "b"])
+    assert result.model.method == "k-means"
+    assert result.model.k == 2
+    assert len(result.index) == 199 and 5 not in result.index
+    assert sorted(np.bincount(result.labels).tolist()) == [99, 100]
+
+
+def test_cluster_sizes_match_labels_across_chunks():
+    df = pd.DataFrame({"x": blobs([0, 30, 60], 100, seed=4)})
+    result = clustering.cluster_columns(df, ["x"], n_clusters=3)
+    sizes = clustering.cluster_sizes(result.model, (df.iloc[start:start + 75] for start in range(0, len(df), 75)))
+    assert sizes.tolist() == np.bincount(result.labels, minlength=3).tolist()
+
+
+def test_models_are_cached_by_data():
+    clustering.get_models().clear()
+    df = pd.DataFrame({"x": blobs([0, 10], 50)})
+    first = clustering.cluster_columns(df, ["x"], n_clusters=2)
+    assert clustering.cluster_columns(df.copy(), ["x"], n_clusters=2).model is first.model
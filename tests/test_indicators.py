@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bfsi import indicators
+
+
+@pytest.fixture
+def closes():
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range("2023-01-02", periods=300)
+    data = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (300, 3)), axis=0))
+    frame = pd.DataFrame(data, index=index, columns=["AAA", "BBB", "CCC"])
+    # a ticker that starts trading later and a missing day
+    frame.iloc[:40, 2] = np.nan
+    frame.iloc[150, 1] = np.nan
+    return frame
+
+
+@pytest.mark.parametrize("cuts", [[100], [27, 28, 200], [250, 299]])
+def test_incremental_compute_matches_full_history(closes, cuts):
+    full, _ = indicators.compute(closes, window=14)
+    parts, state = [], None
+    for start, stop in zip([0] + cuts, cuts + [len(closes)]):
+        result, state = indicators.compute(closes.iloc[start:stop], window=14, state=state)
+        parts.append(result)
+    pd.testing.assert_frame_equal(pd.concat(parts), full, rtol=1e-9)
+
+
+def test_indicators_match_pandas(closes):
+    table, _ = indicators.compute(closes, window=20)
+    close = closes["AAA"]
+    pd.testing.assert_series_equal(table[("SMA", "AAA")], close.rolling(20).mean(), check_names=False)
+    pd.testing.assert_series_equal(table[("Drawdown", "AAA")], close / close.cummax() - 1, check_names=False)
+    ema = close.ewm(span=20, adjust=False).mean()
+    assert table[("EMA", "AAA")].iloc[19:].to_numpy() == pytest.approx(ema.iloc[19:].to_numpy())
+    assert table[("EMA", "AAA")].iloc[:19].isna().all()
+    rsi = table[("RSI", "AAA")].dropna()
+    assert ((rsi >= 0) & (rsi <= 100)).all()
+
+
+def test_engine_extends_appended_rows(closes):
+    engine = indicators.IndicatorEngine()
+    full, _ = indicators.compute(closes, window=10)
+    pd.testing.assert_frame_equal(engine.indicators(closes.iloc[:200], window=10), full.iloc[:200])
+    pd.testing.assert_frame_equal(engine.indicators(closes, window=10), full, rtol=1e-9)
+    # an unchanged history is served from the memo
+    pd.testing.assert_frame_equal(engine.indicators(closes, window=10), full, rtol=1e-9)
+
+
+def test_engine_recomputes_a_changed_history(closes):
+    engine = indicators.IndicatorEngine()
+    engine.indicators(closes, window=10)
+    changed = closes.copy()
+    changed.iloc[50, 0] *= 1.1
+    expected, _ = indicators.compute(changed, window=10)
+    pd.testing.assert_frame_equal(engine.indicators(changed, window=10), expected)
+
+
+def test_latest_takes_the_last_value_per_ticker(closes):
+    table, _ = indicators.compute(closes, window=10)
+    latest = indicators.latest(table)
+    assert list(latest.columns) == indicators.INDICATORS
+    assert latest.loc["BBB", "SMA"] == table[("SMA", "BBB")].dropna().iloc[-1]
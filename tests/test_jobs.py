@@ -0,0 +1,46 @@
+import sqlite3
+import time
+
+import pytest
+
+from bfsi import jobs
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return jobs.JobQueue(str(tmp_path / "jobs.sqlite3"), threads=2, per_owner=1)
+
+
+def wait(queue, job_id):
+    for _ in range(500):
+        job = queue.get(job_id)
+        if job.status not in jobs.ACTIVE:
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_connect_closes_the_connection(queue):
+    with queue._connect() as conn:
+        conn.execute("SELECT 1")
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_connect_commits(queue):
+    with queue._connect() as conn:
+        conn.execute("INSERT INTO jobs (id, owner, kind, key, status, created) VALUES ('a', 'o', 'k', 'x', ?, 0)",
+                     (jobs.DONE,))
+    assert queue.get("a").status == jobs.DONE
+
+
+def test_submit_is_idempotent_until_retried(queue):
+    job = queue.submit("owner", "kind", "key", lambda context: 42)
+    assert queue.submit("owner", "kind", "key", lambda context: 0).id == job.id
+    assert wait(queue, job.id).status == jobs.DONE
+    assert queue.result(job.id) == 42
+    assert queue.submit("owner", "kind", "key", lambda context: 0).id == job.id
+    again = queue.submit("owner", "kind", "key", lambda context: 7, retry=True)
+    assert again.id != job.id
+    wait(queue, again.id)
+    assert queue.result(again.id) == 7
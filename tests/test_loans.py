@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bfsi import catalogue, loans, scoring
+
+
+@pytest.fixture
+def applicants():
+    rng = np.random.default_rng(2)
+    n = 200
+    frame = pd.DataFrame({
+        "Academic Score": rng.uniform(40, 100, n).round(1),
+        "Credit Score": rng.integers(550, 850, n),
+        "Marks 12": rng.uniform(40, 100, n).round(1),
+        "UG Marks": rng.uniform(40, 100, n).round(1),
+        "Past Loan Amount": rng.choice([0, 50000, 250000], n),
+        "EMI Bounces": rng.integers(0, 4, n),
+        "Annual Income": rng.integers(200000, 2500000, n),
+    })
+    # not provided, as in the single-applicant form
+    frame.loc[::7, "UG Marks"] = np.nan
+    frame.loc[::11, "Past Loan Amount"] = np.nan
+    return frame
+
+
+def test_risk_scores_match_risk_score(applicants):
+    values = loans.applicant_values(applicants)
+    scored = loans.score_applicants(applicants)
+    for i in range(len(applicants)):
+        ug = values["ug_marks"][i]
+        loan = values["past_loan_amount"][i]
+        expected = loans.risk_score(values["academic_score"][i], values["credit_score"][i],
+                                    values["marks_12"][i], None if np.isnan(ug) else ug,
+                                    0.0 if np.isnan(loan) else loan, values["emi_bounces"][i])
+        assert scored["risk_score"].iloc[i] == expected
+
+
+def test_risk_bands_follow_recommend_loans(applicants):
+    scored = loans.score_applicants(applicants)
+    for risk, band in zip(scored["risk_score"], scored["risk_band"]):
+        names = [loan["name"] for loan in loans.recommend_loans(risk)]
+        assert sorted(names) == sorted(loans.RISK_BANDS[band][1])
+
+
+def test_blank_required_value_is_unscored(applicants):
+    applicants.loc[3, "Credit Score"] = np.nan
+    scored = loans.score_applicants(applicants)
+    assert np.isnan(scored["risk_score"].iloc[3])
+    assert scored["risk_band"].iloc[3] == len(loans.RISK_BANDS)
+
+
+def test_missing_required_column(applicants):
+    with pytest.raises(ValueError, match="marks_12"):
+        loans.applicant_columns(applicants.drop(columns="Marks 12").columns)
+
+
+@pytest.mark.parametrize("out_name", ["scored.csv", "scored.parquet"])
+def test_score_file_in_chunks_matches_score_frame(tmp_path, applicants, out_name):
+    source = tmp_path / "applicants.csv"
+    applicants.to_csv(source, index=False)
+    whole, report = scoring.score_frame(pd.read_csv(source))
+    chunked = scoring.score_file(str(source), str(tmp_path / out_name), chunksize=30)
+    assert chunked.rows == report.rows == len(applicants)
+    assert chunked.band_counts == report.band_counts
+    assert chunked.band_matched == report.band_matched
+    written = scoring.read_applicants(str(tmp_path / out_name), scoring.file_format(out_name))
+    assert written["risk_score"].to_numpy() == pytest.approx(whole["risk_score"].to_numpy(), nan_ok=True)
+    assert (written["eligible_loans"].to_numpy() == whole["eligible_loans"].to_numpy()).all()
+
+
+def test_empty_catalogue_matches_nothing(applicants):
+    scored, report = scoring.score_frame(applicants, products=catalogue.Catalogue([]))
+    assert (scored["eligible_loans"] == 0).all()
+    assert (scored["recommended_loans"] == "").all()
+    assert sum(report.band_matched) == 0
@@ -0,0 +1,22 @@
+import io
+
+import pytest
+
+from bfsi import ocr, ocr_cache, uploads
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ocr_cache.OCRCache(str(tmp_path / "ocr_cache.sqlite3"))
+    monkeypatch.setattr(ocr, "get_cache", lambda: cache)
+    return cache
+
+
+def test_entry_points_share_cache_keys(cache):
+    data = b"\x89PNG not really an image"
+    cache.put(ocr._content_key(data, ocr._cache_config("", None)), "cached text")
+    spooled = uploads.get_spool().add(io.BytesIO(data), "page.png")
+    # cache hits never reach tesseract
+    assert ocr.image_to_text(data) == "cached text"
+    assert ocr.image_to_text(spooled) == "cached text"
+    assert [result.text for result in ocr.iter_ocr([(0, data), (1, spooled)])] == ["cached text"] * 2
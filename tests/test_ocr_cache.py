@@ -0,0 +1,27 @@
+import sqlite3
+
+import pytest
+
+from bfsi import ocr_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ocr_cache.OCRCache(str(tmp_path / "ocr_cache.sqlite3"), max_bytes=10)
+
+
+def test_connect_closes_the_connection(cache):
+    with cache._connect() as conn:
+        conn.execute("SELECT 1")
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.put("a", "12345")
+    cache.put("b", "12345")
+    assert cache.get("a") == "12345"
+    cache.put("c", "12345")
+    assert cache.get("b") is None
+    assert cache.get("a") == cache.get("c") == "12345"
+    assert cache.stats()["bytes"] == 10
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bfsi import portfolio
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(1)
+    index = pd.bdate_range("2023-01-02", periods=250)
+    closes = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (250, 3)), axis=0)),
+                          index=index, columns=["AAA", "BBB", "CCC"])
+    # a late listing and a few missing days, so pairs cover different dates
+    closes.iloc[:30, 2] = np.nan
+    closes.iloc[[50, 51, 120], 1] = np.nan
+    return portfolio.log_returns(closes)
+
+
+def test_log_returns():
+    closes = pd.DataFrame({"AAA": [100.0, 110.0, 99.0]})
+    result = portfolio.log_returns(closes)
+    assert len(result) == 2
+    assert result["AAA"].to_numpy() == pytest.approx(np.log([1.1, 0.9]))
+
+
+def test_return_matrices_match_pandas(returns):
+    covariance, correlation = portfolio.return_matrices(returns)
+    pd.testing.assert_frame_equal(covariance, returns.cov(), rtol=1e-9)
+    pd.testing.assert_frame_equal(correlation, returns.corr(), rtol=1e-9)
+
+
+def test_return_matrices_min_periods():
+    returns = pd.DataFrame({"AAA": [0.01, 0.02, -0.01], "BBB": [np.nan, np.nan, 0.03]})
+    covariance, correlation = portfolio.return_matrices(returns)
+    assert np.isnan(covariance.loc["AAA", "BBB"]) and np.isnan(correlation.loc["BBB", "BBB"])
+    assert correlation.loc["AAA", "AAA"] == pytest.approx(1.0)
+
+
+def test_benchmark_returns(returns):
+    pd.testing.assert_series_equal(portfolio.benchmark_returns(returns, "BBB"), returns["BBB"])
+    equal = portfolio.benchmark_returns(returns)
+    assert equal.name == portfolio.EQUAL_WEIGHT
+    pd.testing.assert_series_equal(equal, returns.mean(axis=1), check_names=False)
+
+
+def test_rolling_against_matches_pandas(returns):
+    benchmark = returns["AAA"]
+    window = 40
+    rolling = portfolio.rolling_against(returns, benchmark, window=window, min_periods=30)
+    for ticker in returns.columns:
+        pair = pd.concat([returns[ticker], benchmark], axis=1, keys=["x", "y"]).where(
+            returns[ticker].notna() & benchmark.notna())
+        expected_corr = pair["x"].rolling(window, min_periods=30).corr(pair["y"])
+        expected_beta = pair["x"].rolling(window, min_periods=30).cov(pair["y"]) \
+            / pair["y"].rolling(window, min_periods=30).var()
+        # no partial windows at the start
+        assert rolling.correlation[ticker].iloc[:window - 1].isna().all()
+        assert rolling.correlation[ticker].iloc[window - 1:].to_numpy() == pytest.approx(
+            expected_corr.clip(-1, 1).iloc[window - 1:].to_numpy(), nan_ok=True, abs=1e-9)
+        assert rolling.beta[ticker].iloc[window - 1:].to_numpy() == pytest.approx(
+            expected_beta.iloc[window - 1:].to_numpy(), nan_ok=True, abs=1e-9)
+    assert rolling.beta["AAA"].dropna().to_numpy() == pytest.approx(1.0)
+
+
+def test_summary(returns):
+    benchmark = portfolio.benchmark_returns(returns)
+    table = portfolio.summary(returns, benchmark)
+    assert table.loc["BBB", "Annualised return"] == pytest.approx(returns["BBB"].mean() * portfolio.TRADING_DAYS)
+    both = returns["BBB"].notna()
+    expected_beta = returns["BBB"][both].cov(benchmark[both]) / benchmark[both].var()
+    assert table.loc["BBB", "Beta"] == pytest.approx(expected_beta)
+    assert table.loc["BBB", "Correlation"] == pytest.approx(returns["BBB"].corr(benchmark))
@@ -0,0 +1,47 @@
+import matplotlib
+import numpy as np
+import pandas as pd
+import pytest
+
+from bfsi import render
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+
+@pytest.fixture
+def ax():
+    fig, ax = plt.subplots()
+    yield ax
+    plt.close(fig)
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(7)
+    index = pd.bdate_range("2023-01-02", periods=300)
+    frame = pd.DataFrame(np.cumsum(rng.normal(0, 1, (300, 3)), axis=0), index=index, columns=["AAA", "BBB", "CCC"])
+    frame.iloc[:40, 2] = np.nan
+    return frame
+
+
+def test_lttb_keeps_the_ends_and_extremes():
+    y = np.zeros(1000)
+    y[500] = 10.0
+    keep = render.lttb_indices(np.arange(1000), y, 50)
+    assert len(keep) == 50 and keep[0] == 0 and keep[-1] == 999
+    assert 500 in keep
+    assert (np.diff(keep) > 0).all()
+
+
+def test_lines_labels_each_column(ax, frame):
+    note = render.lines(ax, frame, budget=50)
+    assert [line.get_label() for line in ax.get_lines()] == list(frame.columns)
+    assert all(len(line.get_xdata()) <= 50 for line in ax.get_lines())
+    assert note.count("LTTB") == 3 and note.startswith("AAA: 300 points")
+    assert "CCC: 260 points" in note
+
+
+def test_lines_takes_pairs_and_notes_only_downsampled_series(ax, frame):
+    assert render.lines(ax, [("short", frame["AAA"].iloc[:10])], budget=50) is None
+    assert len(ax.get_lines()[0].get_xdata()) == 10
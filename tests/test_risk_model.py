@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bfsi import loans, risk_model
+
+pytest.importorskip("sklearn")
+
+
+@pytest.fixture
+def labelled():
+    rng = np.random.default_rng(5)
+    n = 400
+    frame = pd.DataFrame({
+        "academic_score": rng.uniform(40, 100, n),
+        "credit_score": rng.uniform(550, 850, n),
+        "marks_12": rng.uniform(40, 100, n),
+        "ug_marks": rng.uniform(40, 100, n),
+        "past_loan_amount": rng.choice([0.0, 50000.0, 250000.0], n),
+        "emi_bounces": rng.integers(0, 4, n).astype(float),
+        "annual_income": rng.uniform(200000, 2500000, n),
+    })
+    frame.loc[::6, "ug_marks"] = np.nan
+    frame.loc[::10, "annual_income"] = np.nan
+    risk = loans.risk_scores(**{name: frame[name].to_numpy() for name in frame.columns if name != "annual_income"})
+    frame["Defaulted"] = (risk + rng.normal(0, 5, n) > np.median(risk)).astype(int)
+    return frame
+
+
+def test_probability_matches_probabilities(labelled):
+    model = risk_model.train(labelled)
+    values = loans.applicant_values(labelled)
+    batch = model.probabilities(values)
+    for i in range(0, len(labelled), 17):
+        ug = values["ug_marks"][i]
+        income = values["annual_income"][i]
+        one = model.probability(values["academic_score"][i], values["credit_score"][i], values["marks_12"][i],
+                                None if np.isnan(ug) else ug, values["past_loan_amount"][i],
+                                values["emi_bounces"][i], None if np.isnan(income) else income)
+        assert one == pytest.approx(batch[i])
+    assert model.metrics["auc"] > 0.8
+
+
+def test_holdout_rows_do_not_shape_the_fit(labelled):
+    model = risk_model.train(labelled, holdout=0.25)
+    order = np.random.default_rng(0).permutation(len(labelled))
+    changed = labelled.copy()
+    # income of the holdout rows, blank ones included
+    changed.loc[order[:100], "annual_income"] = 1e9
+    other = risk_model.train(changed, holdout=0.25)
+    assert other.mean == pytest.approx(model.mean)
+    assert other.scale == pytest.approx(model.scale)
+    assert other.coef == pytest.approx(model.coef)
+
+
+def test_save_and_load(tmp_path, labelled):
+    model = risk_model.train(labelled)
+    path = tmp_path / "risk_model.json"
+    model.save(str(path))
+    loaded = risk_model.RiskModel.load(str(path))
+    assert loaded.to_dict() == model.to_dict()
+    assert risk_model.get_model(str(path)).describe() == model.describe()
+    assert risk_model.get_model(str(tmp_path / "missing.json")) is None
@@ -0,0 +1,76 @@
+import math
+
+import pandas as pd
+
+from bfsi import statement
+
+STATEMENT = """\
+ACME BANK  Statement of account
+Date Description Debit Credit Balance
+01/04/2024 Opening balance 1,000.00
+02/04/2024 ATM withdrawal 200.00 800.00
+03/04/2024 Salary 5,000.00 5,800.00
+05/04/2024 Card payment to
+GROCER LTD 49.99 5,750.01
+Closing balance 5,750.01
+"""
+
+
+def test_parse_statement_text_rows():
+    rows = statement.parse_statement_text(STATEMENT)
+    assert list(rows.columns) == statement.COLUMNS
+    assert len(rows) == 4
+    assert rows["date"].tolist() == [pd.Timestamp(2024, 4, day) for day in (1, 2, 3, 5)]
+    assert rows["balance"].tolist() == [1000.0, 800.0, 5800.0, 5750.01]
+
+
+def test_bare_amounts_follow_the_balance_movement():
+    rows = statement.parse_statement_text(STATEMENT)
+    assert rows.loc[1, "debit"] == 200.0 and math.isnan(rows.loc[1, "credit"])
+    assert rows.loc[2, "credit"] == 5000.0 and math.isnan(rows.loc[2, "debit"])
+
+
+def test_wrapped_description_and_trailing_totals():
+    rows = statement.parse_statement_text(STATEMENT)
+    assert rows.loc[3, "description"] == "Card payment to GROCER LTD"
+    assert rows.loc[3, "debit"] == 49.99
+    # the closing line after a complete row is not a transaction
+    assert not rows["description"].str.contains("Closing").any()
+
+
+def test_dr_cr_markers_win_over_the_balance():
+    rows = statement.parse_statement_text(
+        "10-Jan-2024 Refund 25.00 Cr 500.00\n"
+        "11-Jan-2024 Fee 5.00Dr 495.00\n"
+    )
+    assert rows["credit"].tolist()[0] == 25.0
+    assert rows["debit"].tolist()[1] == 5.0
+    assert rows["date"].tolist() == [pd.Timestamp(2024, 1, 10), pd.Timestamp(2024, 1, 11)]
+
+
+def test_three_amounts_fill_debit_credit_balance():
+    rows = statement.parse_statement_text("01.02.2024 Transfer 10.00 0.00 90.00\n")
+    assert rows.loc[0, "debit"] == 10.0
+    assert math.isnan(rows.loc[0, "credit"])
+    assert rows.loc[0, "balance"] == 90.0
+
+
+def test_word_boxes_are_assigned_by_header_column():
+    header = [statement.Word("Date", 50), statement.Word("Details", 200), statement.Word("Debit", 400),
+              statement.Word("Credit", 500), statement.Word("Balance", 600)]
+    row = [statement.Word("01/03/2024", 80), statement.Word("Interest", 220),
+           statement.Word("12.50", 505), statement.Word("112.50", 600)]
+    rows = statement.parse_lines([header, row])
+    assert rows.loc[0, "credit"] == 12.5
+    assert math.isnan(rows.loc[0, "debit"])
+    assert rows.loc[0, "balance"] == 112.5
+
+
+def test_summary_and_monthly_flows():
+    rows = statement.parse_statement_text(STATEMENT)
+    summary = statement.summarise(rows)
+    assert summary["transactions"] == 3
+    assert summary["opening_balance"] == 1000.0
+    assert summary["closing_balance"] == 5750.01
+    assert math.isclose(summary["net_flow"], 5000.0 - 249.99)
+    assert statement.monthly_flows(rows).loc[pd.Period("2024-04"), "credit"] == 5000.0
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bfsi import streaming
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(1)
+    data = rng.normal(50, 12, 30_000)
+    data[::97] = np.nan
+    return data
+
+
+def test_chunked_stats_match_pandas(values):
+    stats = streaming.ColumnStats()
+    for chunk in np.array_split(values, 7):
+        stats.update(chunk)
+    expected = pd.Series(values).describe()
+    assert stats.count == expected["count"]
+    assert stats.mean == pytest.approx(expected["mean"])
+    assert stats.std == pytest.approx(expected["std"])
+    assert (stats.min, stats.max) == (expected["min"], expected["max"])
+
+
+def test_merge_matches_one_pass(values):
+    left, right, whole = streaming.ColumnStats(), streaming.ColumnStats(), streaming.ColumnStats()
+    left.update(values[:10_000])
+    right.update(values[10_000:])
+    whole.update(values)
+    merged = left.merge(right)
+    assert merged.count == whole.count
+    assert merged.mean == pytest.approx(whole.mean)
+    assert merged.std == pytest.approx(whole.std)
+    assert (merged.min, merged.max) == (whole.min, whole.max)
+
+
+def test_quartiles_are_exact_within_the_reservoir():
+    data = np.arange(1000, dtype=float)
+    stats = streaming.ColumnStats()
+    for chunk in np.array_split(data, 3):
+        stats.update(chunk)
+    assert stats.exact_quantiles
+    assert stats.describe()[["25%", "50%", "75%"]].tolist() == np.percentile(data, [25, 50, 75]).tolist()
+
+
+def test_reservoir_is_a_uniform_sample():
+    data = np.arange(200_000, dtype=float)
+    stats = streaming.ColumnStats(reservoir_size=5_000)
+    for chunk in np.array_split(data, 40):
+        stats.update(chunk)
+    sample = stats.sample()
+    assert sample.size == 5_000 and not stats.exact_quantiles
+    assert np.unique(sample).size == sample.size
+    # every part of the stream is represented, not just the first rows
+    counts = np.histogram(sample, bins=4, range=(0, 200_000))[0]
+    assert counts.min() > 1_000
+    assert np.median(sample) == pytest.approx(100_000, rel=0.05)
+
+
+def test_merged_reservoir_weights_each_side_by_its_rows():
+    big, small = streaming.ColumnStats(reservoir_size=1_000), streaming.ColumnStats(reservoir_size=1_000)
+    big.update(np.zeros(90_000))
+    small.update(np.ones(10_000))
+    sample = big.merge(small).sample()
+    assert sample.size == 1_000
+    assert sample.mean() == pytest.approx(0.1, abs=0.04)
+
+
+def test_value_counts_stop_past_max_unique():
+    stats = streaming.ColumnStats(max_unique=3)
+    stats.update([1, 1, 2])
+    assert stats.value_counts().to_dict() == {1.0: 2, 2.0: 1}
+    stats.update([3, 4])
+    assert stats.value_counts() is None
+
+
+def test_scan_csv_matches_a_full_read(tmp_path):
+    rng = np.random.default_rng(2)
+    frame = pd.DataFrame({"a": rng.normal(size=5_000), "b": rng.integers(0, 100, 5_000), "c": ["x"] * 5_000})
+    path = tmp_path / "data.csv"
+    frame.to_csv(path, index=False)
+    scan = streaming.scan_csv(str(path), chunksize=700)
+    assert scan.rows == 5_000
+    assert scan.numeric_columns == ["a", "b"] and scan.text_columns == ["c"]
+    described = scan.describe()
+    assert described.loc["mean"].tolist() == pytest.approx(frame[["a", "b"]].mean().tolist())
+    counts, edges = streaming.streamed_histogram(scan.iter_column("a"), scan.stats["a"], bins=8)
+    assert counts.tolist() == np.histogram(pd.read_csv(path)["a"], bins=edges)[0].tolist()
+
+
+def test_aggregate_extends_the_previous_rerun():
+    session = {}
+    parts = [streaming.Partial([1.0, 2.0]), streaming.Partial([3.0])]
+    first = streaming.aggregate(parts, session)
+    assert streaming.aggregate(parts, session) is first
+    extended = streaming.aggregate(parts + [streaming.Partial([4.0, 5.0])], session)
+    assert len(extended) == 5
+    assert extended.describe()["mean"] == 3.0
+    counts, _ = extended.histogram(bins=4)
+    assert counts.sum() == 5
@@ -1,36 +1,74 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-from sklearn.cluster import KMeans
+from bfsi import charts, clustering, frames, render, streaming, uploads
+from bfsi.lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+plt = lazy_import("matplotlib.pyplot")
 
 def unsupervised_module():
     st.title("Unsupervised Module - Clustering Analysis")
     file = st.file_uploader("Upload Unstructured CSV", type=["csv"])
+    file = uploads.session_files(st.session_state, "unsupervised", file)
     if file is not None:
+        stream_csv = st.sidebar.checkbox("Streaming CSV mode", value=streaming.is_large_upload(file),
+                                         help="Read the CSV in chunks and cluster a uniform sample of rows")
         try:
-            df = pd.read_csv(file)
+            if stream_csv:
+                scan = streaming.scan_upload(file, st.session_state)
+                preview, numeric_cols = scan.preview, scan.numeric_columns
+            else:
+                entry = frames.load_upload(file, st.session_state)
+                df = entry.df
+                preview, numeric_cols = df.head(), entry.numeric_columns
             st.subheader("Data Preview")
-            st.dataframe(df.head())
+            st.dataframe(preview)
             
-            numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
             if numeric_cols:
-                col = st.selectbox("Select a numeric column for clustering", numeric_cols)
+                cols = st.multiselect("Select numeric columns for clustering", numeric_cols,
+                                      default=numeric_cols[:1])
+                k_choice = st.selectbox("Number of clusters", ["Auto"] + list(range(2, 9)))
+                n_clusters = None if k_choice == "Auto" else int(k_choice)
+                key = ("clusters", tuple(cols), n_clusters)
                 try:
-                    X = df[[col]].dropna()
-                    kmeans = KMeans(n_clusters=3, random_state=0)
-                    clusters = kmeans.fit_predict(X)
-                    df['Cluster'] = None
-                    df.loc[X.index, 'Cluster'] = clusters
+                    if not cols:
+                        raise ValueError("select at least one numeric column")
+                    # Fitted models are also cached by data hash inside bfsi.clustering
+                    if stream_csv:
+                        df = scan.memo("sample_rows", scan.sample_rows)
+                        result = scan.memo(key, lambda: clustering.cluster_columns(df, cols, n_clusters))
+                        sizes = scan.memo(("sizes",) + key,
+                                          lambda: clustering.cluster_sizes(result.model, scan.iter_frames(cols)))
+                        st.caption(f"Fitted on a uniform sample of {len(df):,} of {scan.rows:,} rows; "
+                                   "cluster sizes cover the whole file.")
+                    else:
+                        result = entry.memo(key, lambda: clustering.cluster_columns(df, cols, n_clusters))
+                        sizes = np.bincount(result.labels, minlength=result.model.k)
+                    model = result.model
+                    st.markdown(f"**{model.k} cluster(s)** found with {model.method}"
+                                + (", k chosen by silhouette score" if result.scores else ""))
+                    if result.scores:
+                        st.write("Silhouette Score by k:", pd.Series(result.scores, name="silhouette"))
+                    st.write("Cluster Centres:", pd.DataFrame(model.centers, columns=cols).assign(rows=sizes))
+                    
+                    X = df.loc[result.index, cols]
+                    df = clustering.with_clusters(df, result.index, result.labels)
                     st.subheader("Clustering Result")
                     st.dataframe(df.head())
                     
                     st.markdown("**Scatter Plot:**")
-                    fig, ax = plt.subplots()
-                    ax.scatter(range(len(X)), X[col], c=clusters, cmap='viridis')
-                    ax.set_xlabel("Index")
-                    ax.set_ylabel(col)
-                    ax.set_title(f"Clustering on {col}")
-                    st.pyplot(fig)
+                    def draw_scatter(ax):
+                        if len(cols) == 1:
+                            note = render.scatter(ax, np.arange(len(X)), X[cols[0]], labels=result.labels)
+                            ax.set_xlabel("Index")
+                        else:
+                            note = render.scatter(ax, X[cols[0]], X[cols[1]], labels=result.labels)
+                            ax.set_xlabel(cols[0])
+                        ax.set_ylabel(cols[1] if len(cols) > 1 else cols[0])
+                        ax.set_title(f"Clustering on {', '.join(cols)}")
+                        return note
+                    charts.show_chart(charts.render("clusters", draw_scatter, data=(X, result.labels),
+                                             params=render.POINT_BUDGET))
                 except Exception as e:
                     st.error(f"Error during clustering: {e}")
             else: